@@ -1,447 +1,559 @@
 import streamlit as st
-import pandas as pd
 import os
-from src.data_cleaning import load_data, load_excel_sheets, clean_data, normalize_columns, detect_subject_columns, compute_percentage_column
 from src.schema import ID_COLUMNS, MARKS_MAX, PASS_MARK
 from src.ui_components import inject_font, page_header, section_header, render_cleaning_report
-import time
-
-st.set_page_config(
-    page_title="Lume/upload",
-    page_icon="assets/icon.png",
-    layout="wide"
-)
-st.logo("assets/logo.png", icon_image="assets/icon.png")
-inject_font()
-page_header(
-    label="Academic Analytics",
-    title="Student Performance Analysis",
-    subtitle="Upload a student dataset to clean, analyse and visualise academic performance."
+from src.dataset_store import content_key
+from src.exports import EXPORT_LAYOUTS, EXPORT_FORMATS, available_formats
+from src.session_data import (
+    RAW_KEY, attach_raw, attach_dataset, has_dataset, raw_upload, cleaned_dataset, dataset_artifact,
+    export_download, dataset_file_path, sheet_subject_columns, student_profiles, start_cleaning_job, cleaning_job, cancel_cleaning_job, collect_cleaning_job
 )
+from src.jobs import JOB_FAILED, JOB_CANCELLED
 
-if "data_ready" not in st.session_state:
-    st.session_state.data_ready = False
+if __name__ == "__main__":
+    st.set_page_config(
+        page_title="Lume/upload",
+        page_icon="assets/icon.png",
+        layout="wide"
+    )
+    st.logo("assets/logo.png", icon_image="assets/icon.png")
+    inject_font()
+    page_header(
+        label="Academic Analytics",
+        title="Student Performance Analysis",
+        subtitle="Upload a student dataset to clean, analyse and visualise academic performance."
+    )
 
-# show a notice if data is already loaded
-if st.session_state.get("data_ready", False):
-    st.success("✅ Data already loaded — navigate to the summary pages or re-upload below to reset.")
+    if "data_ready" not in st.session_state:
+        st.session_state.data_ready = False
 
-uploaded_file = st.file_uploader("Upload student data (CSV or Excel)", type = ['csv', 'xlsx'])
+    # show a notice if data is already loaded
+    if st.session_state.get("data_ready", False):
+        st.success("✅ Data already loaded — navigate to the summary pages or re-upload below to reset.")
 
-if uploaded_file is not None:
-    st.session_state.uploaded_file_bytes = uploaded_file.read()
-    st.session_state.uploaded_file_name = uploaded_file.name
-    uploaded_file.seek(0)
-    try:
-        st.session_state.raw_df = load_data(uploaded_file)
-        st.session_state.data_ready = False
-        
-        if uploaded_file.name.lower().endswith(".xlsx"):
-            uploaded_file.seek(0)
-            xl = pd.ExcelFile(uploaded_file)
-            st.session_state.excel_sheet_names = xl.sheet_names
-        else:
-            st.session_state.excel_sheet_names = []
-            
-    except ValueError as e:
-        st.error(str(e))
+    uploaded_files = st.file_uploader(
+        "Upload student data (CSV or Excel) — select several files to merge terms or semesters",
+        type = ['csv', 'xlsx'],
+        accept_multiple_files=True
+    )
+    uploaded_file = uploaded_files[0] if uploaded_files else None
+
+    if uploaded_files:
+        # Hash each new upload once; identical files from any session share one stored copy
+        upload_ids = [f.file_id for f in uploaded_files]
+        if st.session_state.get("uploaded_file_ids") != upload_ids or not has_dataset(st.session_state.get(RAW_KEY)):
+            file_parts = [(f.name, f.getvalue()) for f in uploaded_files]
+            raw_key = content_key(*[part for name, data in file_parts for part in (name, data)])
+            if not has_dataset(raw_key):
+                # the parsers (and the Excel engine behind them) load on the first upload
+                import pandas as pd
+                from src.data_cleaning import load_data, load_files
+                try:
+                    if len(uploaded_files) == 1:
+                        raw_payload = {"file_bytes": file_parts[0][1], "raw_df": load_data(uploaded_file), "extra_dfs": []}
+                    else:
+                        # Several files: parse them concurrently, each one becomes a term
+                        # named after its file unless it has a term column of its own
+                        file_data = load_files(uploaded_files)
+                        raw_payload = {
+                            "file_bytes": file_parts[0][1],
+                            "raw_df": file_data[0][1],
+                            "extra_dfs": [df for _, df in file_data[1:]],
+                        }
+                    raw_payload["file_names"] = [name for name, _ in file_parts]
+                    if len(uploaded_files) == 1 and uploaded_file.name.lower().endswith(".xlsx"):
+                        uploaded_file.seek(0)
+                        xl = pd.ExcelFile(uploaded_file)
+                        raw_payload["excel_sheet_names"] = xl.sheet_names
+                    else:
+                        raw_payload["excel_sheet_names"] = []
+                except ValueError as e:
+                    st.error(str(e))
+                    st.stop()
+            else:
+                raw_payload = None
+
+            if st.session_state.get(RAW_KEY) != raw_key:
+                st.session_state.data_ready = False
+            attach_raw(raw_key, raw_payload)
+            st.session_state.uploaded_file_ids = upload_ids
+            st.session_state.uploaded_file_name = uploaded_file.name
+
+    raw_upload_data = raw_upload()
+    if raw_upload_data is None:
+        st.info("Please upload a CSV or Excel file to continue.")
         st.stop()
-        
-if "raw_df" not in st.session_state:
-    st.info("Please upload a CSV or Excel file to continue.")
-    st.stop()
     
-raw_df = st.session_state.raw_df
-
-import io
-if uploaded_file is None and st.session_state.get("uploaded_file_bytes"):
-    uploaded_file = io.BytesIO(st.session_state.uploaded_file_bytes)
-    uploaded_file.name = st.session_state.uploaded_file_name
-
-source_name = os.path.splitext(uploaded_file.name)[0] if uploaded_file is not None else "Unknown"
-
-section_header("Your Data")
-st.dataframe(raw_df.head(5), use_container_width=True, hide_index=True)
+    raw_df = raw_upload_data["raw_df"]
+    extra_file_dfs = raw_upload_data.get("extra_dfs", [])
+    excel_sheet_names = raw_upload_data["excel_sheet_names"]
+
+    import io
+    import pandas as pd
+    from src.data_cleaning import normalize_columns
+    from src.column_inference import infer_subject_columns
+
+    if uploaded_file is None:
+        uploaded_file = io.BytesIO(raw_upload_data["file_bytes"])
+        uploaded_file.name = st.session_state.get("uploaded_file_name", "Unknown")
+
+    source_name = os.path.splitext(uploaded_file.name)[0] if uploaded_file is not None else "Unknown"
+
+    section_header("Your Data")
+    st.dataframe(raw_df.head(5), use_container_width=True, hide_index=True)
+    if extra_file_dfs:
+        st.caption(
+            f"Merging {len(extra_file_dfs) + 1} files: "
+            + ", ".join(
+                f"`{name}` ({len(df):,} rows)"
+                for name, df in zip(raw_upload_data["file_names"], [raw_df] + extra_file_dfs)
+            )
+            + ". Files without a term column use their file name as the term."
+        )
 
-# multi-sheet selection for excel files
-if st.session_state.get("excel_sheet_names"):
-    all_sheets = st.session_state.excel_sheet_names
+    # multi-sheet selection for excel files
+    if excel_sheet_names:
+        all_sheets = excel_sheet_names
     
-    if len(all_sheets) > 1:
-        with st.container(border=True):
-            st.subheader("📄 Sheet Selection")
-            st.caption(
-                "Multiple sheets detected. By default only the first sheet is loaded. "
-                "Select additional sheets to merge them — useful when each sheet represents a different term or semester. "
-                "If a sheet has no term column, the sheet name will be used as the term automatically."
-            )
-            # Restore widget key from backup if Streamlit cleared it on page navigation
-            if "selected_sheets" not in st.session_state and "_p_selected_sheets" in st.session_state:
-                st.session_state["selected_sheets"] = st.session_state["_p_selected_sheets"]
-            _sheet_default = st.session_state.get("selected_sheets") or [all_sheets[0]]
-            selected_sheets = st.multiselect(
-                "Select sheets to include",
-                options=all_sheets,
-                default=_sheet_default,
-                key="selected_sheets"
-            )
-            # Keep backup in sync (backup key is never cleared by Streamlit)
-            st.session_state["_p_selected_sheets"] = st.session_state["selected_sheets"]
-            if not selected_sheets:
-                st.warning("⚠️ Please select at least one sheet.")
+        if len(all_sheets) > 1:
+            with st.container(border=True):
+                st.subheader("📄 Sheet Selection")
+                st.caption(
+                    "Multiple sheets detected. By default only the first sheet is loaded. "
+                    "Select additional sheets to merge them — useful when each sheet represents a different term or semester. "
+                    "If a sheet has no term column, the sheet name will be used as the term automatically."
+                )
+                # Restore widget key from backup if Streamlit cleared it on page navigation
+                if "selected_sheets" not in st.session_state and "_p_selected_sheets" in st.session_state:
+                    st.session_state["selected_sheets"] = st.session_state["_p_selected_sheets"]
+                _sheet_default = st.session_state.get("selected_sheets") or [all_sheets[0]]
+                selected_sheets = st.multiselect(
+                    "Select sheets to include",
+                    options=all_sheets,
+                    default=_sheet_default,
+                    key="selected_sheets"
+                )
+                # Keep backup in sync (backup key is never cleared by Streamlit)
+                st.session_state["_p_selected_sheets"] = st.session_state["selected_sheets"]
+                if not selected_sheets:
+                    st.warning("⚠️ Please select at least one sheet.")
+        else:
+            selected_sheets = all_sheets
+            st.session_state.selected_sheets = selected_sheets
+            st.session_state["_p_selected_sheets"] = selected_sheets
     else:
-        selected_sheets = all_sheets
+        selected_sheets = []
         st.session_state.selected_sheets = selected_sheets
         st.session_state["_p_selected_sheets"] = selected_sheets
-else:
-    selected_sheets = []
-    st.session_state.selected_sheets = selected_sheets
-    st.session_state["_p_selected_sheets"] = selected_sheets
-
-with st.container(border=True):
-    st.subheader("⚙️ Cleaning Mode")
-    st.caption("Choose how columns should be interpreted. Auto tries to detect columns automatically. Manual lets you define mappings yourself.")
-
-    # Restore mode radio from backup if cleared by page navigation
-    if "mode_radio" not in st.session_state and "_p_mode_radio" in st.session_state:
-        st.session_state["mode_radio"] = st.session_state["_p_mode_radio"]
-    mode = st.radio(
-        "Select Mode",
-        options=["Auto", "Manual"],
-        horizontal=True,
-        label_visibility="collapsed",
-        key="mode_radio"
-    )
-    st.session_state["_p_mode_radio"] = mode
-mode = mode.lower()
-
-manual_mapping = None
-subject_columns = None
-pass_mark = PASS_MARK
-attendance_threshold = 75
-marks_range = MARKS_MAX
-st.session_state.max_marks = marks_range
-
-# detect subjects early for the auto-mode info banner
-# Rebuild entirely from every currently-selected sheet so that deselecting
-# Sheet 1 doesn't leave its subjects lingering in the list.
-auto_detected_subjects = []
-if mode == "auto":
-    try:
-        current_selected = st.session_state.get("selected_sheets", [])
-        excel_sheet_names = st.session_state.get("excel_sheet_names", [])
-
-        if excel_sheet_names and current_selected and uploaded_file is not None:
-            # Read every selected sheet independently
-            all_auto_subjects = []
-            try:
-                for sheet in current_selected:
-                    try:
-                        uploaded_file.seek(0)
-                        sheet_df = pd.read_excel(uploaded_file, sheet_name=sheet)
-                        for s in detect_subject_columns(normalize_columns(sheet_df)):
-                            if s not in all_auto_subjects:
-                                all_auto_subjects.append(s)
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-        else:
-            # CSV or no sheet selection — fall back to raw_df
-            all_auto_subjects = list(detect_subject_columns(normalize_columns(raw_df)))
 
-        auto_detected_subjects = all_auto_subjects
-
-    except Exception:
-        auto_detected_subjects = []
-
-    if auto_detected_subjects:
-        st.info(
-            f"**Auto mode** — {len(auto_detected_subjects)} subject column(s) detected across all selected sheets: "
-            + ", ".join(f"`{s}`" for s in auto_detected_subjects)
+    with st.container(border=True):
+        st.subheader("⚙️ Cleaning Mode")
+        st.caption("Choose how columns should be interpreted. Auto tries to detect columns automatically. Manual lets you define mappings yourself.")
+
+        # Restore mode radio from backup if cleared by page navigation
+        if "mode_radio" not in st.session_state and "_p_mode_radio" in st.session_state:
+            st.session_state["mode_radio"] = st.session_state["_p_mode_radio"]
+        mode = st.radio(
+            "Select Mode",
+            options=["Auto", "Manual"],
+            horizontal=True,
+            label_visibility="collapsed",
+            key="mode_radio"
         )
+        st.session_state["_p_mode_radio"] = mode
+    mode = mode.lower()
+
+    manual_mapping = None
+    subject_columns = None
+    pass_mark = PASS_MARK
+    attendance_threshold = 75
+    marks_range = MARKS_MAX
+    st.session_state.max_marks = marks_range
+
+    # detect subjects early for the auto-mode info banner
+    # Rebuild entirely from every currently-selected sheet so that deselecting
+    # Sheet 1 doesn't leave its subjects lingering in the list.
+    auto_detected_subjects = []
+    auto_excluded_columns = []
+    if mode == "auto":
+        current_selected = st.session_state.get("selected_sheets", [])
+        if excel_sheet_names and current_selected:
+            # each selected sheet is inferred from its first batch of rows, once per upload
+            source_columns = []
+            for sheet in current_selected:
+                try:
+                    source_columns.append(sheet_subject_columns(sheet))
+                except Exception as e:
+                    st.warning(f"⚠️ Could not read sheet `{sheet}` to detect its subject columns: {e}")
+        else:
+            # CSV or no sheet selection — use raw_df and any extra files
+            source_columns = [infer_subject_columns(normalize_columns(file_df)) for file_df in [raw_df] + extra_file_dfs]
+
+        for source_subjects, source_decisions in source_columns:
+            auto_excluded_columns.extend(d["column"] for d in source_decisions if not d["included"])
+            for s in source_subjects:
+                if s not in auto_detected_subjects:
+                    auto_detected_subjects.append(s)
+
+        if auto_detected_subjects:
+            st.info(
+                f"**Auto mode** — {len(auto_detected_subjects)} subject column(s) detected across all selected sheets and files: "
+                + ", ".join(f"`{s}`" for s in auto_detected_subjects)
+            )
+        auto_excluded_columns = [c for c in dict.fromkeys(auto_excluded_columns) if c not in auto_detected_subjects]
+        if auto_excluded_columns:
+            st.caption(
+                f"{len(auto_excluded_columns)} non-mark column(s) will be skipped (percentages, identifiers or text): "
+                + ", ".join(f"`{c}`" for c in auto_excluded_columns)
+            )
 
-if mode == "manual":
-    st.markdown("### 🧩 Manual Column Mapping")
-    st.info("Map your dataset columns to canonical column names. Only map what exists in your file.")
+    if mode == "manual":
+        st.markdown("### 🧩 Manual Column Mapping")
+        st.info("Map your dataset columns to canonical column names. Only map what exists in your file.")
 
-    st.markdown("#### ⚙️ Validation Settings")
-    with st.container(border=True):
-        col1, col2, col3 = st.columns(3)
+        st.markdown("#### ⚙️ Validation Settings")
+        with st.container(border=True):
+            col1, col2, col3 = st.columns(3)
         
-        with col1:
-            if "manual_marks_range" not in st.session_state and "_p_manual_marks_range" in st.session_state:
-                st.session_state["manual_marks_range"] = st.session_state["_p_manual_marks_range"]
-            marks_range = st.number_input("Enter maximum marks for validation:", min_value=1, value=MARKS_MAX, key="manual_marks_range")
-            st.session_state["_p_manual_marks_range"] = marks_range
-        with col2:
-            if "manual_pass_mark" not in st.session_state and "_p_manual_pass_mark" in st.session_state:
-                st.session_state["manual_pass_mark"] = st.session_state["_p_manual_pass_mark"]
-            pass_mark = st.number_input("Pass mark", min_value=1, value=PASS_MARK, key="manual_pass_mark")
-            st.session_state["_p_manual_pass_mark"] = pass_mark
-        with col3:
-            if "manual_att_thresh" not in st.session_state and "_p_manual_att_thresh" in st.session_state:
-                st.session_state["manual_att_thresh"] = st.session_state["_p_manual_att_thresh"]
-            attendance_threshold = st.number_input("Attendance threshold (%)", min_value=1, max_value=100, value=75, key="manual_att_thresh")
-            st.session_state["_p_manual_att_thresh"] = attendance_threshold
-
-    st.markdown("#### 🔄 Dataset Mapping")
-    with st.container(border=True):
-        map_cols = st.columns(2)
+            with col1:
+                if "manual_marks_range" not in st.session_state and "_p_manual_marks_range" in st.session_state:
+                    st.session_state["manual_marks_range"] = st.session_state["_p_manual_marks_range"]
+                marks_range = st.number_input("Enter maximum marks for validation:", min_value=1, value=MARKS_MAX, key="manual_marks_range")
+                st.session_state["_p_manual_marks_range"] = marks_range
+            with col2:
+                if "manual_pass_mark" not in st.session_state and "_p_manual_pass_mark" in st.session_state:
+                    st.session_state["manual_pass_mark"] = st.session_state["_p_manual_pass_mark"]
+                pass_mark = st.number_input("Pass mark", min_value=1, value=PASS_MARK, key="manual_pass_mark")
+                st.session_state["_p_manual_pass_mark"] = pass_mark
+            with col3:
+                if "manual_att_thresh" not in st.session_state and "_p_manual_att_thresh" in st.session_state:
+                    st.session_state["manual_att_thresh"] = st.session_state["_p_manual_att_thresh"]
+                attendance_threshold = st.number_input("Attendance threshold (%)", min_value=1, max_value=100, value=75, key="manual_att_thresh")
+                st.session_state["_p_manual_att_thresh"] = attendance_threshold
+
+        st.markdown("#### 🔄 Dataset Mapping")
+        with st.container(border=True):
+            map_cols = st.columns(2)
         
-        manual_mapping = {}
-        # Restore any map_ widget keys from backup before reading current selections
-        for _col in ID_COLUMNS:
-            _wk = f"map_{_col}"
-            if _wk not in st.session_state and f"_p_{_wk}" in st.session_state:
-                st.session_state[_wk] = st.session_state[f"_p_{_wk}"]
-
-        current_id_selections = {
-            col: st.session_state.get(f"map_{col}", "-- Not Present --")
-            for col in ID_COLUMNS
-        }
-
-        for i, canonical_col in enumerate(ID_COLUMNS):
-            
-            used_by_others = {
-                v for k, v in current_id_selections.items()
-                if v != "-- Not Present --" and k != canonical_col
+            manual_mapping = {}
+            # Restore any map_ widget keys from backup before reading current selections
+            for _col in ID_COLUMNS:
+                _wk = f"map_{_col}"
+                if _wk not in st.session_state and f"_p_{_wk}" in st.session_state:
+                    st.session_state[_wk] = st.session_state[f"_p_{_wk}"]
+
+            current_id_selections = {
+                col: st.session_state.get(f"map_{col}", "-- Not Present --")
+                for col in ID_COLUMNS
             }
+
+            for i, canonical_col in enumerate(ID_COLUMNS):
             
-            available_options = [
-                col for col in raw_df.columns
-                if col not in used_by_others
-            ]
+                used_by_others = {
+                    v for k, v in current_id_selections.items()
+                    if v != "-- Not Present --" and k != canonical_col
+                }
             
-            with map_cols[i % 2]:
-                selected_col = st.selectbox(
-                    f"Map **{canonical_col}** to:",
-                    options=["-- Not Present --"] + available_options,
-                    key=f"map_{canonical_col}"
-                )
-            # Keep backup in sync
-            st.session_state[f"_p_map_{canonical_col}"] = st.session_state[f"map_{canonical_col}"]
+                available_options = [
+                    col for col in raw_df.columns
+                    if col not in used_by_others
+                ]
+            
+                with map_cols[i % 2]:
+                    selected_col = st.selectbox(
+                        f"Map **{canonical_col}** to:",
+                        options=["-- Not Present --"] + available_options,
+                        key=f"map_{canonical_col}"
+                    )
+                # Keep backup in sync
+                st.session_state[f"_p_map_{canonical_col}"] = st.session_state[f"map_{canonical_col}"]
+
+                if selected_col != "-- Not Present --":
+                    manual_mapping[canonical_col] = selected_col
+
+        st.markdown("#### 📚 Subject Columns")
+        with st.container(border=True):
+        
+            used_columns = {
+                st.session_state.get(f"map_{col}")
+                for col in ID_COLUMNS
+                if st.session_state.get(f"map_{col}") != "-- Not Present --"
+            }
+        
+            available_subject_cols = [col for col in raw_df.columns if col not in used_columns]
+            if "manual_subject_cols" not in st.session_state and "_p_manual_subject_cols" in st.session_state:
+                # Restore only values that are still valid options
+                _restored = [c for c in st.session_state["_p_manual_subject_cols"] if c in available_subject_cols]
+                if _restored:
+                    st.session_state["manual_subject_cols"] = _restored
+            subject_columns = st.multiselect(
+                "Select subject columns (marks columns)",
+                options=available_subject_cols,
+                key="manual_subject_cols"
+            )
+            st.session_state["_p_manual_subject_cols"] = subject_columns
+
+        if not manual_mapping or not subject_columns:
+            st.warning("⚠️ Manual mode requires column mapping and subject selection.")
+
 
-            if selected_col != "-- Not Present --":
-                manual_mapping[canonical_col] = selected_col
+    # Determine which subjects are known at this point for the UI
+    ui_subjects = subject_columns if mode == "manual" else auto_detected_subjects
 
-    st.markdown("#### 📚 Subject Columns")
     with st.container(border=True):
-        
-        used_columns = {
-            st.session_state.get(f"map_{col}")
-            for col in ID_COLUMNS
-            if st.session_state.get(f"map_{col}") != "-- Not Present --"
-        }
-        
-        available_subject_cols = [col for col in raw_df.columns if col not in used_columns]
-        if "manual_subject_cols" not in st.session_state and "_p_manual_subject_cols" in st.session_state:
-            # Restore only values that are still valid options
-            _restored = [c for c in st.session_state["_p_manual_subject_cols"] if c in available_subject_cols]
-            if _restored:
-                st.session_state["manual_subject_cols"] = _restored
-        subject_columns = st.multiselect(
-            "Select subject columns (marks columns)",
-            options=available_subject_cols,
-            key="manual_subject_cols"
+        st.subheader("📐 Max Marks Configuration")
+        st.caption(
+            "If some subjects have different maximum marks (e.g. lab subjects out of 50), configure them here. "
+            "All analytics will use percentage scores internally."
         )
-        st.session_state["_p_manual_subject_cols"] = subject_columns
 
-    if not manual_mapping or not subject_columns:
-        st.warning("⚠️ Manual mode requires column mapping and subject selection.")
+        if mode == "manual":
+            global_max = marks_range
+        else:
+            if "global_max_auto" not in st.session_state and "_p_global_max_auto" in st.session_state:
+                st.session_state["global_max_auto"] = st.session_state["_p_global_max_auto"]
+            global_max = st.number_input(
+                "Global maximum marks",
+                min_value=1,
+                value=100,
+                key="global_max_auto"
+            )
+            st.session_state["_p_global_max_auto"] = global_max
 
+        st.session_state.max_marks = int(global_max)
 
-# Determine which subjects are known at this point for the UI
-ui_subjects = subject_columns if mode == "manual" else auto_detected_subjects
+        if "diff_max_marks_radio" not in st.session_state and "_p_diff_max_marks_radio" in st.session_state:
+            st.session_state["diff_max_marks_radio"] = st.session_state["_p_diff_max_marks_radio"]
+        diff_max_marks = st.radio(
+            "Do any subjects have a different maximum marks?",
+            options=["No — all subjects share the same max marks", "Yes — configure per subject"],
+            key="diff_max_marks_radio"
+        ) == "Yes — configure per subject"
+        st.session_state["_p_diff_max_marks_radio"] = st.session_state["diff_max_marks_radio"]
 
-with st.container(border=True):
-    st.subheader("📐 Max Marks Configuration")
-    st.caption(
-        "If some subjects have different maximum marks (e.g. lab subjects out of 50), configure them here. "
-        "All analytics will use percentage scores internally."
-    )
+        st.session_state.diff_max_marks = diff_max_marks
+        max_marks_config_valid = True
 
-    if mode == "manual":
-        global_max = marks_range
-    else:
-        if "global_max_auto" not in st.session_state and "_p_global_max_auto" in st.session_state:
-            st.session_state["global_max_auto"] = st.session_state["_p_global_max_auto"]
-        global_max = st.number_input(
-            "Global maximum marks",
-            min_value=1,
-            value=100,
-            key="global_max_auto"
-        )
-        st.session_state["_p_global_max_auto"] = global_max
+        if not diff_max_marks:
+            st.session_state.max_marks_config = int(global_max)
 
-    st.session_state.max_marks = int(global_max)
+        else:
+            if not ui_subjects:
+                st.warning(
+                    "⚠️ Subject columns are not yet known. "
+                    "Please complete the mapping above first (manual mode) or upload a file (auto mode)."
+                )
+                max_marks_config_valid = False
+                st.session_state.max_marks_config = {}
+            else:
+                st.markdown("**Select subjects with non-standard maximum marks:**")
+                st.caption(
+                    "Only subjects selected here will show a configuration input. "
+                    "All other subjects automatically use the global max set above."
+                )
 
-    if "diff_max_marks_radio" not in st.session_state and "_p_diff_max_marks_radio" in st.session_state:
-        st.session_state["diff_max_marks_radio"] = st.session_state["_p_diff_max_marks_radio"]
-    diff_max_marks = st.radio(
-        "Do any subjects have a different maximum marks?",
-        options=["No — all subjects share the same max marks", "Yes — configure per subject"],
-        key="diff_max_marks_radio"
-    ) == "Yes — configure per subject"
-    st.session_state["_p_diff_max_marks_radio"] = st.session_state["diff_max_marks_radio"]
+                if "non_standard_subjects_select" not in st.session_state and "_p_non_standard_subjects_select" in st.session_state:
+                    _restored_ns = [s for s in st.session_state["_p_non_standard_subjects_select"] if s in ui_subjects]
+                    if _restored_ns:
+                        st.session_state["non_standard_subjects_select"] = _restored_ns
+                non_standard_subjects = st.multiselect(
+                    "Subjects with different max marks",
+                    options=ui_subjects,
+                    key="non_standard_subjects_select"
+                )
+                st.session_state["_p_non_standard_subjects_select"] = non_standard_subjects
+
+                per_subject_config = {}
+
+                if non_standard_subjects:
+                    st.markdown("**Configure max marks for selected subjects:**")
+                    st.caption(f"Defaults are set to global max ({int(global_max)}). Only change what differs.")
+
+                    chunks = [non_standard_subjects[i:i+3] for i in range(0, len(non_standard_subjects), 3)]
+                    for chunk in chunks:
+                        cols = st.columns(len(chunk))
+                        for col, subj in zip(cols, chunk):
+                            with col:
+                                _subj_key = f"max_marks_subj_{subj}"
+                                if _subj_key not in st.session_state and f"_p_{_subj_key}" in st.session_state:
+                                    st.session_state[_subj_key] = st.session_state[f"_p_{_subj_key}"]
+                                val = st.number_input(
+                                    f"`{subj}`",
+                                    min_value=1,
+                                    value=int(global_max),
+                                    step=1,
+                                    key=_subj_key
+                                )
+                                st.session_state[f"_p_{_subj_key}"] = val
+                                per_subject_config[subj] = int(val)
+
+                for subj in ui_subjects:
+                    if subj not in per_subject_config:
+                        per_subject_config[subj] = int(global_max)
+
+                st.session_state.max_marks_config = per_subject_config
+                st.session_state.max_marks = 100
+
+
+    run_cleaning = st.button("🚀 Run Data Cleaning", disabled=not max_marks_config_valid)
+    st.markdown("<br>", unsafe_allow_html=True) 
 
-    st.session_state.diff_max_marks = diff_max_marks
-    max_marks_config_valid = True
+    max_marks_config = st.session_state.get("max_marks_config", st.session_state.get("max_marks", 100))
 
-    if not diff_max_marks:
-        st.session_state.max_marks_config = int(global_max)
+    if run_cleaning:
+        # Everything that shapes the cleaned output; sessions with the same upload and
+        # settings reuse one stored dataset instead of cleaning and holding their own
+        dataset_key = content_key(
+            st.session_state[RAW_KEY],
+            {
+                "mode": mode,
+                "manual_mapping": manual_mapping,
+                "subject_columns": subject_columns,
+                "marks_range": st.session_state.max_marks if mode == "auto" else marks_range,
+                "selected_sheets": st.session_state.get("selected_sheets", []),
+                "max_marks_config": max_marks_config,
+                "source_name": source_name,
+            }
+        )
 
-    else:
-        if not ui_subjects:
-            st.warning(
-                "⚠️ Subject columns are not yet known. "
-                "Please complete the mapping above first (manual mode) or upload a file (auto mode)."
-            )
-            max_marks_config_valid = False
-            st.session_state.max_marks_config = {}
-        else:
-            st.markdown("**Select subjects with non-standard maximum marks:**")
-            st.caption(
-                "Only subjects selected here will show a configuration input. "
-                "All other subjects automatically use the global max set above."
-            )
+    if run_cleaning and has_dataset(dataset_key):
+        attach_dataset(dataset_key)
+        st.session_state.data_ready = True
+        st.session_state.pass_mark = pass_mark
+        st.session_state.attendance_threshold = attendance_threshold
 
-            if "non_standard_subjects_select" not in st.session_state and "_p_non_standard_subjects_select" in st.session_state:
-                _restored_ns = [s for s in st.session_state["_p_non_standard_subjects_select"] if s in ui_subjects]
-                if _restored_ns:
-                    st.session_state["non_standard_subjects_select"] = _restored_ns
-            non_standard_subjects = st.multiselect(
-                "Subjects with different max marks",
-                options=ui_subjects,
-                key="non_standard_subjects_select"
-            )
-            st.session_state["_p_non_standard_subjects_select"] = non_standard_subjects
-
-            per_subject_config = {}
-
-            if non_standard_subjects:
-                st.markdown("**Configure max marks for selected subjects:**")
-                st.caption(f"Defaults are set to global max ({int(global_max)}). Only change what differs.")
-
-                chunks = [non_standard_subjects[i:i+3] for i in range(0, len(non_standard_subjects), 3)]
-                for chunk in chunks:
-                    cols = st.columns(len(chunk))
-                    for col, subj in zip(cols, chunk):
-                        with col:
-                            _subj_key = f"max_marks_subj_{subj}"
-                            if _subj_key not in st.session_state and f"_p_{_subj_key}" in st.session_state:
-                                st.session_state[_subj_key] = st.session_state[f"_p_{_subj_key}"]
-                            val = st.number_input(
-                                f"`{subj}`",
-                                min_value=1,
-                                value=int(global_max),
-                                step=1,
-                                key=_subj_key
-                            )
-                            st.session_state[f"_p_{_subj_key}"] = val
-                            per_subject_config[subj] = int(val)
-
-            for subj in ui_subjects:
-                if subj not in per_subject_config:
-                    per_subject_config[subj] = int(global_max)
-
-            st.session_state.max_marks_config = per_subject_config
-            st.session_state.max_marks = 100
-
-
-run_cleaning = st.button("🚀 Run Data Cleaning", disabled=not max_marks_config_valid)
-st.markdown("<br>", unsafe_allow_html=True) 
-
-if run_cleaning:
-    try:
-        extra_dfs = []
+    elif run_cleaning:
         selected_sheets = st.session_state.get("selected_sheets", [])
-        excel_sheet_names = st.session_state.get("excel_sheet_names", [])
-        
-        if excel_sheet_names and len(selected_sheets) > 1 and uploaded_file is not None:
-            uploaded_file.seek(0)
-            sheet_data = load_excel_sheets(uploaded_file, selected_sheets)
-            first_sheet_name = selected_sheets[0]
-            extra_sheet_data = [(name, df) for name, df in sheet_data if name != first_sheet_name]
-            extra_dfs = [df for _, df in extra_sheet_data]
-        
         if excel_sheet_names and selected_sheets:
             source_name = selected_sheets[0]
 
         if mode == "auto":
-            with st.spinner('Scanning data structures...'):
-                time.sleep(2)
-            cleaned_df, report = clean_data(
-                raw_df,
+            clean_kwargs = dict(
                 mode="auto",
                 marks_range=st.session_state.max_marks,
-                extra_dfs=extra_dfs if extra_dfs else None,
                 source_name=source_name
             )
         else:
-            with st.spinner('Scanning data structures...'):
-                time.sleep(2)
-            cleaned_df, report = clean_data(
-                raw_df,
+            clean_kwargs = dict(
                 mode="manual",
                 manual_mapping=manual_mapping,
                 subject_columns=subject_columns,
                 marks_range=marks_range,
-                extra_dfs=extra_dfs if extra_dfs else None,
                 source_name=source_name
             )
-            
-    except Exception as e:
-        st.error(str(e))
-        st.stop()
 
+        # Cleaning runs as a background job so it survives widget changes and page
+        # navigation; the result is picked up on a later rerun
+        start_cleaning_job(
+            dataset_key,
+            selected_sheets if excel_sheet_names else [],
+            clean_kwargs,
+            max_marks_config,
+            session_updates={"pass_mark": pass_mark, "attendance_threshold": attendance_threshold}
+        )
 
-    max_marks_config = st.session_state.get("max_marks_config", st.session_state.get("max_marks", 100))
-    cleaned_df = compute_percentage_column(cleaned_df, max_marks_config)
-
-    # Compute dropped rows: identify raw_df rows (wide format) that didn't
-    # survive cleaning by comparing reg_no values in cleaned_df vs raw_df.
-    try:
-        # Normalize raw_df column names to find the reg_no column
-        _norm_raw = normalize_columns(raw_df.copy())
-        if "reg_no" in _norm_raw.columns and "reg_no" in cleaned_df.columns:
-            kept_reg_nos = set(cleaned_df["reg_no"].dropna().unique())
-            _raw_reg_no = _norm_raw["reg_no"]
-            dropped_mask = ~_raw_reg_no.isin(kept_reg_nos) | _raw_reg_no.isna()
-            dropped_df = raw_df.loc[dropped_mask].reset_index(drop=True)
-        else:
-            dropped_df = pd.DataFrame()
-    except Exception:
-        dropped_df = pd.DataFrame()
-
-    st.session_state.long_df = cleaned_df
-    st.session_state.cleaning_report = report
-    st.session_state.dropped_df = dropped_df
-    st.session_state.data_ready = True
-    st.session_state.pass_mark = pass_mark
-    st.session_state.attendance_threshold = attendance_threshold
-
-if "cleaning_report" in st.session_state:
-    render_cleaning_report(
-        st.session_state.cleaning_report,
-        st.session_state.get("dropped_df", pd.DataFrame())
-    )
+    finished_job = collect_cleaning_job()
+    if finished_job is not None and finished_job.status == JOB_FAILED:
+        st.error(finished_job.error)
+    elif finished_job is not None and finished_job.status == JOB_CANCELLED:
+        st.warning("Data cleaning was cancelled.")
+
+    if cleaning_job() is not None:
+        @st.fragment(run_every=1.0)
+        def _cleaning_status():
+            job = cleaning_job()
+            if job is None or job.finished:
+                st.rerun()
+            with st.container(border=True):
+                col_status, col_cancel = st.columns([5, 1])
+                with col_status:
+                    st.markdown(f"⏳ **Cleaning in progress** — {job.stage} ({job.elapsed:.0f}s)")
+                    st.caption("You can keep adjusting settings or visit other pages; results appear here when ready.")
+                with col_cancel:
+                    if st.button("✖ Cancel", key="cancel_cleaning"):
+                        cancel_cleaning_job()
+                        st.rerun()
+
+        _cleaning_status()
+
+    cleaned = cleaned_dataset()
+    if cleaned is not None:
+        render_cleaning_report(
+            cleaned["cleaning_report"],
+            cleaned["dropped_df"]
+        )
 
-    long_df = st.session_state.long_df.copy()
-    long_df["attendance"] = pd.to_numeric(long_df["attendance"], errors="coerce")
-
-    wide_df = st.session_state.long_df.pivot_table(
-        index=["reg_no", "student_name", "class", "term", "attendance"],
-        columns="subject",
-        values="marks"
-    ).reset_index()
-    wide_df.columns.name = None
-
-    csv = wide_df.to_csv(index=False)
-    st.download_button(
-        label="⬇️ Download Cleaned Data (CSV)",
-        data=csv,
-        file_name="lume_cleaned.csv",
-        mime="text/csv"
-    )
-    st.success("Data Cleaned Successfully ✅")
\ No newline at end of file
+        # Export files are written only when a download button is clicked, then kept
+        # with the dataset so the next download of the same file is a read
+        @st.fragment
+        def _export_downloads():
+            export_layout = st.radio(
+                "Export layout",
+                options=list(EXPORT_LAYOUTS),
+                format_func=EXPORT_LAYOUTS.get,
+                horizontal=True,
+                key="export_layout"
+            )
+            formats = available_formats()
+            for column, fmt in zip(st.columns(len(formats)), formats):
+                label, mime = EXPORT_FORMATS[fmt]
+                with column:
+                    st.download_button(
+                        label=f"⬇️ Download Cleaned Data ({label})",
+                        data=export_download(export_layout, fmt),
+                        file_name=f"lume_cleaned_{export_layout}.{fmt}",
+                        mime=mime,
+                        on_click="ignore",
+                        key=f"export_{fmt}"
+                    )
+
+        _export_downloads()
+        st.success("Data Cleaned Successfully ✅")
+
+        section_header("Student Reports")
+        st.caption(
+            "Generate one self-contained HTML report per student — overview metrics, subject table "
+            "and strength categories — bundled into a single ZIP archive."
+        )
+        report_pass_mark = st.session_state.get("pass_mark", PASS_MARK)
+        reports_artifact = f"student_reports_zip:{report_pass_mark}"
+        # the archive is written to a file kept with the dataset rather than held in memory
+        reports_path = dataset_file_path(f"student_reports_{report_pass_mark}.zip")
+        if st.button("📦 Generate Student Reports"):
+            report_progress = st.progress(0.0, text="Rendering student reports...")
+
+            def _build_reports(long_df):
+                from src.exports import write_file
+                from src.reports import export_student_reports, report_count
+
+                profiles, subject_perf = student_profiles()
+                if not os.path.exists(reports_path):
+                    write_file(reports_path, lambda f: export_student_reports(
+                        profiles,
+                        subject_perf,
+                        f,
+                        pass_mark=report_pass_mark,
+                        progress=lambda done, total: report_progress.progress(
+                            done / total, text=f"Rendered {done:,} of {total:,} reports"
+                        )
+                    ))
+                return report_count(profiles), reports_path
+
+            dataset_artifact(reports_artifact, _build_reports)
+            report_progress.empty()
+
+        student_reports = dataset_artifact(reports_artifact)
+        if student_reports is not None:
+            report_count, reports_file = student_reports
+
+            def _read_reports():
+                with open(reports_file, "rb") as f:
+                    return f.read()
+
+            st.download_button(
+                label=f"⬇️ Download Student Reports ({report_count:,} files, ZIP)",
+                data=_read_reports,
+                file_name="lume_student_reports.zip",
+                mime="application/zip",
+                on_click="ignore"
+            )
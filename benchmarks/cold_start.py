@@ -0,0 +1,168 @@
+"""
+Profiles the cold start of every Streamlit page: how long the page spends
+importing modules and how long until its first element reaches the browser
+(first paint), each page in a fresh interpreter so nothing is already
+imported.
+
+    python benchmarks/cold_start.py                          # all pages, 3 runs each
+    python benchmarks/cold_start.py --save cold_start.json   # keep as the baseline
+    python benchmarks/cold_start.py --compare cold_start.json --tolerance 0.25
+
+Each page is run with Streamlit's AppTest twice: "empty", as a visitor
+without data sees it, and "loaded", with the sample files in data/raw
+cleaned into the dataset store beforehand (their imports are not counted).
+Imports are measured with python -X importtime, counting only what is
+imported after Streamlit itself has loaded. --compare exits non-zero when a
+page's median import time or first paint is slower than the saved baseline
+by more than the tolerance (and by at least --min-delta seconds, so timer
+noise on fast pages is not reported).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = [
+    "App.py",
+    "pages/01_Total_Summary.py",
+    "pages/02_Student_Summary.py",
+    "pages/03_Class_Comparison.py",
+    "pages/About.py",
+]
+MODES = ["empty", "loaded"]
+SAMPLE_FILES = ["student_records.csv", "student_records_sem2.csv", "student_records_sem3.csv", "student_records_sem4.csv"]
+MARKER = "cold-start: page imports begin"
+METRICS = ["imports", "first_paint", "run"]
+
+def seed_dataset(at, files=SAMPLE_FILES):
+    """
+    Cleans the sample `files` from data/raw into the dataset store (once per
+    process) and points the AppTest session at them, as the App page does
+    after an upload.
+    """
+    sys.path.insert(0, ROOT)
+    import pandas as pd
+    from src.data_cleaning import clean_data, compute_percentage_column
+    from src.dataset_store import content_key
+    from src.session_data import dataset_store
+
+    key = content_key("benchmark", *files)
+    if key not in dataset_store():
+        dfs = [pd.read_csv(os.path.join(ROOT, "data", "raw", name)) for name in files]
+        long_df, report = clean_data(dfs[0], extra_dfs=dfs[1:], marks_range=100)
+        long_df = compute_percentage_column(long_df, 100)
+        dataset_store().put(key, {"long_df": long_df, "cleaning_report": report, "dropped_df": pd.DataFrame()}, holder="benchmark")
+    at.session_state["data_ready"] = True
+    at.session_state["dataset_key"] = key
+
+# Runs in the child interpreter: seed the store if asked, then time one AppTest run
+def _profile_page(page, mode):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=120)
+    if mode == "loaded":
+        seed_dataset(at)
+
+    first_paint = []
+    enqueue = DeltaGenerator._enqueue
+
+    def timed_enqueue(self, *args, **kwargs):
+        if not first_paint:
+            first_paint.append(time.perf_counter())
+        return enqueue(self, *args, **kwargs)
+    DeltaGenerator._enqueue = timed_enqueue
+
+    print(MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    at.run()
+    end = time.perf_counter()
+    if at.exception:
+        raise RuntimeError(f"{page} raised: {at.exception[0].value}")
+    print(json.dumps({
+        "first_paint": (first_paint[0] if first_paint else end) - start,
+        "run": end - start,
+    }))
+
+# Total time of the top-level imports logged by -X importtime after the marker
+def _import_seconds(stderr):
+    _, _, log = stderr.partition(MARKER)
+    total = 0
+    for line in log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1e6
+
+def profile(page, mode):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", page, mode],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{page} ({mode}) failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["imports"] = _import_seconds(result.stderr)
+    return timings
+
+def run(pages, modes, repeat):
+    results = {}
+    print(f"{'page':<32} {'mode':<7} {'imports':>9} {'first paint':>12} {'run':>9}")
+    for page in pages:
+        for mode in modes:
+            runs = [profile(page, mode) for _ in range(repeat)]
+            medians = {metric: statistics.median(r[metric] for r in runs) for metric in METRICS}
+            results[f"{page}|{mode}"] = medians
+            print(f"{page:<32} {mode:<7} {medians['imports']:>8.3f}s {medians['first_paint']:>11.3f}s "
+                  f"{medians['run']:>8.3f}s", flush=True)
+    return results
+
+def compare(results, baseline, tolerance, min_delta):
+    regressions = []
+    for key, medians in results.items():
+        if key not in baseline:
+            continue
+        for metric in ["imports", "first_paint"]:
+            before, after = baseline[key][metric], medians[metric]
+            if after > before * (1 + tolerance) and after - before >= min_delta:
+                regressions.append(f"{key} {metric}: {before:.3f}s -> {after:.3f}s")
+    return regressions
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        _profile_page(sys.argv[2], sys.argv[3])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", default=PAGES, help="page scripts, relative to the repository root")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="run without data, with data, or both")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per page and mode (the median is reported)")
+    parser.add_argument("--save", help="write the medians to this JSON file")
+    parser.add_argument("--compare", help="JSON file saved earlier with --save to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown before failing")
+    parser.add_argument("--min-delta", type=float, default=0.1, help="ignore slowdowns smaller than this (seconds)")
+    args = parser.parse_args()
+
+    results = run(args.pages, args.modes, args.repeat)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No cold-start regressions.")
+
+if __name__ == "__main__":
+    main()
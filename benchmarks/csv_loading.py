@@ -0,0 +1,101 @@
+"""
+Benchmarks CSV loading: the schema-driven fast path in load_data against a
+plain pd.read_csv, on synthetic wide-format student files of 10 MB to 1 GB.
+
+    python benchmarks/csv_loading.py                       # 10, 100, 1000 MB
+    python benchmarks/csv_loading.py --sizes 10 100 --messy 0.001 --clean
+
+--messy puts text such as "45abc" into that fraction of one subject column,
+which the fast path then reads as text. --clean also times
+clean_data on the loaded frame (only sensible up to a few hundred MB, since
+the long format has one row per student and subject).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_cleaning import CSV_ENGINE, clean_data, load_data  # noqa: E402
+
+SUBJECTS = 20
+BATCH_ROWS = 100_000
+
+def _batch(rng, start, rows, messy):
+    batch = pd.DataFrame({
+        "Reg No": [f"U{i:08d}" for i in range(start, start + rows)],
+        "Student Name": rng.choice(["Asha", "Ravi", "Meena", "Kiran", "Farah", "Joel"], rows),
+        "Class": rng.choice(["BCA-A", "BCA-B", "BCom-A"], rows),
+        "Term": "Sem 1",
+        "Attendance": rng.integers(40, 101, rows),
+    })
+    for i in range(SUBJECTS):
+        batch[f"subject_{i}"] = rng.integers(0, 101, rows)
+    if messy:
+        dirty = rng.random(rows) < messy
+        batch["subject_0"] = batch["subject_0"].astype(object)
+        batch.loc[dirty, "subject_0"] = batch.loc[dirty, "subject_0"].astype(str) + "abc"
+    return batch
+
+def generate(path, size_mb, messy):
+    if os.path.exists(path):
+        return
+    rng = np.random.default_rng(0)
+    target = size_mb * 1024 * 1024
+    rows = 0
+    with open(path, "w", newline="") as f:
+        while f.tell() < target:
+            _batch(rng, rows, BATCH_ROWS, messy).to_csv(f, index=False, header=rows == 0)
+            rows += BATCH_ROWS
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def _load_fast(path):
+    with open(path, "rb") as f:
+        return load_data(f)
+
+def run(sizes, messy, clean, workdir):
+    print(f"CSV engine for fast path: {CSV_ENGINE}")
+    header = f"{'size':>8} {'rows':>10} {'baseline':>10} {'fast':>10} {'speedup':>8}"
+    if clean:
+        header += f" {'clean (base)':>13} {'clean (fast)':>13}"
+    print(header)
+
+    for size_mb in sizes:
+        path = os.path.join(workdir, f"students_{size_mb}mb_{messy}.csv")
+        generate(path, size_mb, messy)
+
+        # one frame at a time, so peak memory is a single load (plus cleaning)
+        timings = {}
+        for name, load in [("baseline", lambda: pd.read_csv(path)), ("fast", lambda: _load_fast(path))]:
+            df, timings[name] = _timed(load)
+            rows = len(df)
+            if clean:
+                _, timings[f"clean_{name}"] = _timed(lambda: clean_data(df, marks_range=100))
+            del df
+
+        line = (f"{size_mb:>6}MB {rows:>10,} {timings['baseline']:>9.2f}s {timings['fast']:>9.2f}s "
+                f"{timings['baseline'] / timings['fast']:>7.1f}x")
+        if clean:
+            line += f" {timings['clean_baseline']:>12.2f}s {timings['clean_fast']:>12.2f}s"
+        print(line, flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="file sizes in MB")
+    parser.add_argument("--messy", type=float, default=0.0, help="fraction of text values in one subject column")
+    parser.add_argument("--clean", action="store_true", help="also time clean_data on each loaded frame")
+    parser.add_argument("--workdir", default=tempfile.gettempdir(), help="where generated files are kept")
+    args = parser.parse_args()
+    run(args.sizes, args.messy, args.clean, args.workdir)
+
+if __name__ == "__main__":
+    main()
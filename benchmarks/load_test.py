@@ -0,0 +1,229 @@
+"""
+Load-tests the app with N simultaneous sessions, each going through upload ->
+clean -> Total Summary -> Student Summary on the sample files in data/raw,
+and reports per-step latency percentiles and process memory as N grows.
+No browser or network is involved: pages run headless in Streamlit's
+AppTest.
+
+    python benchmarks/load_test.py                        # 1, 2, 4 and 8 sessions
+    python benchmarks/load_test.py --sessions 1 5 10 20 --shared
+
+Each session runs on its own thread, as the server runs each browser
+session's script on its own thread, so the sessions share one process, its
+dataset store and its background job executor (LUME_JOB_WORKERS sets the
+number of cleaning workers). AppTest swaps process-wide Streamlit state
+(the runtime, the pages manager, config options) for the length of a
+script run, so the sessions take turns running their pages; the time a
+session waits for its turn counts toward its step, as the time a server's
+script threads wait on each other for the interpreter would. Cleaning jobs
+are not held up by this and overlap on the executor. Every session count runs in a fresh interpreter
+after one untimed warm-up session, so its memory figures start from the
+same point.
+
+AppTest cannot drive file_uploader, so the upload step does what App.py does
+with the files: parse them, store the raw payload and point the session at
+it, timed together with the App page's first render. By default every
+session uploads its own copy of the files (a distinct content key), as
+teachers uploading their own classes would; with --shared they upload
+identical files, which the store holds and cleans once. Cleaning is started
+with the App page's button and timed until the page shows the cleaning
+report. Memory is the resident set size once all sessions have finished,
+the peak during the run, and the dataset store's in-memory share.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from cold_start import ROOT, SAMPLE_FILES
+
+STEPS = ["upload", "clean", "total_summary", "student_summary"]
+PERCENTILES = [50, 90, 99]
+POLL_SECONDS = 0.02
+
+_script_lock = threading.Lock()
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return _peak_rss_mb()
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def _checked_run(at, step):
+    with _script_lock:
+        at.run()
+    if at.exception:
+        raise RuntimeError(f"{step} raised: {at.exception[0].value}")
+    return at
+
+# The App page's upload branch, for files read from data/raw
+def _upload(session, files, shared):
+    from src.data_cleaning import load_data, load_files
+    from src.dataset_store import content_key
+    from src.session_data import dataset_store
+
+    file_parts = []
+    for name in files:
+        with open(os.path.join(ROOT, "data", "raw", name), "rb") as f:
+            file_parts.append((name, f.read()))
+    uploads = []
+    for name, data in file_parts:
+        upload = io.BytesIO(data)
+        upload.name = name
+        uploads.append(upload)
+
+    key = content_key("load-test", "shared" if shared else session, *[part for item in file_parts for part in item])
+    if key not in dataset_store():
+        if len(uploads) == 1:
+            payload = {"raw_df": load_data(uploads[0]), "extra_dfs": []}
+        else:
+            file_data = load_files(uploads)
+            payload = {"raw_df": file_data[0][1], "extra_dfs": [df for _, df in file_data[1:]]}
+        payload.update(file_bytes=file_parts[0][1], file_names=files, excel_sheet_names=[])
+        dataset_store().put(key, payload, holder=f"load-test-{session}")
+    return key
+
+def _page(page, app):
+    from streamlit.testing.v1 import AppTest
+    from src.session_data import DATASET_KEY
+
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+    for name in [DATASET_KEY, "data_ready", "pass_mark", "attendance_threshold"]:
+        if name in app.session_state:
+            at.session_state[name] = app.session_state[name]
+    return at
+
+def run_session(session, files, shared):
+    """Times one session's steps, in seconds by step name."""
+    from streamlit.testing.v1 import AppTest
+    from src.jobs import get_job
+    from src.session_data import RAW_KEY, CLEANING_JOB
+
+    timings = {}
+    start = time.perf_counter()
+    app = AppTest.from_file(os.path.join(ROOT, "App.py"), default_timeout=600)
+    app.session_state[RAW_KEY] = _upload(session, files, shared)
+    app.session_state["uploaded_file_name"] = files[0]
+    _checked_run(app, "App (upload)")
+    timings["upload"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    button = next(b for b in app.button if "Run Data Cleaning" in b.label)
+    button.click()
+    _checked_run(app, "App (clean)")
+    # the browser polls the job from a small fragment; here the job is polled directly
+    # and the page rerun once it has finished, which picks up the result
+    job_id = app.session_state[CLEANING_JOB] if CLEANING_JOB in app.session_state else None
+    if job_id is not None:
+        job = get_job(job_id)
+        while not job.finished:
+            time.sleep(POLL_SECONDS)
+        _checked_run(app, "App (clean)")
+    if not app.session_state["data_ready"]:
+        detail = f"{job.status}: {job.error}" if job_id is not None else "no cleaning job was started"
+        raise RuntimeError(f"session {session}: cleaning did not finish ({detail})")
+    timings["clean"] = time.perf_counter() - start
+
+    for step, page in [("total_summary", "pages/01_Total_Summary.py"), ("student_summary", "pages/02_Student_Summary.py")]:
+        at = _page(page, app)
+        start = time.perf_counter()
+        _checked_run(at, page)
+        timings[step] = time.perf_counter() - start
+    return timings
+
+# Runs in the child interpreter: one warm-up session, then `sessions` at once
+def _run_round(sessions, files, shared):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from src.session_data import dataset_store
+
+    run_session("warm-up", files, shared=False)
+    baseline = _rss_mb()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample_memory():
+        while not done.wait(0.05):
+            peak[0] = max(peak[0], _rss_mb())
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(lambda i: run_session(i, files, shared), range(sessions)))
+    wall = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    print(json.dumps({
+        "timings": {step: [r[step] for r in results] for step in STEPS},
+        "wall": wall,
+        "baseline_mb": baseline,
+        "rss_mb": _rss_mb(),
+        "peak_mb": max(peak[0], _rss_mb()),
+        "store_mb": dataset_store().memory_usage() / 2**20,
+    }))
+
+def measure(sessions, files, shared):
+    args = [sys.executable, os.path.abspath(__file__), "--child", str(sessions), json.dumps(files)]
+    if shared:
+        args.append("--shared")
+    # a store directory of its own, so the run neither reuses nor leaves datasets on disk
+    store_dir = tempfile.mkdtemp(prefix="lume-load-test-")
+    try:
+        env = dict(os.environ, LUME_STORE_DIR=store_dir)
+        result = subprocess.run(args, capture_output=True, text=True, cwd=ROOT, env=env)
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{sessions} sessions failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(session_counts, files, shared):
+    header = f"{'sessions':>8} {'step':<16}" + "".join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'max':>9}"
+    print(header)
+    memory = []
+    for sessions in session_counts:
+        result = measure(sessions, files, shared)
+        for step in STEPS:
+            values = np.array(result["timings"][step])
+            cells = "".join(f"{np.percentile(values, p):>8.2f}s" for p in PERCENTILES)
+            print(f"{sessions:>8} {step:<16}{cells}{values.max():>8.2f}s", flush=True)
+        memory.append((sessions, result))
+
+    print(f"\n{'sessions':>8} {'wall':>9} {'RSS before':>11} {'RSS after':>10} {'peak RSS':>9} {'store':>9}")
+    for sessions, result in memory:
+        print(f"{sessions:>8} {result['wall']:>8.1f}s {result['baseline_mb']:>9.0f}MB {result['rss_mb']:>8.0f}MB "
+              f"{result['peak_mb']:>7.0f}MB {result['store_mb']:>7.0f}MB")
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "--child":
+        _run_round(int(sys.argv[2]), json.loads(sys.argv[3]), "--shared" in sys.argv[4:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 2, 4, 8], help="simultaneous session counts to run")
+    parser.add_argument("--files", nargs="+", default=SAMPLE_FILES, help="files from data/raw each session uploads")
+    parser.add_argument("--shared", action="store_true", help="every session uploads identical files")
+    args = parser.parse_args()
+    run(args.sessions, args.files, args.shared)
+
+if __name__ == "__main__":
+    main()
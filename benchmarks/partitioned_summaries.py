@@ -0,0 +1,104 @@
+"""
+Benchmarks the partitioned summaries: subject_summary, student_summary and
+the risk-rule aggregates on the worker pool against the single-process
+path, on synthetic long tables of 500k to 5M rows.
+
+    python benchmarks/partitioned_summaries.py                     # 0.5, 2, 5 million rows
+    python benchmarks/partitioned_summaries.py --rows 2000000 --workers 2 4 8
+
+Each partition is pickled to a worker and its partial result pickled back,
+so the table also reports how long pickling the partitions alone takes
+("pickle"): the part of the partitioned time that does not shrink with more
+workers. The pool is started before timing, as it is once per server.
+"""
+import argparse
+import functools
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analytics import partitioned_student_summary, partitioned_subject_summary  # noqa: E402
+from src.parallel import hash_partitions, map_partitions, worker_count  # noqa: E402
+from src.risk_rules import _partition_aggregates  # noqa: E402
+from src.schema import PASS_MARK  # noqa: E402
+from src.trajectory import order_terms  # noqa: E402
+
+SUBJECTS = 8
+TERMS = ["Sem 1", "Sem 2", "Sem 3", "Sem 4"]
+
+def generate(rows, seed=0):
+    """A cleaned long table of about `rows` rows: every student takes every subject in every term."""
+    rng = np.random.default_rng(seed)
+    students = max(rows // (SUBJECTS * len(TERMS)), 1)
+    n = students * SUBJECTS * len(TERMS)
+    reg_nos = np.array([f"U{i:08d}" for i in range(students)], dtype=object)
+    student = np.repeat(np.arange(students), SUBJECTS * len(TERMS))
+    return pd.DataFrame({
+        "reg_no": reg_nos[student],
+        "student_name": rng.choice(["Asha", "Ravi", "Meena", "Kiran", "Farah", "Joel"], students)[student],
+        "class": rng.choice(["BCA-A", "BCA-B", "BCom-A"], students)[student],
+        "term": np.tile(np.repeat(TERMS, SUBJECTS), students),
+        "subject": np.tile([f"subject_{i}" for i in range(SUBJECTS)], students * len(TERMS)),
+        "marks_pct": rng.integers(0, 101, n).astype("float64"),
+        "attendance": rng.integers(40, 101, n).astype("float64"),
+    })
+
+def _timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _pickle_partitions(df, key, workers):
+    codes = hash_partitions(df[key], workers)
+    for part in range(workers):
+        pickle.dumps(df[codes == part], protocol=pickle.HIGHEST_PROTOCOL)
+
+def summaries(df):
+    """
+    (name, call given a worker count, partition key) for each summary. With
+    one worker map_partitions runs fn on the whole frame in this process,
+    which is the single-process path.
+    """
+    aggregates = functools.partial(_partition_aggregates, pass_mark=PASS_MARK, terms=order_terms(df["term"]))
+    return [
+        ("subject_summary", lambda workers: partitioned_subject_summary(df, "reg_no", workers), "reg_no"),
+        ("student_summary", lambda workers: partitioned_student_summary(df, workers), "reg_no"),
+        ("student_aggregates", lambda workers: pd.concat(map_partitions(aggregates, df, "reg_no", workers)), "reg_no"),
+    ]
+
+def run(row_counts, worker_counts, repeat):
+    # start every worker once, so pool start-up is not timed
+    warm = generate(worker_count() * SUBJECTS * len(TERMS))
+    partitioned_student_summary(warm, worker_count())
+
+    print(f"{'rows':>10} {'summary':>20} {'single':>9} {'workers':>8} {'partitioned':>12} {'pickle':>9} {'speedup':>8}")
+    for rows in row_counts:
+        df = generate(rows)
+        for name, summary, key in summaries(df):
+            single_time = _timed(lambda: summary(1), repeat)
+            for workers in worker_counts:
+                partitioned_time = _timed(lambda: summary(workers), repeat)
+                pickle_time = _timed(lambda: _pickle_partitions(df, key, workers), repeat)
+                print(f"{len(df):>10,} {name:>20} {single_time:>8.2f}s {workers:>8} {partitioned_time:>11.2f}s "
+                      f"{pickle_time:>8.2f}s {single_time / partitioned_time:>7.1f}x", flush=True)
+        del df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500_000, 2_000_000, 5_000_000], help="long-table rows")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1], help="worker counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing; the fastest is reported")
+    args = parser.parse_args()
+    run(args.rows, sorted(set(args.workers)), args.repeat)
+
+if __name__ == "__main__":
+    main()
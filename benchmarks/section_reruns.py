@@ -0,0 +1,153 @@
+"""
+Times what a widget change on the summary pages costs: rerunning the whole
+page script, as every change did before the sections with widgets became
+fragments, against rerunning only the fragment that holds the widget.
+
+    python benchmarks/section_reruns.py
+    python benchmarks/section_reruns.py --repeat 10
+
+Each interaction flips one widget between two values on a page loaded with
+the sample files from data/raw. Widgets outside every fragment (the cohort
+filter, the student picker) still rerun the page, so they only have a full
+rerun time. The per-section times of a full rerun are printed last, to show
+what each fragment costs when its inputs change.
+
+AppTest always reruns the whole script, so fragment reruns are requested the
+way the browser does it: a rerun whose fragment queue holds the fragment's id.
+"""
+import argparse
+import inspect
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from cold_start import ROOT, seed_dataset
+
+sys.path.insert(0, ROOT)
+
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData, ScriptRequests  # noqa: E402
+from streamlit.testing.v1 import AppTest, local_script_runner  # noqa: E402
+from streamlit.testing.v1.element_tree import parse_tree_from_messages  # noqa: E402
+from src.ui_components import SECTION_TIMINGS  # noqa: E402
+
+TOTAL_SUMMARY = "pages/01_Total_Summary.py"
+STUDENT_SUMMARY = "pages/02_Student_Summary.py"
+
+# (page, label, widget type, widget key, two values or None for the first two options, fragment)
+INTERACTIONS = [
+    (TOTAL_SUMMARY, "correlation method", "radio", "total_correlation_method", ["spearman", "pearson"], "_subject_correlations"),
+    (TOTAL_SUMMARY, "what-if pass mark", "slider", "whatif_pass_mark", [50, 40], "_what_if"),
+    (TOTAL_SUMMARY, "at-risk rules", "text_area", "risk_rules_text",
+     ["low_marks: avg_marks < pass_mark", "low_marks: avg_marks < pass_mark\nlow_attendance: avg_attendance < attendance_threshold"],
+     "_at_risk"),
+    (TOTAL_SUMMARY, "cohort filter", "selectbox", "total_group_by", ["class", "All"], None),
+    (STUDENT_SUMMARY, "term", "selectbox", "student_term_selector", None, "_term_view"),
+    (STUDENT_SUMMARY, "student", "selectbox", "student_selector", None, None),
+]
+
+_FRAGMENT_QUEUE = []
+_run_script = local_script_runner.LocalScriptRunner.run
+
+# LocalScriptRunner.run, but requesting only the fragments in _FRAGMENT_QUEUE when set
+def _run(self, widget_state=None, query_params=None, timeout=3, page_hash=""):
+    if not _FRAGMENT_QUEUE:
+        return _run_script(self, widget_state, query_params, timeout, page_hash)
+    # a new runner starts with a full rerun pending, which would absorb the fragment rerun
+    self._requests = ScriptRequests()
+    self.request_rerun(RerunData(widget_states=widget_state, page_script_hash=page_hash,
+                                 fragment_id_queue=list(_FRAGMENT_QUEUE)))
+    try:
+        if not self._script_thread:
+            self.start()
+        local_script_runner.require_widgets_deltas(self, timeout)
+    finally:
+        self.join()
+    return parse_tree_from_messages(self.forward_msgs())
+
+local_script_runner.LocalScriptRunner.run = _run
+
+def _fragment_ids(at):
+    return {
+        inspect.getclosurevars(fn).nonlocals["non_optional_func"].__name__: fragment_id
+        for fragment_id, fn in at._fragment_storage._fragments.items()
+    }
+
+def _widget(at, kind, key):
+    return getattr(at, kind)(key=key)
+
+def _set(at, kind, key, value):
+    widget = _widget(at, kind, key)
+    if kind == "selectbox":
+        widget.select(value)
+    elif kind == "text_area":
+        widget.input(value)
+    else:
+        widget.set_value(value)
+
+def _timed_run(at, fragment_id=None):
+    _FRAGMENT_QUEUE[:] = [fragment_id] if fragment_id else []
+    try:
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+    finally:
+        _FRAGMENT_QUEUE.clear()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return elapsed
+
+def _app(page):
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=120)
+    seed_dataset(at)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+def run(repeat):
+    print(f"{'page':<28} {'interaction':<20} {'full rerun':>11} {'fragment':>10} {'speedup':>8}")
+    for page, label, kind, key, values, fragment in INTERACTIONS:
+        at = _app(page)
+        values = values or _widget(at, kind, key).options[1::-1]
+        full, partial = [], []
+        for i in range(repeat):
+            _set(at, kind, key, values[i % 2])
+            full.append(_timed_run(at))
+            if fragment:
+                # fragments are registered during the full run above
+                _set(at, kind, key, values[(i + 1) % 2])
+                partial.append(_timed_run(at, _fragment_ids(at).get(fragment)))
+
+        line = f"{os.path.basename(page):<28} {label:<20} {statistics.median(full) * 1000:>9.0f}ms"
+        if partial:
+            line += f" {statistics.median(partial) * 1000:>8.0f}ms {statistics.median(full) / statistics.median(partial):>7.1f}x"
+        else:
+            line += f" {'-':>10} {'-':>8}"
+        print(line, flush=True)
+
+    for page in [TOTAL_SUMMARY, STUDENT_SUMMARY]:
+        at = _app(page)
+        timings = at.session_state[SECTION_TIMINGS] if SECTION_TIMINGS in at.session_state else {}
+        print(f"\nSections of {os.path.basename(page)} (one full run):")
+        for name, seconds in timings.items():
+            print(f"  {name:<24} {seconds * 1000:>7.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="reruns per interaction (the median is reported)")
+    args = parser.parse_args()
+    # the pages load assets relative to the repository root, and the seeded dataset goes
+    # into a store directory of its own, so the run neither reuses nor leaves it on disk
+    os.chdir(ROOT)
+    store_dir = tempfile.mkdtemp(prefix="lume-section-reruns-")
+    os.environ["LUME_STORE_DIR"] = store_dir
+    try:
+        run(args.repeat)
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
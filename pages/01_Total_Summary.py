@@ -1,218 +1,436 @@
 import streamlit as st
-from src.analytics import rank_students, at_risk_students, subject_summary
-from src.visualizations import subject_performance_heatmap, top_students_bar, at_risk_scatter
-from src.schema import PASS_MARK
-from src.ui_components import inject_font, page_header, render_sidebar
-
-st.set_page_config(
-    page_title="Lume/Total Summary",
-    page_icon="assets/icon.png",
-    layout="wide"
-)
-side_context = render_sidebar()
-inject_font()
-page_header(
-    label="Academic Analytics",
-    title="Total Summary",
-    subtitle="Cohort-level performance overview across all students and subjects."
+from src.schema import PASS_MARK, CORRELATION_MIN_STUDENTS, RISK_RULES, MARKS_MIN, MARKS_MAX, ATTENDANCE_MIN, ATTENDANCE_MAX
+from src.ui_components import inject_font, page_header, render_sidebar, dashboard_section
+from src.session_data import (
+    cleaned_dataset, cleaning_job, collect_cleaning_job, column_values, cohort_metrics, score_band_table,
+    subject_summary_table, ranked_students, student_aggregate_table, cohort_sketches, cohort_trajectory,
+    subject_correlation_table, threshold_grid
 )
 
-if not st.session_state.get("data_ready", False):
-    st.warning("Please upload and process data on the main page first.")
-    st.stop()
-    
-filtered_df = st.session_state.long_df
-if filtered_df.empty:
-    st.warning("No data found for the selected filter. Try a different combination.")
-    st.stop()
-
-groupable_columns = [
-    col for col in filtered_df.columns
-    if col not in ["marks", "marks_pct", "reg_no", "student_name", "subject", "attendance"]
-]
-
-st.divider()
-st.markdown("### 🎛️ Filter Cohort")
-
-with st.container(border=True):
-    st.caption(
-        "This page provides a high-level overview of student performance across the entire dataset, "
-        "highlighting academic trends, attendance patterns, and overall rankings. Attendance is recorded "
-        "at student level and is uniform across subjects in this dataset."
+if __name__ == "__main__":
+    st.set_page_config(
+        page_title="Lume/Total Summary",
+        page_icon="assets/icon.png",
+        layout="wide"
+    )
+    side_context = render_sidebar()
+    inject_font()
+    page_header(
+        label="Academic Analytics",
+        title="Total Summary",
+        subtitle="Cohort-level performance overview across all students and subjects."
     )
+
+    collect_cleaning_job()
+    cleaned = cleaned_dataset() if st.session_state.get("data_ready", False) else None
+    if cleaned is None:
+        if cleaning_job() is not None:
+            st.info("⏳ Data cleaning is still running on the main page — results will appear here once it finishes.")
+        else:
+            st.warning("Please upload and process data on the main page first.")
+        st.stop()
+
+    # Analytics and charts are imported once there is data to show, so the page
+    # renders its header straight away when there is none
+    import pandas as pd
+    from src.visualizations import subject_performance_heatmap, top_students_bar, at_risk_scatter, subject_percentile_bands, subject_correlation_heatmap, at_risk_threshold_sweep
+    from src.correlation import CORRELATION_METHODS, top_subject_pairs
+    from src.risk_rules import AGGREGATES, flag_aggregates, parse_rules, format_rules
+    from src.quantiles import PERCENTILE_BANDS
+    from src.trajectory import most_declining
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    long_df = cleaned["long_df"]
+    if long_df.empty:
+        st.warning("No data found for the selected filter. Try a different combination.")
+        st.stop()
 
-    col1, col2, col3 = st.columns([1, 1, 2])
+    groupable_columns = [
+        col for col in long_df.columns
+        if col not in ["marks", "marks_pct", "reg_no", "student_name", "subject", "attendance"]
+    ]
 
-    with col1:
-        group_by = st.selectbox(
-            "Group By",
-            options=["All"] + groupable_columns,
-            key="total_group_by"
+    st.divider()
+    st.markdown("### 🎛️ Filter Cohort")
+
+    with st.container(border=True):
+        st.caption(
+            "This page provides a high-level overview of student performance across the entire dataset, "
+            "highlighting academic trends, attendance patterns, and overall rankings. Attendance is recorded "
+            "at student level and is uniform across subjects in this dataset."
         )
+    
+        st.markdown("<br>", unsafe_allow_html=True)
 
-    filtered_df = st.session_state.long_df.copy()
+        col1, col2, col3 = st.columns([1, 1, 2])
 
-    with col2:
-        if group_by != "All":
-            options_list = sorted(filtered_df[group_by].dropna().unique())
-            selected_value = st.selectbox(
-                f"Select specific {group_by}",
-                options=options_list,
-                key="total_group_value"
+        with col1:
+            group_by = st.selectbox(
+                "Group By",
+                options=["All"] + groupable_columns,
+                key="total_group_by"
             )
-            if selected_value in options_list:
-                filtered_df = filtered_df[filtered_df[group_by] == selected_value]
+
+        cohort_filters = {}
+
+        with col2:
+            if group_by != "All":
+                options_list = column_values(group_by)
+                selected_value = st.selectbox(
+                    f"Select specific {group_by}",
+                    options=options_list,
+                    key="total_group_value"
+                )
+                if selected_value in options_list:
+                    cohort_filters = {group_by: selected_value}
+                else:
+                    selected_value = "All Terms"
             else:
+                st.selectbox("Select specific group", ["Not applicable"], disabled=True)
                 selected_value = "All Terms"
-        else:
-            st.selectbox("Select specific group", ["Not applicable"], disabled=True)
-            selected_value = "All Terms"
 
-    with side_context:
-        if 'long_df' in st.session_state:
+        # every table below is built once per dataset and cohort filter (see src/session_data.py)
+        metrics = cohort_metrics(cohort_filters)
+
+        with side_context:
             st.markdown("### SYSTEM CONTEXT")
             with st.container(border=True):
-                st.markdown(f"**Students:** `{filtered_df['reg_no'].nunique()}`")
-                st.markdown(f"**Total Records:** `{len(filtered_df)}`")
+                st.markdown(f"**Students:** `{metrics['students']}`")
+                st.markdown(f"**Total Records:** `{metrics['records']}`")
                 st.markdown(f"**Active Group:** `{group_by}`")
                 st.markdown(f"**Active Term:** `{selected_value}`")
-    total_students = filtered_df['reg_no'].nunique()
-    avg_marks = filtered_df['marks_pct'].mean()
-    avg_attendance = filtered_df['attendance'].mean()
 
-st.markdown("### 📌 Cohort Overview")
-st.caption("These metrics summarize the overall academic and attendance performance of all students in the dataset.")
+    # Sections read their tables by cohort filter, so a rerun that leaves the filter
+    # as it was only redraws them. Sections with widgets of their own are fragments:
+    # those widgets rerun only that section
+    @dashboard_section("cohort_overview")
+    def _cohort_overview(metrics):
+        st.markdown("### 📌 Cohort Overview")
+        st.caption("These metrics summarize the overall academic and attendance performance of all students in the dataset.")
 
-c1, c2, c3 = st.columns(3)
+        c1, c2, c3 = st.columns(3)
 
-with c1:
-    with st.container(border=True):
-        st.metric("Total Students", total_students)
-
-with c2:
-    with st.container(border=True):
-        st.metric("Average Marks (%)", f"{avg_marks:.1f}%")
+        with c1:
+            with st.container(border=True):
+                st.metric("Total Students", metrics["students"])
 
-with c3:
-    with st.container(border=True):
-        st.metric("Average Attendance", f"{avg_attendance:.2f}%")
+        with c2:
+            with st.container(border=True):
+                st.metric("Average Marks (%)", f"{metrics['avg_marks']:.1f}%")
 
+        with c3:
+            with st.container(border=True):
+                st.metric("Average Attendance", f"{metrics['avg_attendance']:.2f}%")
 
-st.divider()
+    @dashboard_section("subject_performance")
+    def _subject_performance(cohort_filters):
+        st.markdown("### 📚 Subject-wise Performance Distribution")
 
-if group_by != "All":
-    st.info(f"Showing results for {group_by} = {selected_value}")
-else:
-    st.info("Showing results for entire dataset")
+        col_chart, col_table = st.columns([6, 4], gap="large")
 
-st.markdown("### 📚 Subject-wise Performance Distribution")
+        with col_chart:
+            heatmap_fig = subject_performance_heatmap(score_band_table(cohort_filters))
+            heatmap_fig.update_layout(coloraxis_showscale=False, title_text="")
+            st.plotly_chart(heatmap_fig, use_container_width=True)
 
-col_chart, col_table = st.columns([6, 4], gap="large")
+        with col_table:
+            with st.container(border=True):
+                st.markdown("**ℹ️ About Subject Summary**")
+                st.caption(
+                    "This table summarizes the number of students and average marks for each subject. "
+                    "It helps identify subjects with high or low performance across the cohort."
+                )
+            
+                sub_df = subject_summary_table(cohort_filters)
+                display_sub_df = sub_df[["subject", "students", "avg_marks"]].copy()
+                display_sub_df["avg_marks"] = display_sub_df["avg_marks"].round(1).astype(str) + "%"
+                display_sub_df = display_sub_df.rename(columns={"subject": "Subject", "students": "Students", "avg_marks": "Avg Marks (%)"})
+            
+                st.markdown("<br>", unsafe_allow_html=True)
+                st.dataframe(
+                    display_sub_df,
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+    @dashboard_section("percentile_bands")
+    def _percentile_bands(cohort_filters):
+        st.markdown("### 📏 Subject Percentile Bands")
+        st.caption(
+            "Spread of marks within each subject: the bar covers the 10th to 90th percentile, the darker band the middle 50% "
+            "and the marker the median. The P10 column is the cut-off for the bottom 10% of the cohort."
+        )
 
-with col_chart:
-    heatmap_fig = subject_performance_heatmap(filtered_df)
-    heatmap_fig.update_layout(coloraxis_showscale=False, title_text="")
-    st.plotly_chart(heatmap_fig, use_container_width=True)
+        # Bands come from the per-(class, term, subject) sketches built after cleaning; a
+        # filter on one of those columns just selects sketches before merging them per subject
+        sketches = cohort_sketches(cohort_filters)
+        bands_df = sketches.rollup(["subject"]).quantiles(PERCENTILE_BANDS)
+        bands_df = bands_df[bands_df["count"] > 0]
 
-with col_table:
-    with st.container(border=True):
-        st.markdown("**ℹ️ About Subject Summary**")
+        if bands_df.empty:
+            st.info("No marks available to compute percentile bands.")
+        else:
+            col_chart, col_table = st.columns([6, 4], gap="large")
+            with col_chart:
+                bands_fig = subject_percentile_bands(bands_df)
+                bands_fig.update_layout(title_text="")
+                st.plotly_chart(bands_fig, use_container_width=True)
+            with col_table:
+                with st.container(border=True):
+                    st.markdown("**ℹ️ Percentiles per Subject**")
+                    st.caption(f"Percentiles are accurate to within ±{sketches.error_bound:.1f} percentage points.")
+                    st.dataframe(
+                        bands_df[["subject", "count"] + [f"p{p}" for p in PERCENTILE_BANDS]]
+                        .round(1)
+                        .rename(columns={"subject": "Subject", "count": "Marks", **{f"p{p}": f"P{p}" for p in PERCENTILE_BANDS}}),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+
+    @dashboard_section("subject_correlations", fragment=True)
+    def _subject_correlations(cohort_filters):
+        st.markdown("### 🔗 Subject Correlations")
         st.caption(
-            "This table summarizes the number of students and average marks for each subject. "
-            "It helps identify subjects with high or low performance across the cohort."
+            "How marks in one subject move with marks in another, across students (each student's average over terms). "
+            f"Each pair uses only the students with marks in both subjects; pairs shared by fewer than {CORRELATION_MIN_STUDENTS} students are left blank."
         )
-        
-        sub_df = subject_summary(filtered_df)
-        display_sub_df = sub_df[["subject", "students", "avg_marks"]].copy()
-        display_sub_df["avg_marks"] = display_sub_df["avg_marks"].round(1).astype(str) + "%"
-        display_sub_df = display_sub_df.rename(columns={"subject": "Subject", "students": "Students", "avg_marks": "Avg Marks (%)"})
-        
-        st.markdown("<br>", unsafe_allow_html=True)
-        st.dataframe(
-            display_sub_df,
-            use_container_width=True,
-            hide_index=True
+
+        correlation_method = st.radio(
+            "Method",
+            options=CORRELATION_METHODS,
+            format_func=lambda m: {"pearson": "Pearson (linear)", "spearman": "Spearman (rank)"}[m],
+            horizontal=True,
+            key="total_correlation_method"
         )
+        corr_df, pair_counts = subject_correlation_table(correlation_method, cohort_filters)
 
-st.divider()
+        if corr_df.notna().sum().sum() == 0:
+            st.info("Not enough students with marks in two subjects to compute correlations.")
+        else:
+            col_chart, col_table = st.columns([6, 4], gap="large")
+            with col_chart:
+                corr_fig = subject_correlation_heatmap(corr_df)
+                corr_fig.update_layout(title_text="")
+                st.plotly_chart(corr_fig, use_container_width=True)
+            with col_table:
+                with st.container(border=True):
+                    st.markdown("**ℹ️ Strongest Subject Pairs**")
+                    st.caption("Subjects with the strongest positive or negative relationship between students' marks.")
+                    st.dataframe(
+                        top_subject_pairs(corr_df, pair_counts, n=10)
+                        .round({"correlation": 2})
+                        .rename(columns={"subject_a": "Subject A", "subject_b": "Subject B", "correlation": "Correlation", "students": "Students"}),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+
+    @dashboard_section("top_ranked")
+    def _top_ranked(cohort_filters):
+        st.markdown("### 🏆 Top Ranked Students")
+        st.caption("Ranks are computed using dense ranking, so students with the same average marks share the same rank.")
+
+        rank_df = ranked_students(cohort_filters)
+        top_df = rank_df.head(10)
+
+        tab_top10, tab_full = st.tabs(["📊 Top 10 Overview", "📋 Full Cohort Rankings"])
+
+        with tab_top10:
+            col_chart, col_table = st.columns([6, 4], gap="large")
+        
+            with col_chart:
+                fig = top_students_bar(rank_df, top_n=10)
+                fig.update_layout(coloraxis_showscale=False) 
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col_table:
+                with st.container(border=True):
+                    st.markdown("**ℹ️ Top 10 List**")
+                
+                    display_df = top_df[["rank", "reg_no", "student_name", "avg_marks"]].copy()
+                    display_df["avg_marks"] = display_df["avg_marks"].round(1).astype(str) + "%"
+                    display_df = display_df.rename(columns={"rank": "Rank", "reg_no": "Reg No", "student_name": "Student", "avg_marks": "Avg Marks (%)"})
+                
+                    st.dataframe(
+                        display_df,
+                        use_container_width=True, 
+                        height=350, 
+                        hide_index=True
+                    )
+
+        with tab_full:
+            st.dataframe(
+                rank_df[["rank", "reg_no", "student_name", "avg_marks", "avg_attendance"]]
+                .rename(columns={"rank": "Rank", "reg_no": "Reg No", "student_name": "Student", "avg_marks": "Avg Marks (%)", "avg_attendance": "Avg Attendance (%)"})
+                .assign(**{"Avg Marks (%)": lambda d: d["Avg Marks (%)"].round(1).astype(str) + "%",
+                           "Avg Attendance (%)": lambda d: d["Avg Attendance (%)"].round(1).astype(str) + "%"}),
+                use_container_width=True,
+                height=500,
+                hide_index=True
+            )
 
-st.markdown("### 🏆 Top Ranked Students")
-st.caption("Ranks are computed using dense ranking, so students with the same average marks share the same rank.")
+    @dashboard_section("at_risk", fragment=True)
+    def _at_risk(cohort_filters, pass_mark, attendance_threshold):
+        st.markdown("### ⚠️ At-Risk Students")
 
-rank_df = rank_students(filtered_df)
-top_df = rank_df.head(10)
+        with st.expander("⚙️ At-Risk Rules"):
+            st.caption(
+                "One rule per line as `name: expression`. A student matching any rule is at risk. Expressions can compare "
+                "the per-student values below with numbers, `pass_mark` and `attendance_threshold`, and combine comparisons "
+                "with `and`, `or` and `not`, e.g. `fails_two: failed_subjects >= 2`."
+            )
+            rules_text = st.text_area("Rules", value=format_rules(RISK_RULES), height=140, key="risk_rules_text")
+            st.dataframe(
+                pd.DataFrame(list(AGGREGATES.items()), columns=["Value", "Meaning"]),
+                use_container_width=True,
+                hide_index=True
+            )
 
-tab_top10, tab_full = st.tabs(["📊 Top 10 Overview", "📋 Full Cohort Rankings"])
+        # the aggregates are built once per pass mark and cohort; editing the rules only re-evaluates them
+        aggregates = student_aggregate_table(pass_mark, cohort_filters)
+        try:
+            risk_rules = parse_rules(rules_text)
+            at_risk_df = flag_aggregates(aggregates, risk_rules, pass_mark, attendance_threshold)
+        except ValueError as e:
+            st.error(f"{e}. Using the default rules instead.")
+            risk_rules = RISK_RULES
+            at_risk_df = flag_aggregates(aggregates, risk_rules, pass_mark, attendance_threshold)
 
-with tab_top10:
-    col_chart, col_table = st.columns([6, 4], gap="large")
-    
-    with col_chart:
-        fig = top_students_bar(rank_df, top_n=10)
-        fig.update_layout(coloraxis_showscale=False) 
-        st.plotly_chart(fig, use_container_width=True)
+        st.markdown(f"**Students At Risk:** `{len(at_risk_df)}`")
+
+        if not at_risk_df.empty:
+            tab_chart, tab_table, tab_rules = st.tabs(["📈 Visualization", "📋 Detailed List", "🧮 Rule Breakdown"])
         
-    with col_table:
-        with st.container(border=True):
-            st.markdown("**ℹ️ Top 10 List**")
+            with tab_chart:
+                fig = at_risk_scatter(at_risk_df, pass_mark=pass_mark, attendance_threshold=attendance_threshold)
+                fig.update_layout(title_text="")
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with tab_table:
+                st.caption("Students listed below have been identified as at-risk by at least one of the rules above.")
             
-            display_df = top_df[["rank", "reg_no", "student_name", "avg_marks"]].copy()
-            display_df["avg_marks"] = display_df["avg_marks"].round(1).astype(str) + "%"
-            display_df = display_df.rename(columns={"rank": "Rank", "reg_no": "Reg No", "student_name": "Student", "avg_marks": "Avg Marks (%)"})
+                display_risk_df = at_risk_df[["reg_no", "student_name", "avg_marks", "avg_attendance", "rules_triggered"]].copy()
+                display_risk_df["avg_marks"] = display_risk_df["avg_marks"].round(1).astype(str) + "%"
+                display_risk_df["avg_attendance"] = display_risk_df["avg_attendance"].round(1).astype(str) + "%"
+                display_risk_df = display_risk_df.rename(columns={"reg_no": "Reg No", "student_name": "Student", "avg_marks": "Avg Marks (%)", "avg_attendance": "Avg Attendance (%)", "rules_triggered": "Rules Triggered"})
             
+                st.dataframe(
+                    display_risk_df,
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+            with tab_rules:
+                st.caption("Students flagged by each rule. A student can match several rules.")
+                st.dataframe(
+                    pd.DataFrame({
+                        "Rule": list(risk_rules),
+                        "Expression": list(risk_rules.values()),
+                        "Students Flagged": [int(at_risk_df[name].sum()) for name in risk_rules],
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+        else:
+            st.success("No at-risk students detected.")
+
+    @dashboard_section("what_if", fragment=True)
+    def _what_if(cohort_filters, pass_mark, attendance_threshold):
+        st.markdown("#### 🎚️ What-If Thresholds")
+        st.caption(
+            "Try other pass marks and attendance thresholds without re-running cleaning. Counts use the classic rule "
+            "(average marks below the pass mark or average attendance below the threshold) and come from a precomputed "
+            "grid, so they update instantly."
+        )
+
+        grid = threshold_grid(cohort_filters)
+        col_controls, col_chart = st.columns([4, 6], gap="large")
+
+        with col_controls:
+            with st.container(border=True):
+                whatif_pass_mark = st.slider("Pass mark (%)", MARKS_MIN, MARKS_MAX, int(pass_mark), key="whatif_pass_mark")
+                whatif_attendance = st.slider("Attendance threshold (%)", ATTENDANCE_MIN, ATTENDANCE_MAX, int(attendance_threshold), key="whatif_attendance")
+                whatif_count = grid.count(whatif_pass_mark, whatif_attendance)
+                st.metric(
+                    "Students At Risk",
+                    whatif_count,
+                    delta=whatif_count - grid.count(pass_mark, attendance_threshold),
+                    delta_color="inverse",
+                    help="Change from the current pass mark and attendance threshold."
+                )
+                st.caption(
+                    f"{grid.marks_below(whatif_pass_mark)} below the pass mark, "
+                    f"{grid.attendance_below(whatif_attendance)} below the attendance threshold, out of {len(grid)} students."
+                )
+
+        with col_chart:
+            sweep_fig = at_risk_threshold_sweep(*grid.sweep(whatif_pass_mark, whatif_attendance),
+                                                pass_mark=whatif_pass_mark, attendance_threshold=whatif_attendance)
+            sweep_fig.update_layout(title_text="")
+            st.plotly_chart(sweep_fig, use_container_width=True)
+
+        with st.expander(f"📋 Students at risk at these thresholds ({whatif_count})"):
             st.dataframe(
-                display_df,
-                use_container_width=True, 
-                height=350, 
+                grid.students(whatif_pass_mark, whatif_attendance)[["reg_no", "student_name", "avg_marks", "avg_attendance"]]
+                .round({"avg_marks": 1, "avg_attendance": 1})
+                .rename(columns={"reg_no": "Reg No", "student_name": "Student", "avg_marks": "Avg Marks (%)", "avg_attendance": "Avg Attendance (%)"}),
+                use_container_width=True,
                 hide_index=True
             )
 
-with tab_full:
-    st.dataframe(
-        rank_df[["rank", "reg_no", "student_name", "avg_marks", "avg_attendance"]]
-        .rename(columns={"rank": "Rank", "reg_no": "Reg No", "student_name": "Student", "avg_marks": "Avg Marks (%)", "avg_attendance": "Avg Attendance (%)"})
-        .assign(**{"Avg Marks (%)": lambda d: d["Avg Marks (%)"].round(1).astype(str) + "%",
-                   "Avg Attendance (%)": lambda d: d["Avg Attendance (%)"].round(1).astype(str) + "%"}),
-        use_container_width=True,
-        height=500,
-        hide_index=True
-    )
+    @dashboard_section("most_declining")
+    def _most_declining(cohort_filters, group_by):
+        st.markdown("### 📉 Most Declining Students")
+        st.caption(
+            "Students ranked by the least-squares trend of their term-wise average marks (percentage points per term). "
+            "Only students with marks in at least two terms are included."
+        )
 
-pass_mark = st.session_state.get("pass_mark", PASS_MARK)
-attendance_threshold = st.session_state.get("attendance_threshold", 75)
-at_risk_df = at_risk_students(filtered_df, pass_mark,attendance_threshold).reset_index()
+        if group_by == "term":
+            st.info("Trajectories span several terms — choose a grouping other than term to see them.")
+            return
+        trajectory_summary, _ = cohort_trajectory(cohort_filters)
+        declining_df = most_declining(trajectory_summary, n=10)
 
-st.divider()
+        if declining_df.empty:
+            st.success("No students with a declining trend.")
+        else:
+            st.dataframe(
+                declining_df[["reg_no", "student_name", "terms_observed", "first_pct", "last_pct", "latest_delta", "slope"]]
+                .round(1)
+                .rename(columns={
+                    "reg_no": "Reg No", "student_name": "Student", "terms_observed": "Terms",
+                    "first_pct": "First Term (%)", "last_pct": "Latest Term (%)",
+                    "latest_delta": "Latest Change (pts)", "slope": "Trend (pts / term)"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
 
-st.markdown("### ⚠️ At-Risk Students")
-st.markdown(f"**Students At Risk:** `{len(at_risk_df)}`")
+    _cohort_overview(metrics)
 
-if not at_risk_df.empty:
-    tab_chart, tab_table = st.tabs(["📈 Visualization", "📋 Detailed List"])
-    
-    with tab_chart:
-        fig = at_risk_scatter(at_risk_df, pass_mark=pass_mark, attendance_threshold=attendance_threshold)
-        fig.update_layout(title_text="")
-        st.plotly_chart(fig, use_container_width=True)
-        
-    with tab_table:
-        st.caption("Students listed below have been identified as at-risk based on low average marks or attendance.")
-        
-        display_risk_df = at_risk_df[["reg_no", "student_name", "avg_marks", "avg_attendance"]].copy()
-        display_risk_df["avg_marks"] = display_risk_df["avg_marks"].round(1).astype(str) + "%"
-        display_risk_df["avg_attendance"] = display_risk_df["avg_attendance"].round(1).astype(str) + "%"
-        display_risk_df = display_risk_df.rename(columns={"reg_no": "Reg No", "student_name": "Student", "avg_marks": "Avg Marks (%)", "avg_attendance": "Avg Attendance (%)"})
-        
-        st.dataframe(
-            display_risk_df,
-            use_container_width=True,
-            hide_index=True
-        )
-else:
-    st.success("No at-risk students detected.")
-    
-st.markdown(
-    "<p style='text-align: center; color: gray;'>End of summary</p>",
-    unsafe_allow_html=True)
\ No newline at end of file
+    st.divider()
+
+    if group_by != "All":
+        st.info(f"Showing results for {group_by} = {selected_value}")
+    else:
+        st.info("Showing results for entire dataset")
+
+    _subject_performance(cohort_filters)
+    st.divider()
+    _percentile_bands(cohort_filters)
+    st.divider()
+    _subject_correlations(cohort_filters)
+    st.divider()
+    _top_ranked(cohort_filters)
+
+    pass_mark = st.session_state.get("pass_mark", PASS_MARK)
+    attendance_threshold = st.session_state.get("attendance_threshold", 75)
+
+    st.divider()
+    _at_risk(cohort_filters, pass_mark, attendance_threshold)
+    _what_if(cohort_filters, pass_mark, attendance_threshold)
+    st.divider()
+    _most_declining(cohort_filters, group_by)
+
+    st.markdown(
+        "<p style='text-align: center; color: gray;'>End of summary</p>",
+        unsafe_allow_html=True)
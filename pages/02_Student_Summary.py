@@ -1,53 +1,71 @@
-import pandas as pd
 import streamlit as st
-from src.ui_components import inject_font, page_header, render_sidebar
-from src.analytics import (
-    student_overview,
-    student_strengths_weaknesses,
-)
-from src.schema import PASS_MARK
-from src.visualizations import (
-    student_subject_marks_bar,
-    student_marks_distribution,
-    performance_category_donut,
-)
-
-st.set_page_config(
-    page_title="Lume/Student Summary",
-    page_icon="assets/icon.png",
-    layout="wide"
-)
-
-side_context = render_sidebar()
-inject_font()
-page_header(
-    label="Academic Analytics",
-    title="Student Summary",
-    subtitle="Individual academic performance breakdown by subject and term."
-)
-
-if not st.session_state.get("data_ready", False):
-    st.warning("Please upload and process data on the main page first.")
-    st.stop()
-
-long_df = st.session_state.long_df
-
-student_ids = (
-    long_df[["reg_no", "student_name"]]
-    .drop_duplicates()
-    .sort_values("reg_no"))
-
-student_label_map = {
-    f"{row.reg_no} - {row.student_name}": row.reg_no
-    for _, row in student_ids.iterrows()
-    }
-
-st.markdown("### 👤 Student Profile Selection")
-
-with st.container(border=True):
-    col_student, col_term = st.columns([2, 1])
-    
-    with col_student:
+from src.ui_components import inject_font, page_header, render_sidebar, dashboard_section
+from src.schema import PASS_MARK, ALL_TERMS
+from src.session_data import cleaned_dataset, cleaning_job, collect_cleaning_job, student_index, student_profiles, student_rows, student_trajectory, subject_trajectory
+
+if __name__ == "__main__":
+    st.set_page_config(
+        page_title="Lume/Student Summary",
+        page_icon="assets/icon.png",
+        layout="wide"
+    )
+
+    side_context = render_sidebar()
+    inject_font()
+    page_header(
+        label="Academic Analytics",
+        title="Student Summary",
+        subtitle="Individual academic performance breakdown by subject and term."
+    )
+
+    collect_cleaning_job()
+    cleaned = cleaned_dataset() if st.session_state.get("data_ready", False) else None
+    if cleaned is None:
+        if cleaning_job() is not None:
+            st.info("⏳ Data cleaning is still running on the main page — results will appear here once it finishes.")
+        else:
+            st.warning("Please upload and process data on the main page first.")
+        st.stop()
+
+    # Profiles and charts load only now that there is a dataset to show
+    import pandas as pd
+    from src.profiles import (
+        student_profile,
+        student_terms,
+        student_subject_performance,
+        profile_range_summary,
+        INSIGHT_MESSAGES,
+    )
+    from src.student_search import search_students
+    from src.visualizations import (
+        student_subject_marks_bar,
+        student_marks_distribution,
+        performance_category_donut,
+        student_trajectory_line,
+    )
+    from src.trajectory import order_terms, TRAJECTORY_MIN_TERMS
+
+    long_df = cleaned["long_df"]
+
+    # The search index and per-student profiles are built once per dataset after
+    # cleaning and shared across sessions; selecting a student is a lookup
+    student_index_data = student_index()
+    profiles, subject_performance = student_profiles()
+
+    st.markdown("### 👤 Student Profile Selection")
+
+    with st.container(border=True):
+        search_query = st.text_input(
+            "Search student",
+            placeholder="Type a reg no or name",
+            key="student_search"
+        )
+        matches = search_students(student_index_data, search_query)
+        if not matches:
+            st.warning(f"No students match '{search_query}'.")
+            st.stop()
+
+        student_label_map = {label: reg_no for reg_no, label in matches}
         selected_label = st.selectbox(
             "Select a student",
             options=list(student_label_map.keys()),
@@ -55,313 +73,349 @@ with st.container(border=True):
         )
 
     selected_reg_no = student_label_map[selected_label]
-    student_terms = (
-        long_df[long_df["reg_no"] == selected_reg_no]["term"]
-        .dropna()
-        .unique()
-    )
-
-    with col_term:
-        selected_term = st.selectbox(
-            "Select Term",
-            options=["All Terms"] + sorted(list(student_terms)),
-            key="student_term_selector"
-        )
 
-with side_context:
-    if 'long_df' in st.session_state:
+    with side_context:
         st.markdown("### STUDENT CONTEXT")
         with st.container(border=True):
             st.markdown(f"**Name:** `{selected_label.split(' - ')[1]}`")
             st.markdown(f"**ID:** `{selected_reg_no}`")
-            st.markdown(f"**Viewing:** `{selected_term}`")
+            # filled by the term view, so a term change updates it without a full rerun
+            viewing_line = st.empty()
         st.divider()
 
-student_df = long_df[long_df["reg_no"] == selected_reg_no]
+    # Each section below is a lookup into the per-dataset profiles and trajectories.
+    # Picking another student reruns the page; the term view is a fragment, so picking
+    # a term reruns only it (and the sections inside it) and leaves the term
+    # trajectory, which covers every term, as it is
+    @dashboard_section("student_overview")
+    def _student_overview(overview):
+        attendance = overview["avg_attendance"]
 
-if selected_term != "All Terms":
-    student_df = student_df[student_df["term"] == selected_term]
-
-overview = student_overview(student_df, selected_reg_no)
-attendance = overview["avg_attendance"]
-
-if pd.isna(attendance):
-    attendance_display = "Not Available"
-else:
-    attendance_display = f"{attendance:.2f}%"
-
-# Build student_perf with both marks (raw) and marks_pct for different chart uses
-if selected_term == "All Terms":
-    student_perf = (
-        student_df
-        .groupby("subject", as_index=False)
-        .agg(marks=("marks", "mean"), marks_pct=("marks_pct", "mean"))
-        .sort_values("subject")
-    )
-else:
-    student_perf = student_df[["subject", "marks", "marks_pct"]].sort_values("subject")
-
-perf_dict = student_strengths_weaknesses(student_df, selected_reg_no)
+        if pd.isna(attendance):
+            attendance_display = "Not Available"
+        else:
+            attendance_display = f"{attendance:.2f}%"
 
-c1, c2, c3 = st.columns(3)
+        c1, c2, c3 = st.columns(3)
 
-avg_marks = overview['avg_marks']  # now pct-based from analytics
+        avg_marks = overview['avg_marks']  # now pct-based from analytics
 
-with c1:
-    with st.container(border=True):
-        st.metric("Average Marks (%)", f"{avg_marks:.1f}%" if avg_marks is not None and not pd.isna(avg_marks) else "N/A") 
+        with c1:
+            with st.container(border=True):
+                st.metric("Average Marks (%)", f"{avg_marks:.1f}%" if avg_marks is not None and not pd.isna(avg_marks) else "N/A") 
         
-with c2:
-    with st.container(border=True):
-        st.metric("Overall Attendance", attendance_display)
+        with c2:
+            with st.container(border=True):
+                st.metric("Overall Attendance", attendance_display)
         
-with c3:
-    with st.container(border=True):
-        st.metric("Subjects Taken", overview["subjects_taken"])
-st.divider()
+        with c3:
+            with st.container(border=True):
+                st.metric("Subjects Taken", overview["subjects_taken"])
 
-st.markdown("### 📊 Subject-wise Performance")
-st.caption(f"Showing performance for: {selected_term}")
+    @dashboard_section("subject_marks")
+    def _subject_marks(student_perf, selected_term):
+        st.markdown("### 📊 Subject-wise Performance")
+        st.caption(f"Showing performance for: {selected_term}")
 
-if student_perf.empty or student_perf['marks'].isna().all():
-    st.info("No mark data available for this student.")
-else:
-    col_chart, col_table = st.columns([6, 4], gap="large")
+        if student_perf.empty or student_perf['marks'].isna().all():
+            st.info("No mark data available for this student.")
+        else:
+            col_chart, col_table = st.columns([6, 4], gap="large")
     
-    with col_chart:
-        bar_chart = student_subject_marks_bar(student_perf)
-        bar_chart.update_layout(title_text="")
-        st.plotly_chart(bar_chart, use_container_width=True)
+            with col_chart:
+                bar_chart = student_subject_marks_bar(student_perf)
+                bar_chart.update_layout(title_text="")
+                st.plotly_chart(bar_chart, use_container_width=True)
         
-    with col_table:
-        with st.container(border=True):
-            st.markdown("**ℹ️ About Subject Marks**")
-            st.caption(
-                "Raw score alongside percentage (normalised to 0–100 across all subjects). "
-                "The bar chart and analytics use the percentage scale."
-            )
+            with col_table:
+                with st.container(border=True):
+                    st.markdown("**ℹ️ About Subject Marks**")
+                    st.caption(
+                        "Raw score alongside percentage (normalised to 0–100 across all subjects). "
+                        "The bar chart and analytics use the percentage scale."
+                    )
             
-            display_perf_df = student_perf[["subject", "marks", "marks_pct"]].copy()
-            display_perf_df["marks"] = display_perf_df["marks"].round(1)
-            display_perf_df["marks_pct"] = display_perf_df["marks_pct"].round(1).astype(str) + "%"
-            display_perf_df = display_perf_df.rename(columns={
-                "subject": "Subject",
-                "marks": "Raw Score",
-                "marks_pct": "Score (%)"
-            })
+                    # across terms, show the spread behind each mean from the cross-term pivot
+                    perf_cols = ["subject", "marks", "marks_pct"]
+                    if selected_term == ALL_TERMS and student_perf["term_count"].max() > 1:
+                        perf_cols += ["pct_min", "pct_max", "term_count"]
+                    display_perf_df = student_perf[perf_cols].copy()
+                    display_perf_df["marks"] = display_perf_df["marks"].round(1)
+                    display_perf_df["marks_pct"] = display_perf_df["marks_pct"].round(1).astype(str) + "%"
+                    display_perf_df = display_perf_df.round({"pct_min": 1, "pct_max": 1}).rename(columns={
+                        "subject": "Subject",
+                        "marks": "Raw Score",
+                        "marks_pct": "Score (%)",
+                        "pct_min": "Lowest (%)",
+                        "pct_max": "Highest (%)",
+                        "term_count": "Terms"
+                    })
             
-            st.markdown("<br>", unsafe_allow_html=True)
-            st.dataframe(
-                display_perf_df,
-                use_container_width=True,
-                hide_index=True
-            )
-st.divider()
-
-# bucket subjects into pct ranges
-bins = [0, 40, 60, 75, 100]
-labels = ["0–40", "41–60", "61–75", "76–100"]
-
-temp_df = student_perf.copy()
-temp_df["marks_range"] = pd.cut(
-    temp_df["marks_pct"],
-    bins=bins,
-    labels=labels,
-    include_lowest=True
-)
-
-range_summary = (
-    temp_df.groupby("marks_range", observed=False)["subject"]
-    .agg(
-        Subjects=lambda x: ", ".join(x),
-        Count="count"
-    )
-    .reindex(labels)
-    .reset_index()
-)
-range_summary["Subjects"] = range_summary["Subjects"].fillna("")
-range_summary["Count"] = range_summary["Count"].fillna(0).astype(int)
-range_summary.columns = ["Marks Range (%)", "Subjects", "Count"]
-
-col_chart, col_table = st.columns([6, 4], gap="large")
-
-with col_chart:
-    if student_perf.empty or student_perf['marks_pct'].isna().all():
-        st.info("No mark data available for this student.")
-    else:
-        pass_mark = st.session_state.get("pass_mark", PASS_MARK)
-        dist_fig = student_marks_distribution(student_perf, pass_mark=pass_mark)
-        dist_fig.update_layout(title_text="")
-        st.plotly_chart(dist_fig, use_container_width=True)
-
-with col_table:
-    with st.container(border=True):
-        st.markdown("**📌 Marks Range Summary**")
-        st.caption(
-            "This table shows how the student's subjects are distributed "
-            "across different performance ranges."
-        )
-        
-        st.markdown("<br>", unsafe_allow_html=True)
-        st.dataframe(
-            range_summary,
-            use_container_width=True,
-            hide_index=True
-        )
-        
-st.divider()
-
-st.markdown("### 🏆 Performance Category")
-
-total_subjects = (
-    len(perf_dict["strengths"])
-    + len(perf_dict["average"])
-    + len(perf_dict["weaknesses"])
-)
-
-strong = len(perf_dict["strengths"])
-weak = len(perf_dict["weaknesses"])
-
-if total_subjects == 0:
-    insight = "⚪ No subject data available for this student."
-elif strong / total_subjects >= 0.6:
-    insight = "🟢 The student shows strong overall performance across most subjects."
-elif weak / total_subjects >= 0.4:
-    insight = "🔴 The student has multiple weak-performing subjects and may need support."
-else:
-    insight = "🟡 The student's performance is mixed across subjects."
-    
-st.info(insight)
-
-if student_perf.empty or student_perf['marks'].isna().all():
-    st.info("No mark data available for this student.")
-else:
-    tab_chart, tab_data = st.tabs(["📈 Visualization", "📄 Full Student Details"])
-
-    with tab_chart:
-        total_cat_subjects = len(perf_dict["strengths"]) + len(perf_dict["average"]) + len(perf_dict["weaknesses"])
-
-        if total_cat_subjects > 10:
-            # Stacked layout for large subject counts
-            perf_fig = performance_category_donut(perf_dict)
-            perf_fig.update_layout(
-                showlegend=True,
-                legend=dict(orientation="h", yanchor="bottom", y=-0.15, xanchor="center", x=0.5),
-                margin=dict(t=50, b=0, l=0, r=0),
-                height=300
-            )
-            st.plotly_chart(perf_fig, use_container_width=True)
-
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    st.dataframe(
+                        display_perf_df,
+                        use_container_width=True,
+                        hide_index=True
+                    )
+
+    @dashboard_section("marks_ranges")
+    def _marks_ranges(student_perf, overview):
+        # subjects bucketed into pct ranges, precomputed in the profile
+        range_summary = profile_range_summary(overview)
+
+        col_chart, col_table = st.columns([6, 4], gap="large")
+
+        with col_chart:
+            if student_perf.empty or student_perf['marks_pct'].isna().all():
+                st.info("No mark data available for this student.")
+            else:
+                pass_mark = st.session_state.get("pass_mark", PASS_MARK)
+                dist_fig = student_marks_distribution(student_perf, pass_mark=pass_mark)
+                dist_fig.update_layout(title_text="")
+                st.plotly_chart(dist_fig, use_container_width=True)
+
+        with col_table:
             with st.container(border=True):
-                st.markdown("##### 🔍 Subject Profile Summary")
-                st.caption("Classification based on unique subjects across all selected terms.")
+                st.markdown("**📌 Marks Range Summary**")
+                st.caption(
+                    "This table shows how the student's subjects are distributed "
+                    "across different performance ranges."
+                )
+        
                 st.markdown("<br>", unsafe_allow_html=True)
-
-                with st.expander(f"🟢 Strengths ({len(perf_dict['strengths'])})"):
-                    items = sorted(list(set(perf_dict["strengths"])))
-                    if items:
-                        for i in items:
-                            st.markdown(f"- {i.title()}")
-                    else:
-                        st.caption("None")
-
-                with st.expander(f"🟡 Average ({len(perf_dict['average'])})"):
-                    items = sorted(list(set(perf_dict["average"])))
-                    if items:
-                        for i in items:
-                            st.markdown(f"- {i.title()}")
-                    else:
-                        st.caption("None")
-
-                with st.expander(f"🔴 Weaknesses ({len(perf_dict['weaknesses'])})"):
-                    items = sorted(list(set(perf_dict["weaknesses"])))
-                    if items:
-                        for i in items:
-                            st.markdown(f"- {i.title()}")
-                    else:
-                        st.caption("None")
-        else:
-            # Original side-by-side layout
-            col_donut, col_details = st.columns([4, 6], gap="large")
-
-            with col_donut:
-                st.markdown("<br><br>", unsafe_allow_html=True)
-                perf_fig = performance_category_donut(perf_dict)
-                perf_fig.update_layout(
-                    showlegend=True,
-                    legend=dict(orientation="h", yanchor="bottom", y=-0.15, xanchor="center", x=0.5),
-                    margin=dict(t=50, b=0, l=0, r=0),
-                    height=300
+                st.dataframe(
+                    range_summary,
+                    use_container_width=True,
+                    hide_index=True
                 )
-                st.plotly_chart(perf_fig, use_container_width=True)
 
-            with col_details:
-                with st.container(border=True):
-                    st.markdown("##### 🔍 Subject Profile Summary")
-                    st.caption("Classification based on unique subjects across all selected terms.")
-                    st.markdown("<br>", unsafe_allow_html=True)
+    @dashboard_section("performance_category")
+    def _performance_category(overview, student_perf, student_df, selected_term):
+        perf_dict = {category: overview[category] for category in ["strengths", "average", "weaknesses"]}
 
-                    c1, c2, c3 = st.columns(3)
-
-                    with c1:
-                        st.markdown("🟢 **Strengths**")
-                        items = sorted(list(set(perf_dict["strengths"])))
-                        if items:
-                            for i in items:
-                                st.markdown(f"- {i.title()}")
-                        else:
-                            st.caption("None")
-
-                    with c2:
-                        st.markdown("🟡 **Average**")
-                        items = sorted(list(set(perf_dict["average"])))
-                        if items:
-                            for i in items:
-                                st.markdown(f"- {i.title()}")
-                        else:
-                            st.caption("None")
-
-                    with c3:
-                        st.markdown("🔴 **Weaknesses**")
-                        items = sorted(list(set(perf_dict["weaknesses"])))
-                        if items:
-                            for i in items:
-                                st.markdown(f"- {i.title()}")
-                        else:
-                            st.caption("None")
+        st.markdown("### 🏆 Performance Category")
 
-                    st.markdown("<br>", unsafe_allow_html=True)
+        insight = INSIGHT_MESSAGES[overview["insight"]]
+        st.info(insight)
 
-    with tab_data:
-        st.caption("This table displays the complete subject-wise academic record for the selected student.")
+        if student_perf.empty or student_perf['marks'].isna().all():
+            st.info("No mark data available for this student.")
+        else:
+            tab_chart, tab_data = st.tabs(["📈 Visualization", "📄 Full Student Details"])
+
+            with tab_chart:
+                total_cat_subjects = len(perf_dict["strengths"]) + len(perf_dict["average"]) + len(perf_dict["weaknesses"])
+
+                if total_cat_subjects > 10:
+                    # Stacked layout for large subject counts
+                    perf_fig = performance_category_donut(perf_dict)
+                    perf_fig.update_layout(
+                        showlegend=True,
+                        legend=dict(orientation="h", yanchor="bottom", y=-0.15, xanchor="center", x=0.5),
+                        margin=dict(t=50, b=0, l=0, r=0),
+                        height=300
+                    )
+                    st.plotly_chart(perf_fig, use_container_width=True)
+
+                    with st.container(border=True):
+                        st.markdown("##### 🔍 Subject Profile Summary")
+                        st.caption("Classification based on unique subjects across all selected terms.")
+                        st.markdown("<br>", unsafe_allow_html=True)
+
+                        with st.expander(f"🟢 Strengths ({len(perf_dict['strengths'])})"):
+                            items = sorted(list(set(perf_dict["strengths"])))
+                            if items:
+                                for i in items:
+                                    st.markdown(f"- {i.title()}")
+                            else:
+                                st.caption("None")
+
+                        with st.expander(f"🟡 Average ({len(perf_dict['average'])})"):
+                            items = sorted(list(set(perf_dict["average"])))
+                            if items:
+                                for i in items:
+                                    st.markdown(f"- {i.title()}")
+                            else:
+                                st.caption("None")
+
+                        with st.expander(f"🔴 Weaknesses ({len(perf_dict['weaknesses'])})"):
+                            items = sorted(list(set(perf_dict["weaknesses"])))
+                            if items:
+                                for i in items:
+                                    st.markdown(f"- {i.title()}")
+                            else:
+                                st.caption("None")
+                else:
+                    # Original side-by-side layout
+                    col_donut, col_details = st.columns([4, 6], gap="large")
+
+                    with col_donut:
+                        st.markdown("<br><br>", unsafe_allow_html=True)
+                        perf_fig = performance_category_donut(perf_dict)
+                        perf_fig.update_layout(
+                            showlegend=True,
+                            legend=dict(orientation="h", yanchor="bottom", y=-0.15, xanchor="center", x=0.5),
+                            margin=dict(t=50, b=0, l=0, r=0),
+                            height=300
+                        )
+                        st.plotly_chart(perf_fig, use_container_width=True)
+
+                    with col_details:
+                        with st.container(border=True):
+                            st.markdown("##### 🔍 Subject Profile Summary")
+                            st.caption("Classification based on unique subjects across all selected terms.")
+                            st.markdown("<br>", unsafe_allow_html=True)
+
+                            c1, c2, c3 = st.columns(3)
+
+                            with c1:
+                                st.markdown("🟢 **Strengths**")
+                                items = sorted(list(set(perf_dict["strengths"])))
+                                if items:
+                                    for i in items:
+                                        st.markdown(f"- {i.title()}")
+                                else:
+                                    st.caption("None")
+
+                            with c2:
+                                st.markdown("🟡 **Average**")
+                                items = sorted(list(set(perf_dict["average"])))
+                                if items:
+                                    for i in items:
+                                        st.markdown(f"- {i.title()}")
+                                else:
+                                    st.caption("None")
+
+                            with c3:
+                                st.markdown("🔴 **Weaknesses**")
+                                items = sorted(list(set(perf_dict["weaknesses"])))
+                                if items:
+                                    for i in items:
+                                        st.markdown(f"- {i.title()}")
+                                else:
+                                    st.caption("None")
+
+                            st.markdown("<br>", unsafe_allow_html=True)
+
+            with tab_data:
+                st.caption("This table displays the complete subject-wise academic record for the selected student.")
         
-        student_full_df = (
-            student_df[student_df["reg_no"] == selected_reg_no]
-            .sort_values("subject")
-            .reset_index(drop=True)
-        )
+                if selected_term != ALL_TERMS:
+                    student_df = student_df[student_df["term"].astype(str) == selected_term]
+
+                student_full_df = (
+                    student_df
+                    .sort_values("subject")
+                    .reset_index(drop=True)
+                )
         
-        display_full_df = student_full_df.copy()
-        for col in ["marks", "attendance"]:
-            if col in display_full_df.columns:
-                display_full_df[col] = display_full_df[col].round(2)
-        if "marks_pct" in display_full_df.columns:
-            display_full_df["marks_pct"] = display_full_df["marks_pct"].round(1).astype(str) + "%"
-        display_full_df = display_full_df.rename(columns={
-            "reg_no": "Reg No", "student_name": "Student",
-            "class": "Class", "term": "Term",
-            "attendance": "Attendance (%)", "subject": "Subject",
-            "marks": "Raw Score", "marks_pct": "Score (%)"
-        })
-
-        st.dataframe(
-            display_full_df,
-            use_container_width=True,
-            hide_index=True
-        )
+                display_full_df = student_full_df.copy()
+                for col in ["marks", "attendance"]:
+                    if col in display_full_df.columns:
+                        display_full_df[col] = display_full_df[col].round(2)
+                if "marks_pct" in display_full_df.columns:
+                    display_full_df["marks_pct"] = display_full_df["marks_pct"].round(1).astype(str) + "%"
+                display_full_df = display_full_df.rename(columns={
+                    "reg_no": "Reg No", "student_name": "Student",
+                    "class": "Class", "term": "Term",
+                    "attendance": "Attendance (%)", "subject": "Subject",
+                    "marks": "Raw Score", "marks_pct": "Score (%)"
+                })
+
+                st.dataframe(
+                    display_full_df,
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+    @dashboard_section("term_trajectory")
+    def _term_trajectory(selected_reg_no):
+        st.markdown("### 📈 Term Trajectory")
+        st.caption("Average marks per term across all terms, with the term-over-term change and the least-squares trend.")
 
-st.divider()
-st.markdown(
-    "<p style='text-align: center; color: gray;'>End of summary</p>",
-    unsafe_allow_html=True
-)
\ No newline at end of file
+        trajectory_summary, trajectory_series = student_trajectory()
+
+        if selected_reg_no not in trajectory_summary.index or trajectory_summary.loc[selected_reg_no, "terms_observed"] < TRAJECTORY_MIN_TERMS:
+            st.info(f"A trajectory needs marks in at least {TRAJECTORY_MIN_TERMS} terms.")
+        else:
+            student_series = trajectory_series.loc[selected_reg_no].reset_index()
+            cohort_trajectory = (
+                trajectory_series.groupby(level="term", observed=True)["marks_pct"].mean()
+                .reindex(order_terms(trajectory_series.index.get_level_values("term")))
+                .rename_axis("term")
+                .reset_index()
+            )
+            trend = trajectory_summary.loc[selected_reg_no]
+
+            col_chart, col_table = st.columns([6, 4], gap="large")
+
+            with col_chart:
+                trajectory_fig = student_trajectory_line(student_series, cohort_trajectory)
+                trajectory_fig.update_layout(title_text="")
+                st.plotly_chart(trajectory_fig, use_container_width=True)
+
+            with col_table:
+                m1, m2 = st.columns(2)
+                with m1:
+                    with st.container(border=True):
+                        st.metric("Trend (pts / term)", f"{trend['slope']:+.1f}")
+                with m2:
+                    with st.container(border=True):
+                        st.metric("Latest Change", f"{trend['latest_delta']:+.1f} pts" if pd.notna(trend["latest_delta"]) else "N/A")
+
+                display_traj_df = student_series[["term", "marks_pct", "delta"]].copy()
+                display_traj_df["marks_pct"] = display_traj_df["marks_pct"].round(1).astype(str) + "%"
+                display_traj_df["delta"] = display_traj_df["delta"].map(lambda d: "—" if pd.isna(d) else f"{d:+.1f}")
+                display_traj_df = display_traj_df.rename(columns={"term": "Term", "marks_pct": "Avg Marks (%)", "delta": "Change (pts)"})
+                st.dataframe(display_traj_df, use_container_width=True, hide_index=True)
+
+            subject_trend, _ = subject_trajectory()
+            if selected_reg_no in subject_trend.index.get_level_values("reg_no"):
+                subject_trend = subject_trend.loc[selected_reg_no]
+                subject_trend = subject_trend[subject_trend["terms_observed"] >= TRAJECTORY_MIN_TERMS]
+                if not subject_trend.empty:
+                    with st.expander(f"📚 Subject Trends ({len(subject_trend)})"):
+                        st.dataframe(
+                            subject_trend.reset_index()[["subject", "terms_observed", "first_pct", "last_pct", "slope"]]
+                            .round(1)
+                            .rename(columns={
+                                "subject": "Subject", "terms_observed": "Terms",
+                                "first_pct": "First (%)", "last_pct": "Latest (%)", "slope": "Trend (pts / term)"
+                            }),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+
+    @dashboard_section("term_view", fragment=True)
+    def _term_view(profiles, subject_performance, student_df, selected_reg_no, viewing_line):
+        col_term, _ = st.columns([1, 2])
+        with col_term:
+            selected_term = st.selectbox(
+                "Select Term",
+                options=[ALL_TERMS] + student_terms(profiles, selected_reg_no),
+                key="student_term_selector"
+            )
+        viewing_line.markdown(f"**Viewing:** `{st.session_state['student_term_selector']}`")
+
+        overview = student_profile(profiles, selected_reg_no, selected_term)
+        # student_perf carries both marks (raw) and marks_pct for different chart uses;
+        # for "All Terms" it holds the per-subject means across terms
+        student_perf = student_subject_performance(subject_performance, selected_reg_no, selected_term)
+
+        _student_overview(overview)
+        st.divider()
+        _subject_marks(student_perf, selected_term)
+        st.divider()
+        _marks_ranges(student_perf, overview)
+        st.divider()
+        _performance_category(overview, student_perf, student_df, selected_term)
+
+    _term_view(profiles, subject_performance, student_rows(long_df, selected_reg_no), selected_reg_no, viewing_line)
+    st.divider()
+    _term_trajectory(selected_reg_no)
+
+    st.divider()
+    st.markdown(
+        "<p style='text-align: center; color: gray;'>End of summary</p>",
+        unsafe_allow_html=True
+    )
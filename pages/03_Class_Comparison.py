@@ -0,0 +1,126 @@
+import streamlit as st
+from src.schema import ALL_TERMS, COMPARISON_ALPHA
+from src.ui_components import inject_font, page_header, render_sidebar
+from src.session_data import cleaned_dataset, cleaning_job, collect_cleaning_job, class_moments_table
+
+if __name__ == "__main__":
+    st.set_page_config(
+        page_title="Lume/Class Comparison",
+        page_icon="assets/icon.png",
+        layout="wide"
+    )
+    side_context = render_sidebar()
+    inject_font()
+    page_header(
+        label="Academic Analytics",
+        title="Class Comparison",
+        subtitle="Which sections differ significantly, and in which subjects."
+    )
+
+    collect_cleaning_job()
+    cleaned = cleaned_dataset() if st.session_state.get("data_ready", False) else None
+    if cleaned is None:
+        if cleaning_job() is not None:
+            st.info("⏳ Data cleaning is still running on the main page — results will appear here once it finishes.")
+        else:
+            st.warning("Please upload and process data on the main page first.")
+        st.stop()
+
+    # The statistics and charts load only once there is a dataset
+    from src.comparison import class_comparison
+    from src.visualizations import class_comparison_heatmap
+
+    # Per-(term, class, subject) sums built once after cleaning; selecting a term
+    # or pooling all terms only filters and adds up rows of this table
+    moments = class_moments_table()
+    if "class" not in moments.columns or moments["class"].nunique() < 2:
+        st.info("The dataset has fewer than two classes, so there is nothing to compare.")
+        st.stop()
+
+    st.divider()
+    st.markdown("### 🎛️ Comparison Settings")
+
+    with st.container(border=True):
+        st.caption(
+            "Every pair of classes is compared in every subject they share: the difference in average marks, "
+            "the effect size (Cohen's d, the difference in units of the pooled standard deviation) and a Welch t-test. "
+            f"Differences are flagged as significant when their false discovery rate adjusted p-value (q) is below {COMPARISON_ALPHA}."
+        )
+
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            terms = sorted(moments["term"].dropna().unique()) if "term" in moments.columns else []
+            selected_term = st.selectbox("Term", options=[ALL_TERMS] + terms, key="comparison_term")
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            significant_only = st.toggle("Show significant differences only", key="comparison_significant_only")
+
+    term_moments = moments if selected_term == ALL_TERMS else moments[moments["term"] == selected_term]
+    comparison_df = class_comparison(term_moments)
+
+    with side_context:
+        st.markdown("### SYSTEM CONTEXT")
+        with st.container(border=True):
+            st.markdown(f"**Classes:** `{term_moments['class'].nunique()}`")
+            st.markdown(f"**Subjects:** `{term_moments['subject'].nunique()}`")
+            st.markdown(f"**Active Term:** `{selected_term}`")
+
+    st.markdown("### 📌 Overview")
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        with st.container(border=True):
+            st.metric("Classes Compared", term_moments["class"].nunique())
+    with c2:
+        with st.container(border=True):
+            st.metric("Subject × Class Pairs", len(comparison_df))
+    with c3:
+        with st.container(border=True):
+            st.metric("Significant Differences", int(comparison_df["significant"].sum()))
+
+    st.divider()
+
+    if comparison_df.empty:
+        st.info("No subject is shared by two classes for the selected term.")
+        st.stop()
+
+    if selected_term == ALL_TERMS:
+        st.info("Showing results pooled over all terms")
+    else:
+        st.info(f"Showing results for term = {selected_term}")
+
+    st.markdown("### ⚖️ Class Differences by Subject")
+    st.caption(
+        "Each cell is the effect size of the first class of the pair minus the second: blue when the first class scores higher, "
+        "red when it scores lower. Cells marked * are significant."
+    )
+    heatmap_fig = class_comparison_heatmap(comparison_df)
+    heatmap_fig.update_layout(title_text="")
+    st.plotly_chart(heatmap_fig, use_container_width=True)
+
+    st.divider()
+
+    st.markdown("### 📋 Pairwise Results")
+    display_df = comparison_df[comparison_df["significant"]] if significant_only else comparison_df
+    if display_df.empty:
+        st.success("No significant differences between classes.")
+    else:
+        st.dataframe(
+            display_df.sort_values(["q_value", "subject"])
+            [["subject", "class_a", "class_b", "mean_a", "mean_b", "mean_diff", "effect_size", "t_stat", "p_value", "q_value", "significant"]]
+            .round({"mean_a": 1, "mean_b": 1, "mean_diff": 1, "effect_size": 2, "t_stat": 2})
+            .rename(columns={
+                "subject": "Subject", "class_a": "Class A", "class_b": "Class B",
+                "mean_a": "Avg A (%)", "mean_b": "Avg B (%)", "mean_diff": "Difference (pts)",
+                "effect_size": "Effect Size (d)", "t_stat": "t", "p_value": "p", "q_value": "q",
+                "significant": "Significant"
+            }),
+            use_container_width=True,
+            height=500,
+            hide_index=True
+        )
+
+    st.markdown(
+        "<p style='text-align: center; color: gray;'>End of comparison</p>",
+        unsafe_allow_html=True
+    )
@@ -1,17 +1,84 @@
+import os
+import functools
 import pandas as pd
-from src.schema import PASS_MARK
+from src.schema import STRENGTH_THRESHOLD, WEAKNESS_THRESHOLD, GROUPBY_PARTITION_KEY, RISK_RULES
+from src import sql_backend
+from src.sql_backend import SqlDataset
+from src.parallel import map_partitions, groupby_workers, use_partitions
+from src.profiles import build_cross_term_pivot
+from src.risk_rules import flagged_students
+
+# subject_summary, student_summary, at_risk_students and rank_students also accept
+# a SqlDataset (see analytics_source) and then run as SQL with the same output columns.
+# Large frames are hash-partitioned and summarised on a process pool (see map_partitions).
 
 def subject_summary(df):
-    summary = df.groupby('subject').agg(students = ('reg_no', 'nunique'), avg_marks = ('marks_pct', 'mean'), avg_attendance = ('attendance', 'mean')).reset_index()
+    if isinstance(df, SqlDataset):
+        return sql_backend.subject_summary(df)
+    if use_partitions(df):
+        return partitioned_subject_summary(df)
+    summary = df.groupby('subject', observed=True).agg(students = ('reg_no', 'nunique'), avg_marks = ('marks_pct', 'mean'), avg_attendance = ('attendance', 'mean')).reset_index()
     return summary
 
+# Per-partition sums and counts per subject, plus the students seen: their count when the
+# partitions split on reg_no, since each student's rows are then in one partition, and
+# otherwise the reg_nos themselves, since a student may turn up in several partitions
+def _subject_partial(df, reg_no_sets=False):
+    grouped = df.groupby('subject', observed=True)
+    partial = grouped.agg(
+        marks_sum=('marks_pct', 'sum'), marks_count=('marks_pct', 'count'),
+        attendance_sum=('attendance', 'sum'), attendance_count=('attendance', 'count')
+    )
+    if reg_no_sets:
+        partial['reg_nos'] = grouped['reg_no'].unique()
+    else:
+        partial['students'] = grouped['reg_no'].nunique()
+    return partial
+
+def partitioned_subject_summary(df, partition_by=None, max_workers=None):
+    """
+    subject_summary computed over hash partitions of df on a process pool.
+
+    Each partition returns sums and counts, so the averages are rebuilt
+    exactly as sum / count. When partitioning on reg_no the partitions hold
+    disjoint sets of students and their distinct counts simply add up;
+    otherwise each partition returns its reg_nos and the sets are united.
+    """
+    partition_by = partition_by or os.environ.get("LUME_GROUPBY_PARTITION_KEY", GROUPBY_PARTITION_KEY)
+    reg_no_sets = partition_by != 'reg_no'
+    partials = pd.concat(map_partitions(
+        functools.partial(_subject_partial, reg_no_sets=reg_no_sets), df, partition_by, max_workers or groupby_workers()
+    ))
+
+    grouped = partials.groupby(level=0, observed=True)
+    totals = grouped[['marks_sum', 'marks_count', 'attendance_sum', 'attendance_count']].sum()
+    if reg_no_sets:
+        students = grouped['reg_nos'].agg(lambda sets: len(set().union(*sets)))
+    else:
+        students = grouped['students'].sum()
+
+    summary = pd.DataFrame({
+        'students': students.astype('int64'),
+        'avg_marks': (totals['marks_sum'] / totals['marks_count']).where(totals['marks_count'] > 0),
+        'avg_attendance': (totals['attendance_sum'] / totals['attendance_count']).where(totals['attendance_count'] > 0),
+    })
+    summary.index.name = 'subject'
+    return summary.reset_index()
+
 def attendance_summary(df):
-    summary = df.groupby('subject').agg(avg_attendance = ('attendance', 'mean'), attendance_records = ('attendance', 'count')).reset_index()
+    summary = df.groupby('subject', observed=True).agg(avg_attendance = ('attendance', 'mean'), attendance_records = ('attendance', 'count')).reset_index()
     return summary
 
 def student_summary(df):
+    if isinstance(df, SqlDataset):
+        return sql_backend.student_summary(df)
+    if use_partitions(df):
+        return partitioned_student_summary(df)
+    return _student_summary(df)
+
+def _student_summary(df):
     summary = (
-        df.groupby('reg_no')
+        df.groupby('reg_no', observed=True)
         .agg(
             student_name=('student_name', 'first'),
             class_=('class', 'first'),
@@ -23,20 +90,30 @@ def student_summary(df):
     )
     return summary
 
-def at_risk_students(df,PASS_MARK,attendance_threshold=75):
-
-    stats = student_summary(df)
+def partitioned_student_summary(df, max_workers=None):
+    """
+    student_summary computed over partitions of df hashed on reg_no, so every
+    student's rows are summarised whole by one worker.
+    """
+    parts = map_partitions(_student_summary, df, 'reg_no', max_workers or groupby_workers())
+    return pd.concat(parts).sort_values('reg_no', kind='stable').reset_index(drop=True)
 
-    at_risk = stats[(stats['avg_marks'] < PASS_MARK) | (stats['avg_attendance'] < attendance_threshold)]
-    return at_risk
+# The default RISK_RULES through the rule engine (see src/risk_rules.py): students whose
+# average marks are below the pass mark or average attendance below the threshold
+def at_risk_students(df,PASS_MARK,attendance_threshold=75):
+    if isinstance(df, SqlDataset):
+        return sql_backend.at_risk_students(df, PASS_MARK, attendance_threshold)
+    return flagged_students(df, RISK_RULES, PASS_MARK, attendance_threshold)
 
 def rank_students(df):
+    if isinstance(df, SqlDataset):
+        return sql_backend.rank_students(df)
     summary = student_summary(df)
     total_subjects = df['subject'].nunique()
 
     subject_counts = (
         df.dropna(subset=['marks'])
-        .groupby('reg_no')['subject']
+        .groupby('reg_no', observed=True)['subject']
         .nunique()
     )
 
@@ -51,6 +128,38 @@ def rank_students(df):
     return summary.sort_values('rank')
 
 
+SCORE_BANDS = [0, 40, 60, 75, 90, 100]
+SCORE_BAND_LABELS = ["0–40", "41–60", "61–75", "76–90", "91–100"]
+
+def score_band_counts(df):
+    """
+    Students per fixed percentage band (rows, highest last) and subject
+    (columns), the table behind subject_performance_heatmap.
+    """
+    df = df.dropna(subset=["marks_pct", "subject", "reg_no"])
+
+    # Fixed percentage-based bins — works regardless of per-subject max marks
+    score_band = pd.Categorical(
+        pd.cut(df["marks_pct"], bins=SCORE_BANDS, labels=SCORE_BAND_LABELS, include_lowest=True),
+        categories=SCORE_BAND_LABELS,
+        ordered=True
+    )
+
+    heatmap_df = (
+        df.assign(score_band=score_band)
+        .groupby(["score_band", "subject"], observed=True)["reg_no"]
+        .nunique()
+        .reset_index(name="student_count")
+    )
+
+    return (
+        heatmap_df
+        .pivot(index="score_band", columns="subject", values="student_count")
+        .reindex(SCORE_BAND_LABELS)          # enforce correct row order
+        .fillna(0)
+        .astype(int)
+    )
+
 def student_subject_analysis(df, reg_no):
     
     student_df = df[df['reg_no'] == reg_no]
@@ -58,16 +167,17 @@ def student_subject_analysis(df, reg_no):
     if student_df.empty:
         raise ValueError(f"No data found for reg_no: {reg_no}")
     
-    student_perf = student_df[['subject', 'marks', 'marks_pct']].sort_values('subject').reset_index(drop=True)
+    # one row per subject, averaged over terms as in the "All Terms" view
+    student_perf = build_cross_term_pivot(student_df).reset_index()[['subject', 'marks', 'marks_pct']]
     
     return student_perf
 
 def student_strengths_weaknesses(df, reg_no, marks_range=100):
     # marks_range kept for backwards compatibility but ignored — thresholds are pct-based
     perf = student_subject_analysis(df, reg_no)
-    strengths = perf[perf['marks_pct'] >= 75]['subject'].tolist()
-    weaknesses = perf[perf['marks_pct'] < 40]['subject'].tolist()
-    average = perf[(perf['marks_pct'] >= 40) & (perf['marks_pct'] < 75)]['subject'].tolist()
+    strengths = perf[perf['marks_pct'] >= STRENGTH_THRESHOLD]['subject'].tolist()
+    weaknesses = perf[perf['marks_pct'] < WEAKNESS_THRESHOLD]['subject'].tolist()
+    average = perf[(perf['marks_pct'] >= WEAKNESS_THRESHOLD) & (perf['marks_pct'] < STRENGTH_THRESHOLD)]['subject'].tolist()
     
     return {'strengths': strengths,'average': average,'weaknesses': weaknesses}
 
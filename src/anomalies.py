@@ -0,0 +1,138 @@
+import warnings
+import numpy as np
+import pandas as pd
+from src.schema import ANOMALY_Z_THRESHOLD, ANOMALY_MIN_GROUP, CLASS_SHIFT_THRESHOLD
+
+ANOMALY_KEYS = ["class", "term", "subject"]
+OUTLIER_COLUMNS = ["reg_no", "student_name", "class", "term", "subject", "marks", "group_median", "robust_z"]
+SHIFT_COLUMNS = ["term", "subject", "class", "students", "class_median", "others_median", "shift"]
+
+MAD_SCALE = 0.6745  # z = 0.6745 (x - median) / MAD is a standard z-score for normal data
+MEAN_AD_SCALE = 1.253314  # the mean absolute deviation stands in when over half a group shares one mark (MAD = 0)
+SIGMA_PER_MAD = 1.4826
+
+# One integer id per group of `keys`, so the grouped transforms below hash the
+# string keys once instead of once per transform
+def _group_ids(df, keys):
+    return df.groupby(keys, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+
+def robust_scores(df, keys=ANOMALY_KEYS):
+    """
+    Group id, mark count, median, MAD and robust z-score of each row's mark
+    within its group of `keys` (those present in df), as a DataFrame aligned
+    with df. All are computed with grouped transforms; groups with fewer
+    than ANOMALY_MIN_GROUP marks, or no spread at all, get no z-score.
+    """
+    keys = [k for k in keys if k in df.columns]
+    values = pd.Series(df["marks"].to_numpy(dtype="float64", na_value=np.nan))
+    ids = _group_ids(df, keys)
+    grouped = values.groupby(ids)
+    median = grouped.transform("median")
+    deviation = (values - median).abs().groupby(ids)
+    mad = deviation.transform("median").to_numpy()
+    mean_ad = deviation.transform("mean").to_numpy()
+    count = grouped.transform("count").to_numpy()
+
+    centred = (values - median).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(mad > 0, MAD_SCALE * centred / mad, centred / (MEAN_AD_SCALE * mean_ad))
+    z[(count < ANOMALY_MIN_GROUP) | ~np.isfinite(z)] = np.nan
+    return pd.DataFrame({
+        "group": ids, "count": count, "group_median": median.to_numpy(), "mad": mad, "robust_z": z
+    }, index=df.index)
+
+def flag_outliers(df, scores=None):
+    """
+    Rows whose mark lies more than ANOMALY_Z_THRESHOLD robust z-scores from
+    the median of its (class, term, subject) group, e.g. a 9 keyed in for a
+    90, most extreme first.
+    """
+    scores = robust_scores(df) if scores is None else scores
+    flagged = np.abs(scores["robust_z"].to_numpy()) > ANOMALY_Z_THRESHOLD
+    columns = [c for c in OUTLIER_COLUMNS if c in df.columns and c not in scores.columns]
+    outliers = df.loc[flagged, columns].join(scores.loc[flagged, ["group_median", "robust_z"]])
+    order = np.argsort(-np.abs(outliers["robust_z"].to_numpy()), kind="stable")
+    return outliers.iloc[order].reset_index(drop=True)
+
+# Median of each row of `matrix` without the cell itself, for every cell, NaNs
+# ignored. Each row is sorted once: leaving out the value at sorted position r
+# shifts the positions from r on down by one, so the middle of the remaining
+# values is read off the sorted row. Memory stays at the size of the matrix.
+def _leave_one_out_medians(matrix):
+    n_classes = matrix.shape[1]
+    order = np.argsort(matrix, axis=1)  # NaNs sort last
+    ordered = np.take_along_axis(matrix, order, axis=1)
+    valid = ~np.isnan(matrix)
+    # position of each cell in its sorted row; missing cells leave nothing out
+    removed = np.where(valid, np.argsort(order, axis=1), n_classes)
+    remaining = valid.sum(axis=1, keepdims=True) - valid
+
+    def middle(position):
+        position = position + (position >= removed)
+        return np.take_along_axis(ordered, np.clip(position, 0, n_classes - 1), axis=1)
+
+    medians = (middle((remaining - 1) // 2) + middle(remaining // 2)) / 2
+    medians[remaining == 0] = np.nan
+    return medians
+
+def class_shifts(df, scores=None):
+    """
+    Classes whose median mark in a (term, subject) sits more than
+    CLASS_SHIFT_THRESHOLD robust standard deviations from the median of the
+    other sections' medians, e.g. a whole class entered against the wrong
+    subject. The spread is the median of the sections' MADs. With only two
+    sections both are reported, since either may be the odd one out.
+
+    Class medians are laid out as a (term, subject) x class matrix, and the
+    median of the other sections is taken for every cell at once from the
+    sorted rows (see _leave_one_out_medians).
+    """
+    if "class" not in df.columns:
+        return pd.DataFrame(columns=SHIFT_COLUMNS)
+    scores = robust_scores(df) if scores is None else scores
+    # one row per (class, term, subject) group, read off its first row
+    first = ~pd.Series(scores["group"].to_numpy()).duplicated().to_numpy()
+    stats = (
+        df.loc[first, ["term", "subject", "class"]]
+        .assign(
+            class_median=scores.loc[first, "group_median"],
+            mad=scores.loc[first, "mad"],
+            students=scores.loc[first, "count"]
+        )
+        .set_index(["term", "subject", "class"])
+    )
+    stats = stats[stats["students"] >= ANOMALY_MIN_GROUP]
+    if stats.empty:
+        return pd.DataFrame(columns=SHIFT_COLUMNS)
+
+    medians = stats["class_median"].unstack("class")
+    matrix = medians.to_numpy(dtype="float64", na_value=np.nan)
+    sigma = SIGMA_PER_MAD * stats["mad"].unstack("class").reindex_like(medians).to_numpy(dtype="float64", na_value=np.nan)
+    n_rows, n_classes = matrix.shape
+    others_median = _leave_one_out_medians(matrix)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        spread = np.nanmedian(sigma, axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = (matrix - others_median) / spread
+
+    result = medians.index.repeat(n_classes).to_frame(index=False).assign(
+        **{"class": np.tile(medians.columns.to_numpy(), n_rows)},
+        class_median=matrix.ravel(),
+        others_median=others_median.ravel(),
+        shift=shift.ravel()
+    )
+    result = result[np.abs(result["shift"].to_numpy()) > CLASS_SHIFT_THRESHOLD]
+    result = result.join(stats["students"], on=["term", "subject", "class"])
+    return result[SHIFT_COLUMNS].sort_values("shift", key=np.abs, ascending=False, ignore_index=True)
+
+def detect_anomalies(df):
+    """
+    Likely data-entry errors in the cleaned long-format marks: single marks
+    far from their group ("outliers", see flag_outliers) and whole classes
+    out of line with the other sections ("class_shifts", see class_shifts).
+    """
+    if df.empty or "marks" not in df.columns:
+        return {"outliers": pd.DataFrame(columns=OUTLIER_COLUMNS), "class_shifts": pd.DataFrame(columns=SHIFT_COLUMNS)}
+    scores = robust_scores(df)
+    return {"outliers": flag_outliers(df, scores), "class_shifts": class_shifts(df, scores)}
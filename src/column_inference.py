@@ -0,0 +1,100 @@
+import re
+import numpy as np
+from src.schema import ID_COLUMNS, INFERENCE_SAMPLE_ROWS, MARK_VALUE_SHARE
+
+KIND_MARK = "mark"
+KIND_PERCENTAGE = "percentage"
+KIND_ID = "id"
+KIND_TEXT = "text"
+
+# A number optionally followed by one unit word or a percent sign: "78", "78.5", "78 marks", "85%"
+_NUMERIC_VALUE = r"\s*\d+(?:\.\d+)?\s*(?:[A-Za-z]+|%)?\s*"
+_CODE_VALUE = r"[A-Za-z0-9/_.-]*\d[A-Za-z0-9/_.-]*"
+_DATE_VALUE = r"\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}(?:[ T][\d:.]+)?\s*"
+_PERCENT_HEADER = re.compile(r"%|\bpercent(?:age)?\b|\bpct\b")
+
+MIN_ID_SAMPLE = 50  # fewer values than this can be all-distinct by chance
+ID_UNIQUE_SHARE = 0.95
+
+# Non-null values of `values` from the sampled rows, or from the start of the column
+# when the sample holds none (sparse electives are blank for most students)
+def _sample_values(values, rows):
+    sample = values.iloc[rows].dropna()
+    if sample.empty:
+        sample = values.dropna().iloc[:len(rows)]
+    return sample.astype(str).str.strip()
+
+def _classify(name, sample):
+    if sample.empty:
+        return KIND_MARK, 0.0
+    numeric = sample.str.fullmatch(_NUMERIC_VALUE)
+    numeric_share = float(numeric.mean())
+    unique_share = sample.nunique() / len(sample)
+
+    if numeric_share >= MARK_VALUE_SHARE:
+        numbers = sample[numeric]
+        if _PERCENT_HEADER.search(name) or numbers.str.endswith("%").mean() >= 0.5:
+            return KIND_PERCENTAGE, numeric_share
+        is_integer = numbers.str.fullmatch(r"\s*\d+(?:\.0+)?\s*").all()
+        if is_integer and len(sample) >= MIN_ID_SAMPLE and unique_share >= ID_UNIQUE_SHARE:
+            return KIND_ID, numeric_share
+        # marks are not written with leading zeros; zero-padded numbers are codes
+        if is_integer and numbers.str.fullmatch(r"\s*0\d+\s*").any():
+            return KIND_ID, numeric_share
+        return KIND_MARK, numeric_share
+
+    # dates are free text as far as marks are concerned, even though they are distinct
+    if sample.str.fullmatch(_DATE_VALUE).mean() >= MARK_VALUE_SHARE:
+        return KIND_TEXT, numeric_share
+    codes = sample.str.fullmatch(_CODE_VALUE).mean()
+    if codes >= MARK_VALUE_SHARE and unique_share >= ID_UNIQUE_SHARE and len(sample) >= MIN_ID_SAMPLE:
+        return KIND_ID, numeric_share
+    return KIND_TEXT, numeric_share
+
+def infer_column_kinds(df, sample_rows=INFERENCE_SAMPLE_ROWS, seed=0):
+    """
+    Classifies every non-ID column of a normalised wide table as a numeric
+    mark, a percentage, an extra identifier or free text, from a random
+    sample of at most `sample_rows` rows.
+
+    Returns one record per column with its kind, the number of values
+    sampled and the share of them that parsed as numbers.
+    """
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(df), size=min(sample_rows, len(df)), replace=False))
+    decisions = []
+    for col in df.columns:
+        if col in ID_COLUMNS:
+            continue
+        sample = _sample_values(df[col], rows)
+        kind, numeric_share = _classify(str(col), sample)
+        decisions.append({"column": col, "kind": kind, "sampled": len(sample), "numeric_share": round(numeric_share, 3)})
+    return decisions
+
+def infer_subject_columns(df, sample_rows=INFERENCE_SAMPLE_ROWS):
+    """
+    Picks the subject columns of a normalised wide table: columns inferred
+    as marks. Percentage columns are usually derived totals and are left out,
+    unless no column holds plain marks, in which case the percentages are the
+    subject scores. Returns (subject_columns, decisions), where each decision
+    records whether its column was included.
+    """
+    decisions = infer_column_kinds(df, sample_rows)
+    kinds = {d["column"]: d["kind"] for d in decisions}
+    keep = {KIND_MARK} if KIND_MARK in kinds.values() else {KIND_MARK, KIND_PERCENTAGE}
+    for decision in decisions:
+        decision["included"] = decision["kind"] in keep
+    return [col for col, kind in kinds.items() if kind in keep], decisions
+
+def merge_decisions(decision_lists):
+    """
+    Combines the decisions made for several sources (sheets or files) into
+    one record per column; a column counts as included if any source kept it.
+    """
+    merged = {}
+    for decisions in decision_lists:
+        for decision in decisions:
+            current = merged.get(decision["column"])
+            if current is None or (decision["included"] and not current["included"]):
+                merged[decision["column"]] = dict(decision)
+    return list(merged.values())
@@ -0,0 +1,147 @@
+import json
+import os
+import pickle
+import shutil
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+EXTRA_FILE = "extra.pkl"
+INDEX_COLUMN = "__index__"
+
+# Numeric columns are stored as raw arrays; string-like columns (and categoricals of
+# strings) as integer codes plus a dictionary. Anything else (dates, mixed objects) is pickled.
+def _column_kind(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return "codes" if pd.api.types.is_string_dtype(values.cat.categories) else None
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_complex_dtype(values):
+        return None
+    if pd.api.types.is_numeric_dtype(values):
+        return "numeric"
+    if pd.api.types.is_string_dtype(values):
+        return "codes"
+    return None
+
+# The narrowest integer type pandas keeps the codes of `categories` values in, so a
+# Categorical built over the stored codes uses them as they are rather than a converted copy
+def _codes_dtype(categories):
+    for dtype in ("int8", "int16", "int32"):
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return "int64"
+
+def supports_columnar(df):
+    return (
+        isinstance(df, pd.DataFrame)
+        and df.columns.is_unique
+        and all(isinstance(c, str) for c in df.columns)
+        and all(_column_kind(df[c]) is not None for c in df.columns)
+    )
+
+def write_frame(df, directory):
+    """
+    Writes `df` as one .npy file per column under `directory`.
+
+    Numeric columns keep their values (nullable types as float64 with NaN);
+    ID and other string columns are factorised into integer codes (-1 =
+    missing) with the sorted code-to-value dictionary in a JSON file
+    alongside.
+    """
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    frame = df if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1 \
+        else df.assign(**{INDEX_COLUMN: df.index.to_numpy()})
+
+    for position, name in enumerate(frame.columns):
+        values = frame[name]
+        kind = _column_kind(values)
+        if kind == "numeric":
+            if isinstance(values.dtype, np.dtype):
+                array = values.to_numpy()
+            else:
+                array = values.to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+                values = uniques
+            else:
+                codes, uniques = pd.factorize(values, sort=True, use_na_sentinel=True)
+            array = codes.astype(_codes_dtype(len(uniques)))
+            with open(os.path.join(directory, f"{position}.json"), "w", encoding="utf-8") as f:
+                json.dump(pd.Index(uniques, dtype=object).tolist(), f)
+        np.save(os.path.join(directory, f"{position}.npy"), array, allow_pickle=False)
+        columns.append({"name": name, "kind": kind, "dtype": str(values.dtype)})
+
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"rows": len(frame), "columns": columns}, f)
+
+def open_frame(directory):
+    """
+    Opens a frame written by write_frame. Every column is memory-mapped
+    copy-on-write, so processes opening the same files share one physical
+    copy through the OS page cache until they modify a page. String and ID
+    columns come back as Categoricals over their mapped codes: only the
+    dictionary of distinct values is loaded into each process. Categories
+    are sorted, so sorting and groupby order match the original strings.
+    """
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    data = {}
+    for position, column in enumerate(meta["columns"]):
+        array = np.load(os.path.join(directory, f"{position}.npy"), mmap_mode="c", allow_pickle=False)
+        dtype = pd.api.types.pandas_dtype(column["dtype"])
+        if column["kind"] == "numeric":
+            if isinstance(dtype, np.dtype):
+                data[column["name"]] = array
+            elif dtype == "Float64":
+                data[column["name"]] = pd.arrays.FloatingArray(array, np.isnan(array), copy=False)
+            else:
+                data[column["name"]] = pd.array(array).astype(dtype)
+        else:
+            with open(os.path.join(directory, f"{position}.json"), encoding="utf-8") as f:
+                uniques = json.load(f)
+            categories = pd.Index(pd.array(uniques, dtype=dtype) if dtype != object else np.array(uniques, dtype=object))
+            data[column["name"]] = pd.Categorical.from_codes(array, categories=categories)
+
+    df = pd.DataFrame(data, copy=False)
+    if INDEX_COLUMN in df.columns:
+        df = df.set_index(INDEX_COLUMN)
+        df.index.name = None
+    return df
+
+def write_payload(payload, directory):
+    """
+    Writes a dataset store payload dict: each DataFrame value that can be
+    stored column-wise goes to its own sub-directory, everything else into
+    one pickle. The directory is written under a temporary name and renamed
+    into place, so readers never see a partial copy.
+    """
+    staging = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    frames = [name for name, value in payload.items() if supports_columnar(value)]
+    for name in frames:
+        write_frame(payload[name], os.path.join(staging, name))
+    with open(os.path.join(staging, EXTRA_FILE), "wb") as f:
+        pickle.dump(
+            ({name: value for name, value in payload.items() if name not in frames}, frames),
+            f, protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+    try:
+        os.rename(staging, directory)
+    except OSError:
+        # another process finished writing the same content first
+        shutil.rmtree(staging, ignore_errors=True)
+
+def read_payload(directory):
+    with open(os.path.join(directory, EXTRA_FILE), "rb") as f:
+        payload, frames = pickle.load(f)
+    for name in frames:
+        payload[name] = open_frame(os.path.join(directory, name))
+    return payload
+
+def has_payload(directory):
+    return os.path.isfile(os.path.join(directory, EXTRA_FILE))
@@ -0,0 +1,147 @@
+import math
+import numpy as np
+import pandas as pd
+from src.schema import COMPARISON_ALPHA
+
+MOMENT_KEYS = ["term", "class", "subject"]
+BETA_ITERATIONS = 200
+BETA_EPSILON = 3e-14
+_TINY = 1e-300
+
+_lgamma = np.vectorize(math.lgamma, otypes=["float64"])
+
+def class_moments(df, keys=MOMENT_KEYS):
+    """
+    Count, sum and sum of squares of marks_pct per group of `keys` (those
+    present in df). Moments add up across groups, so any coarser grouping,
+    such as per (class, subject) over all terms, is a plain sum of rows.
+    """
+    keys = [k for k in keys if k in df.columns]
+    data = df.loc[df["marks_pct"].notna(), keys]
+    values = df.loc[data.index, "marks_pct"].to_numpy(dtype="float64")
+    return (
+        data.assign(count=1, total=values, total_sq=values ** 2)
+        .groupby(keys, sort=True, observed=True)[["count", "total", "total_sq"]]
+        .sum()
+        .reset_index()
+    )
+
+# Continued fraction for the regularised incomplete beta function (modified
+# Lentz's method), evaluated for whole arrays at once
+def _beta_fraction(a, b, x):
+    qab, qap, qam = a + b, a + 1, a - 1
+    c = np.ones_like(x)
+    d = 1 - qab * x / qap
+    d = 1 / np.where(np.abs(d) < _TINY, _TINY, d)
+    h = d.copy()
+    for m in range(1, BETA_ITERATIONS + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                   -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1 + aa * d
+            d = 1 / np.where(np.abs(d) < _TINY, _TINY, d)
+            c = 1 + aa / c
+            c = np.where(np.abs(c) < _TINY, _TINY, c)
+            delta = d * c
+            h = h * delta
+        if np.all((np.abs(delta - 1) < BETA_EPSILON) | np.isnan(delta)):
+            break
+    return h
+
+def incomplete_beta(a, b, x):
+    """Regularised incomplete beta function I_x(a, b), elementwise over arrays."""
+    a, b, x = np.broadcast_arrays(*(np.asarray(v, dtype="float64") for v in (a, b, x)))
+    x = np.clip(x, 0, 1)
+    # the fraction converges quickly only below this point; use I_x(a, b) = 1 - I_(1-x)(b, a) above it
+    swap = x > (a + 1) / (a + b + 2)
+    a2, b2, x2 = np.where(swap, b, a), np.where(swap, a, b), np.where(swap, 1 - x, x)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        front = np.exp(_lgamma(a2 + b2) - _lgamma(a2) - _lgamma(b2) + a2 * np.log(x2) + b2 * np.log1p(-x2))
+        result = front * _beta_fraction(a2, b2, x2) / a2
+    result = np.where(x2 == 0, 0.0, result)
+    return np.where(swap, 1 - result, result)
+
+def welch_t_test(mean_a, var_a, n_a, mean_b, var_b, n_b):
+    """
+    Welch's unequal-variance t-test from group moments. Returns (t, degrees
+    of freedom, two-sided p-value) as arrays; NaN where a group has fewer
+    than two marks or both groups have no spread.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se_a, se_b = var_a / n_a, var_b / n_b
+        se2 = se_a + se_b
+        t = (mean_a - mean_b) / np.sqrt(se2)
+        dof = se2 ** 2 / (se_a ** 2 / (n_a - 1) + se_b ** 2 / (n_b - 1))
+    invalid = (n_a < 2) | (n_b < 2) | ~(se2 > 0)
+    t, dof = np.where(invalid, np.nan, t), np.where(invalid, np.nan, dof)
+    p = incomplete_beta(dof / 2, 0.5, dof / (dof + t ** 2))
+    return t, dof, np.where(invalid, np.nan, p)
+
+def benjamini_hochberg(p_values):
+    """False discovery rate adjusted p-values (q-values); NaN p-values stay NaN."""
+    p = np.asarray(p_values, dtype="float64")
+    q = np.full_like(p, np.nan)
+    valid = np.flatnonzero(~np.isnan(p))
+    if len(valid):
+        order = valid[np.argsort(p[valid], kind="stable")]
+        ranked = p[order] * len(valid) / np.arange(1, len(valid) + 1)
+        q[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1)
+    return q
+
+def class_comparison(moments, alpha=COMPARISON_ALPHA):
+    """
+    Compares every pair of classes in every subject from class_moments
+    output (rolled up over whatever other keys it has).
+
+    All pairs are evaluated together as (subject × pair) arrays. Returns one
+    row per subject and pair of classes that both have marks in it, with
+    the class means, their difference, Cohen's d (pooled standard deviation),
+    Welch's t-test and Benjamini-Hochberg q-values across all rows;
+    `significant` is q < alpha.
+    """
+    columns = ["subject", "class_a", "class_b", "n_a", "n_b", "mean_a", "mean_b", "mean_diff",
+               "effect_size", "t_stat", "dof", "p_value", "q_value", "significant"]
+    grouped = moments.groupby(["subject", "class"], sort=True, observed=True)[["count", "total", "total_sq"]].sum()
+    if grouped.empty:
+        return pd.DataFrame(columns=columns)
+
+    wide = grouped.unstack("class", fill_value=0)
+    subjects, classes = wide.index.to_numpy(), wide["count"].columns.to_numpy()
+    n = wide["count"].to_numpy(dtype="float64")
+    total = wide["total"].to_numpy(dtype="float64")
+    total_sq = wide["total_sq"].to_numpy(dtype="float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        var = np.clip((total_sq - total * mean) / (n - 1), 0, None)
+
+    a, b = np.triu_indices(len(classes), k=1)
+    n_a, n_b = n[:, a], n[:, b]
+    mean_a, mean_b = mean[:, a], mean[:, b]
+    var_a, var_b = var[:, a], var[:, b]
+
+    t, dof, p = welch_t_test(mean_a, var_a, n_a, mean_b, var_b, n_b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled_sd = np.sqrt(((n_a - 1) * var_a + (n_b - 1) * var_b) / (n_a + n_b - 2))
+        effect = np.where(pooled_sd > 0, (mean_a - mean_b) / pooled_sd, np.nan)
+
+    shape = n_a.shape
+    result = pd.DataFrame({
+        "subject": np.repeat(subjects, shape[1]),
+        "class_a": np.tile(classes[a], shape[0]),
+        "class_b": np.tile(classes[b], shape[0]),
+        "n_a": n_a.ravel().astype("int64"),
+        "n_b": n_b.ravel().astype("int64"),
+        "mean_a": mean_a.ravel(),
+        "mean_b": mean_b.ravel(),
+        "mean_diff": (mean_a - mean_b).ravel(),
+        "effect_size": effect.ravel(),
+        "t_stat": t.ravel(),
+        "dof": dof.ravel(),
+        "p_value": p.ravel(),
+    })
+    result = result[(result["n_a"] > 0) & (result["n_b"] > 0)].reset_index(drop=True)
+    result["q_value"] = benjamini_hochberg(result["p_value"].to_numpy())
+    result["significant"] = result["q_value"] < alpha
+    return result[columns]
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from src.schema import CORRELATION_MIN_STUDENTS
+
+CORRELATION_METHODS = ["pearson", "spearman"]
+
+def student_subject_matrix(df):
+    """
+    Pivots long data into a student × subject frame of average marks_pct
+    (averaged over terms where a subject repeats), NaN where a student has
+    no mark. Built with one bincount instead of a pivot_table.
+    """
+    data = df.loc[df["marks_pct"].notna() & df["reg_no"].notna() & df["subject"].notna(), ["reg_no", "subject", "marks_pct"]]
+    rows, students = pd.factorize(data["reg_no"], sort=True)
+    cols, subjects = pd.factorize(data["subject"], sort=True)
+    cells = rows.astype("int64") * len(subjects) + cols
+    size = len(students) * len(subjects)
+    totals = np.bincount(cells, weights=data["marks_pct"].to_numpy(dtype="float64"), minlength=size)
+    counts = np.bincount(cells, minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        matrix = np.where(counts > 0, totals / counts, np.nan).reshape(len(students), len(subjects))
+    return pd.DataFrame(matrix, index=pd.Index(students, name="reg_no"), columns=pd.Index(subjects, name="subject"))
+
+def pairwise_correlation(matrix, min_periods=CORRELATION_MIN_STUDENTS):
+    """
+    Pearson correlation between every pair of columns of a 2-D array with
+    NaNs, each pair over the rows where both columns have a value.
+
+    Every pairwise sum is one matrix product of the zero-filled values with
+    the presence mask, so no pair is visited in Python. Returns (correlation,
+    pair counts); pairs seen together in fewer than `min_periods` rows, or
+    without spread, are NaN.
+    """
+    present = ~np.isnan(matrix)
+    mask = present.astype("float64")
+    # centring on the column means keeps the sums of squares well conditioned
+    column_mean = np.where(present, matrix, 0.0).sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+    centred = np.where(present, matrix - column_mean, 0.0)
+
+    n = mask.T @ mask
+    sum_x = centred.T @ mask                 # [i, j]: sum of column i where j is present too
+    sum_xx = (centred ** 2).T @ mask
+    sum_xy = centred.T @ centred
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = var_x.T
+        corr = cov / np.sqrt(var_x * var_y)
+    valid = (n >= max(min_periods, 2)) & (var_x > 0) & (var_y > 0)
+    corr = np.clip(np.where(valid, corr, np.nan), -1, 1)
+    return corr, n.astype("int64")
+
+def subject_correlation(df, method="pearson", min_periods=CORRELATION_MIN_STUDENTS):
+    """
+    Subject × subject correlation of student average marks, as
+    (correlation frame, frame of students behind each pair).
+
+    Spearman correlation is the Pearson correlation of each subject's marks
+    ranked over all its students (ties averaged). With missing marks it can
+    differ slightly from re-ranking within every pair's overlap.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    matrix = student_subject_matrix(df)
+    values = matrix.rank(method="average").to_numpy() if method == "spearman" else matrix.to_numpy()
+    corr, counts = pairwise_correlation(values, min_periods)
+    subjects = matrix.columns
+    return pd.DataFrame(corr, index=subjects, columns=subjects), pd.DataFrame(counts, index=subjects, columns=subjects)
+
+def top_subject_pairs(corr, counts, n=10):
+    """The `n` subject pairs with the strongest correlation, positive or negative."""
+    upper = np.triu(np.ones(corr.shape, dtype=bool), k=1) & corr.notna().to_numpy()
+    a, b = np.nonzero(upper)
+    values = corr.to_numpy()[a, b]
+    pairs = pd.DataFrame({
+        "subject_a": corr.index[a],
+        "subject_b": corr.columns[b],
+        "correlation": values,
+        "students": counts.to_numpy()[a, b],
+    })
+    return pairs.iloc[np.argsort(-np.abs(values), kind="stable")[:n]].reset_index(drop=True)
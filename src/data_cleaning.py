@@ -1,5 +1,196 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from src.schema import ID_COLUMNS, COLUMN_ALIASES, MARKS_MIN, ATTENDANCE_MIN, ATTENDANCE_MAX
+from src.schema import (
+    ID_COLUMNS, TEXT_ID_COLUMNS, COLUMN_ALIASES, MARKS_MIN, ATTENDANCE_MIN, ATTENDANCE_MAX, EXCEL_BATCH_ROWS, INFERENCE_SAMPLE_ROWS
+)
+from src.column_inference import KIND_MARK, KIND_PERCENTAGE, infer_column_kinds, infer_subject_columns, merge_decisions
+from src.data_profile import long_layout, profile_marks, profile_attendance, merge_profiles
+from src.anomalies import detect_anomalies
+
+try:
+    import pyarrow  # noqa: F401  (multithreaded CSV parser)
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Pick dtypes and columns for a CSV or Excel sheet from its header alone: ID columns
+# (matched through the aliases) are read as text, every other named column as float.
+# Blank "Unnamed" columns, such as an exported index, are not read at all.
+def _column_schema(header):
+    canonical = normalize_columns(pd.DataFrame(columns=header)).columns
+    usecols, dtypes = [], {}
+    for raw, name in zip(header, canonical):
+        if not name or name.startswith("unnamed:"):
+            continue
+        usecols.append(raw)
+        dtypes[raw] = "str" if name in TEXT_ID_COLUMNS else "float64"
+    return usecols, dtypes
+
+# The header as pandas names it, the columns to read, and the ones read as text: the
+# ID aliases and, judged from the first rows read as text, every other column not
+# inferred to hold marks or percentages (see src/column_inference.py), such as an
+# unaliased admission number mapped in manual mode. Attendance and mark columns are
+# typed by the parser, so each comes back numeric or, when it holds text, as text
+def _csv_schema(csv_file):
+    sample = pd.read_csv(csv_file, nrows=INFERENCE_SAMPLE_ROWS, dtype=str)
+    csv_file.seek(0)
+    header = list(sample.columns)
+    usecols, dtypes = _column_schema(header)
+    return header, usecols, _text_columns(sample, usecols, dtypes)
+
+# The columns of `usecols` to read as text, given a sample of the table read as text:
+# the ID aliases, plus every column not inferred to hold marks or percentages
+def _text_columns(sample, usecols, dtypes):
+    if sample.empty:
+        return [col for col in usecols if dtypes[col] == "str"]
+    wide = normalize_columns(sample[usecols])
+    kinds = {d["column"]: d["kind"] for d in infer_column_kinds(wide, sample_rows=len(wide))}
+    return [
+        raw for raw, name in zip(usecols, wide.columns)
+        if dtypes[raw] == "str" or kinds.get(name, KIND_MARK) not in (KIND_MARK, KIND_PERCENTAGE)
+    ]
+
+def read_csv_fast(csv_file):
+    """
+    Reads a CSV in one pass, with the multithreaded pyarrow parser when it
+    is installed. Identifier and free-text columns are read as text (see
+    _csv_schema), so "00123" keeps its zeros. A mark column holding text
+    (e.g. "45abc" or "85%") is read as text while the clean ones come back
+    numeric, and clean_marks extracts the numbers. When that text first
+    appears after the block pyarrow typed the column from, the file is
+    re-read with the C parser.
+    """
+    header, usecols, text_columns = _csv_schema(csv_file)
+    if CSV_ENGINE != "pyarrow":
+        return _read_csv_c(csv_file, usecols, text_columns)
+
+    # pandas' pyarrow engine applies dtypes by casting after the parse, which would
+    # turn "00123" into 123 first, so the text columns are typed in the parser itself
+    from pyarrow import ArrowInvalid, csv, string
+    try:
+        table = csv.read_csv(
+            csv_file,
+            read_options=csv.ReadOptions(column_names=header, skip_rows=1),
+            convert_options=csv.ConvertOptions(
+                include_columns=usecols,
+                column_types=dict.fromkeys(text_columns, string()),
+                strings_can_be_null=True
+            )
+        )
+    except ArrowInvalid:
+        # pyarrow types the other columns from the first block, so a mark or attendance
+        # column that turns to text further down ("AB", "85%") fails the parse; the C
+        # parser reads such a column as text instead
+        csv_file.seek(0)
+        return _read_csv_c(csv_file, usecols, text_columns)
+    return table.to_pandas()
+
+def _read_csv_c(csv_file, usecols, text_columns):
+    return pd.read_csv(csv_file, engine="c", usecols=usecols, dtype=dict.fromkeys(text_columns, "str"))
+
+# Header cells as pandas names them: text, "Unnamed: i" when blank, ".1" suffixes on repeats
+def _sheet_header(cells):
+    header, seen = [], {}
+    for i, cell in enumerate(cells):
+        name = f"Unnamed: {i}" if cell is None else str(cell)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+def _cell_text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+# The header-only dtypes of a sheet refined from its first batch, as _csv_schema does for
+# a CSV: the first rows are read as text and every column not inferred to hold marks or
+# percentages becomes text too, so an unaliased admission number mapped in manual mode
+# stays 1001 rather than 1001.0
+def _sheet_dtypes(rows, header, usecols, dtypes):
+    sample_rows = rows[:INFERENCE_SAMPLE_ROWS]
+    sample = pd.DataFrame(
+        {name: [_cell_text(row[i]) for row in sample_rows] for i, name in enumerate(header) if name in dtypes},
+        dtype=object
+    )
+    text_columns = set(_text_columns(sample, usecols, dtypes))
+    return {name: "str" if name in text_columns else "float64" for name in usecols}
+
+# One batch of row tuples as a DataFrame of typed column buffers: text columns (see
+# _sheet_dtypes) as strings, the rest as float64 unless a cell holds text, which keeps that column as
+# objects for clean_marks to extract the numbers from
+def _typed_batch(rows, header, dtypes):
+    columns = list(zip(*rows)) if rows else [()] * len(header)
+    data = {}
+    for name, values in zip(header, columns):
+        if name not in dtypes:
+            continue
+        if dtypes[name] == "str":
+            # object, as the CSV path gives: pandas 2 turns None into "None" under dtype="str"
+            data[name] = np.array([_cell_text(value) for value in values], dtype=object)
+            continue
+        try:
+            data[name] = np.array(values, dtype="float64")
+        except (TypeError, ValueError):
+            data[name] = np.array(values, dtype=object)
+    return pd.DataFrame(data)
+
+def iter_excel_batches(excel_file, sheet_name=None, batch_rows=EXCEL_BATCH_ROWS):
+    """
+    Streams a sheet (the first one by default) as DataFrames of up to
+    `batch_rows` rows. openpyxl reads the workbook in read-only mode, so
+    cells are parsed as the rows are iterated instead of loading the sheet,
+    and each batch is converted to typed columns (see _sheet_dtypes) before
+    the next is read, so a consumer that keeps only its own result of each
+    batch (as cleaning does) holds one batch at a time. read_excel_streaming,
+    which the upload uses, collects them all. Blank rows are skipped, as
+    pandas does.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0] if sheet_name is None else workbook[sheet_name]
+        rows = sheet.iter_rows(values_only=True)
+        header_cells = next(rows, ())
+        # trailing blank header cells are not columns
+        while header_cells and header_cells[-1] is None:
+            header_cells = header_cells[:-1]
+        header = _sheet_header(header_cells)
+        usecols, dtypes = _column_schema(header)
+        width = len(header)
+
+        # column types are settled from the first batch and kept for the rest
+        batch, typed = [], None
+        for row in rows:
+            row = row[:width]
+            if all(value is None for value in row):
+                continue
+            batch.append(row + (None,) * (width - len(row)))
+            if len(batch) == batch_rows:
+                typed = typed or _sheet_dtypes(batch, header, usecols, dtypes)
+                yield _typed_batch(batch, header, typed)
+                batch = []
+        if batch:
+            typed = typed or _sheet_dtypes(batch, header, usecols, dtypes)
+            yield _typed_batch(batch, header, typed)
+    finally:
+        workbook.close()
+
+def read_excel_streaming(excel_file, sheet_name=None):
+    """A whole sheet read through iter_excel_batches, as one DataFrame."""
+    batches = list(iter_excel_batches(excel_file, sheet_name))
+    if not batches:
+        return pd.DataFrame()
+    return batches[0] if len(batches) == 1 else pd.concat(batches, ignore_index=True)
 
 def load_data(uploaded_file):
     if uploaded_file is None:
@@ -8,9 +199,9 @@ def load_data(uploaded_file):
     
     try:
         if file_name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
+            df = read_csv_fast(uploaded_file)
         elif file_name.endswith(".xlsx"):
-            df = pd.read_excel(uploaded_file)
+            df = read_excel_streaming(uploaded_file)
         else:
             raise ValueError("Unsupported file format. Please upload a CSV or Excel file.") 
     except Exception as e:
@@ -23,6 +214,15 @@ def load_data(uploaded_file):
     
     return df
 
+# Inject `source` as the term when the table has no term column of its own
+# (checked against the known aliases after lowercasing headers)
+def _add_source_term(df, source):
+    normalized_cols = [str(c).lower().strip() for c in df.columns]
+    term_aliases = ["term", "exam", "semester", "assessment"]
+    if not any(col in term_aliases for col in normalized_cols):
+        df['term'] = source
+    return df
+
 def load_excel_sheets(uploaded_file, sheet_names):
     """
     Reads multiple sheets from an Excel file.
@@ -33,28 +233,88 @@ def load_excel_sheets(uploaded_file, sheet_names):
     result = []
     for sheet in sheet_names:
         try:
-            df = pd.read_excel(uploaded_file, sheet_name=sheet)
+            uploaded_file.seek(0)
+            df = read_excel_streaming(uploaded_file, sheet)
         except Exception as e:
             raise ValueError(f"Failed to read sheet '{sheet}': {e}")
         
         if df.empty:
             continue
         
-        # check for term column using known aliases
-        normalized_cols = [c.lower().strip() for c in df.columns]
-        term_aliases = ["term", "exam", "semester", "assessment"]
-        has_term = any(col in term_aliases for col in normalized_cols)
-        
-        if not has_term:
-            df['term'] = sheet
-        
-        result.append((sheet, df))
+        result.append((sheet, _add_source_term(df, sheet)))
     
     if not result:
         raise ValueError("No valid data found in the selected sheets.")
     
     return result
 
+class ExcelSheetStream:
+    """
+    One sheet of an uploaded workbook as a source for clean_data that is
+    never loaded whole: iterating it streams typed batches (see
+    iter_excel_batches) with the sheet name injected as the term, as
+    load_excel_sheets does. Each pass opens its own copy of the bytes, so
+    several sheets can be cleaned concurrently.
+
+    Only the raw reg_no column is kept from a pass, so dropped_rows can tell
+    whether any rows were lost in cleaning and re-read the sheet just then.
+    """
+
+    def __init__(self, file_bytes, sheet_name, batch_rows=EXCEL_BATCH_ROWS):
+        self.file_bytes = file_bytes
+        self.sheet_name = sheet_name
+        self.batch_rows = batch_rows
+        self.reg_nos = []
+
+    def _batches(self):
+        for batch in iter_excel_batches(io.BytesIO(self.file_bytes), self.sheet_name, self.batch_rows):
+            yield _add_source_term(batch, self.sheet_name)
+
+    def __iter__(self):
+        self.reg_nos = []
+        for batch in self._batches():
+            self.reg_nos.append(_raw_reg_no(batch))
+            yield batch
+
+    def dropped_rows(self, cleaned_df):
+        """Rows of the sheet that did not survive cleaning, as find_dropped_rows reports them."""
+        kept_reg_nos = set(cleaned_df["reg_no"].dropna().unique())
+        if not any((~reg_no.isin(kept_reg_nos) | reg_no.isna()).any() for reg_no in self.reg_nos):
+            return pd.DataFrame()
+        dropped = []
+        for batch in self._batches():
+            reg_no = _raw_reg_no(batch)
+            dropped.append(batch.loc[~reg_no.isin(kept_reg_nos) | reg_no.isna()])
+        return pd.concat(dropped, ignore_index=True)
+
+# The raw column that normalizes to reg_no (all missing when there is none)
+def _raw_reg_no(df):
+    canonical = list(normalize_columns(df.iloc[:0]).columns)
+    if "reg_no" not in canonical:
+        return pd.Series(pd.NA, index=df.index, dtype="object")
+    return df.iloc[:, canonical.index("reg_no")]
+
+def load_files(uploaded_files, max_workers=None):
+    """
+    Reads several uploaded files concurrently, e.g. one per semester.
+    Returns a list of (source_name, DataFrame) tuples in upload order, where
+    source_name is the file name without its extension. If a file has no
+    term column, its source name is injected as the term, as for sheets.
+    """
+    if not uploaded_files:
+        raise ValueError("No file uploaded.")
+
+    def _load(uploaded_file):
+        source = os.path.splitext(uploaded_file.name)[0]
+        try:
+            df = load_data(uploaded_file)
+        except ValueError as e:
+            raise ValueError(f"{uploaded_file.name}: {e}")
+        return source, _add_source_term(df, source)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(uploaded_files)) as pool:
+        return list(pool.map(_load, uploaded_files))
+
 # Normalize column names and rename to canonical names when mode is auto
 def normalize_columns(df):
     df = df.copy()
@@ -96,35 +356,59 @@ def reshape_wide_to_long(df, subject_columns):
     
     return long_df
 
+# Numbers extracted from a text column ("78", "78 marks", "85%"), parsed once per distinct
+# value, and a mask of the values that were present but not plain numbers (for the profile)
+def _parse_text_numbers(values):
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    numbers = uniques.astype(str).str.extract(r'(\d+\.?\d*)', expand=False).astype('float64').to_numpy()
+    not_number = pd.to_numeric(uniques, errors='coerce').isna().to_numpy()
+    # missing values have code -1, which picks the trailing NaN / False
+    return np.append(numbers, np.nan)[codes], np.append(not_number, False)[codes]
+
 # Clean marks column to ensrure numeric values only and count the chnages
-def clean_marks(df, marks_range):
+def clean_marks(df, marks_range, layout=None):
     df = df.copy()
     
-    before_count = df['marks'].notna().sum()
-    df['marks'] = df['marks'].astype(str).str.extract(r'(\d+\.?\d*)', expand = False).astype('Float64')
+    raw = df['marks']
+    before_count = raw.notna().sum()
+    if pd.api.types.is_numeric_dtype(raw):
+        # already parsed as numbers, nothing to extract
+        df['marks'] = raw.astype('Float64')
+        non_numeric = np.zeros(len(raw), dtype=bool)
+    else:
+        numbers, non_numeric = _parse_text_numbers(raw)
+        df['marks'] = pd.array(numbers, dtype='Float64')
+    profile = profile_marks(df, raw, df['marks'], non_numeric, marks_range, layout)
     df.loc[~df['marks'].between(MARKS_MIN, marks_range),'marks'] = pd.NA
     after_count = df['marks'].notna().sum()
     
-    result = {'marks_before': before_count, 'marks_after': after_count, 'invalid_marks': before_count - after_count}
+    result = {'marks_before': before_count, 'marks_after': after_count, 'invalid_marks': before_count - after_count, 'marks_profile': profile}
     
     return df, result
 
 # Clean attendance column to ensure numeric values only and count the changes
-def clean_attendance(df):
+def clean_attendance(df, layout=None):
     df = df.copy()
     
-    before_count = df['attendance'].notna().sum()
+    raw = df['attendance']
+    before_count = raw.notna().sum()
     
-    att = df['attendance']
-    att = att.apply(lambda x: x if pd.isna(x) else str(x))
-    att = att.str.extract(r"(\d+\.?\d*)", expand=False).astype('float')
+    if pd.api.types.is_numeric_dtype(raw):
+        att = raw.astype('float')
+        non_numeric = np.zeros(len(raw), dtype=bool)
+    else:
+        numbers, non_numeric = _parse_text_numbers(raw)
+        att = pd.Series(numbers, index=df.index)
     mask = att.between(0, 1, inclusive="neither")
     att.loc[mask] = att.loc[mask] * 100
     df['attendance'] = att
-    df.loc[~df['attendance'].between(ATTENDANCE_MIN, ATTENDANCE_MAX),'attendance'] = pd.NA
+    in_range = df['attendance'].between(ATTENDANCE_MIN, ATTENDANCE_MAX)
+    profile = profile_attendance(df, raw, att, non_numeric, in_range, layout)
+    df.loc[~in_range,'attendance'] = pd.NA
     after_count = df['attendance'].notna().sum()
     
-    result = {'attendance_before': before_count, 'attendance_after': after_count, 'invalid_attendance': before_count - after_count}
+    result = {'attendance_before': before_count, 'attendance_after': after_count, 'invalid_attendance': before_count - after_count, 'attendance_profile': profile}
     
     return df, result
 
@@ -136,7 +420,7 @@ def clean_attendance(df):
 def drop_invalid_rows(df):
     df = df.copy()
     
-    conflict_check = df.groupby('reg_no')['student_name'].nunique()
+    conflict_check = df.groupby('reg_no', observed=True)['student_name'].nunique()
     conflicts = conflict_check[conflict_check > 1].index.tolist()
     if conflicts:
         raise ValueError(
@@ -163,54 +447,93 @@ def drop_invalid_rows(df):
     
     return df, result
 
-# Main function deciding mode and applying data cleaning steps in order
-def clean_data(df, mode = "auto", manual_mapping = None, subject_columns = None, marks_range=None, extra_dfs=None, source_name="Unknown"):
+# Map, reshape and clean a single source table (the upload, a sheet or a file)
+# In auto mode only columns inferred to hold marks are melted; remarks, dates and
+# other non-mark columns are left out and listed in the column decisions
+# A source may also be an iterable of batches (e.g. an ExcelSheetStream): each batch is
+# cleaned as it arrives and only the long result is kept, with the subject columns
+# inferred from the first batch
+def _clean_source(df, mode, manual_mapping, subject_columns, marks_range, source_name):
+    batches = [df] if isinstance(df, pd.DataFrame) else df
+    decisions = []
+    long_parts, reports = [], []
+    for batch in batches:
+        if mode == "auto":
+            batch = normalize_columns(batch)
+            if not long_parts:
+                subject_columns, decisions = infer_subject_columns(batch)
+        else:
+            batch = apply_manual_column_mapping(batch, manual_mapping)
+        
+        if 'term' not in batch.columns:
+            batch['term'] = source_name
+        
+        # the profiles count groups off the wide batch rather than the long columns
+        layout = long_layout(batch, subject_columns)
+        batch = reshape_wide_to_long(batch, subject_columns)
+        batch, marks_report = clean_marks(batch, marks_range, layout)
+        batch, attendance_report = clean_attendance(batch, layout)
+        long_parts.append(batch)
+        reports.append({**marks_report, **attendance_report})
     
-    df = df.copy()
+    if not long_parts:
+        return pd.DataFrame(), {}, decisions
+    df = long_parts[0] if len(long_parts) == 1 else pd.concat(long_parts, ignore_index=True)
+    return df, _merge_reports(reports), decisions
+
+# Add up the reports of several batches or sources; data-quality profiles are merged table by table
+def _merge_reports(reports):
+    reports = [report for report in reports if report]
+    merged = {}
+    for key in reports[0]:
+        values = [report[key] for report in reports]
+        merged[key] = merge_profiles(values) if key.endswith("_profile") else sum(values)
+    return merged
+
+# Main function deciding mode and applying data cleaning steps in order
+# Each source table (df plus extra_dfs, which may be streamed batches) is cleaned concurrently and merged before validation, so several
+# semester files take about as long as the largest one
+# checkpoint, if given, is called with a stage label between steps so a background job can report progress or cancel
+def clean_data(df, mode = "auto", manual_mapping = None, subject_columns = None, marks_range=None, extra_dfs=None, source_name="Unknown", checkpoint=None, max_workers=None):
     
-    report = {}
+    if checkpoint is None:
+        checkpoint = lambda stage: None
     
     #  Conditional processing based on mode with value eror handling
-    if mode == "auto":
-        df = normalize_columns(df)
-        subject_columns = detect_subject_columns(df)
-        
-    elif mode == "manual":
+    if mode == "manual":
         if manual_mapping is None or subject_columns is None:
             raise ValueError("Manual mode requires manual_mapping and subject_columns.")
-        df = apply_manual_column_mapping(df, manual_mapping)
-        
-    else:
+    elif mode != "auto":
         raise ValueError("Mode must be either 'auto' or 'manual'.")
     
-    if 'term' not in df.columns:
-        df['term'] = source_name
-    
-    df = reshape_wide_to_long(df, subject_columns)
-
-    if extra_dfs:
-        extra_long_dfs = []
-        for extra_df in extra_dfs:
-            extra = extra_df.copy()
-            if mode == "auto":
-                extra = normalize_columns(extra)
-                extra_subjects = detect_subject_columns(extra)
-            elif mode == "manual":
-                extra = apply_manual_column_mapping(extra, manual_mapping)
-                extra_subjects = subject_columns
-            if 'term' not in extra.columns:
-                extra['term'] = source_name
-            extra_long = reshape_wide_to_long(extra, extra_subjects)
-            extra_long_dfs.append(extra_long)
-        
-        df = pd.concat([df] + extra_long_dfs, ignore_index=True)
-
-    df, marks_report = clean_marks(df, marks_range)
-    report.update(marks_report)
-    df, attendance_report = clean_attendance(df)
-    report.update(attendance_report)
+    sources = [df] + list(extra_dfs or [])
+    clean_source = lambda source: _clean_source(source, mode, manual_mapping, subject_columns, marks_range, source_name)
+    
+    if len(sources) == 1:
+        checkpoint("Cleaning marks and attendance")
+        results = [clean_source(df)]
+    else:
+        checkpoint(f"Cleaning {len(sources)} sources")
+        with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as pool:
+            results = list(pool.map(clean_source, sources))
+    
+    checkpoint("Merging sources")
+    df = pd.concat([long_df for long_df, _, _ in results], ignore_index=True)
+    report = _merge_reports([source_report for _, source_report, _ in results])
+    report["column_decisions"] = merge_decisions([decisions for _, _, decisions in results])
+    
+    checkpoint("Validating rows")
     df, drop_report = drop_invalid_rows(df)
     report.update(drop_report)
+    # rows kept from each source, in order: validation keeps the merged order and index,
+    # so each source's rows are still one consecutive slice of df
+    source_ends = np.cumsum([len(long_df) for long_df, _, _ in results])
+    report["source_rows"] = np.bincount(
+        np.searchsorted(source_ends, df.index.to_numpy(), side="right"), minlength=len(results)
+    ).tolist()
+    
+    checkpoint("Checking marks for anomalies")
+    report["anomalies"] = detect_anomalies(df)
     
     return  df, report
 
@@ -236,4 +559,21 @@ def compute_percentage_column(df, max_marks_config):
         df['marks_pct'] = (df['marks'] / max_marks_config) * 100
 
     df['marks_pct'] = df['marks_pct'].clip(0, 100)
-    return df
\ No newline at end of file
+    return df
+
+def find_dropped_rows(raw_df, cleaned_df):
+    """
+    Identifies raw_df rows (wide format) that didn't survive cleaning by
+    comparing reg_no values in cleaned_df vs raw_df.
+    """
+    try:
+        # Normalize raw_df column names to find the reg_no column
+        norm_raw = normalize_columns(raw_df)
+        if "reg_no" in norm_raw.columns and "reg_no" in cleaned_df.columns:
+            kept_reg_nos = set(cleaned_df["reg_no"].dropna().unique())
+            raw_reg_no = norm_raw["reg_no"]
+            dropped_mask = ~raw_reg_no.isin(kept_reg_nos) | raw_reg_no.isna()
+            return raw_df.loc[dropped_mask].reset_index(drop=True)
+    except Exception:
+        pass
+    return pd.DataFrame()
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+from src.schema import MARKS_MIN, PROFILE_SAMPLE_VALUES
+
+# Counts are kept per (subject, class) for marks and per class for attendance. A
+# profile is a dict of tables indexed by their keys, so the profiles of several
+# batches or sources merge by adding up rows with the same keys.
+
+def _column(df, name):
+    if name in df.columns:
+        return df[name]
+    return pd.Series("—", index=df.index, name=name)
+
+def long_layout(wide, subject_columns):
+    """
+    How reshape_wide_to_long lays out the long table built from `wide`: melt
+    stacks one block of len(wide) rows per subject column, so a long row's
+    subject is its block and its class that of its wide row. The classes are
+    factorized over the wide rows only, and the profiles take their group
+    codes from here instead of factorizing the long columns.
+    """
+    class_codes, classes = pd.factorize(_column(wide, "class"), use_na_sentinel=False)
+    return {
+        "records": len(wide),
+        "subjects": pd.Index(subject_columns, name="subject"),
+        "class_codes": class_codes,
+        "classes": pd.Index(classes, name="class"),
+    }
+
+# Entries and flagged rows per group code, counted with bincount, as a table indexed
+# by the product of `levels` (the codes number its rows) without the empty groups
+def _count_table(codes, levels, flags):
+    size = int(np.prod([len(level) for level in levels]))
+    counts = {"entries": np.bincount(codes, minlength=size)}
+    for name, flag in flags.items():
+        counts[name] = np.bincount(codes[flag], minlength=size)
+    index = pd.MultiIndex.from_product(levels) if len(levels) > 1 else levels[0]
+    table = pd.DataFrame(counts, index=index)
+    return table[table["entries"] > 0]
+
+# Entries and flagged rows per combination of `keys`, factorized here; cheaper than
+# a groupby over string columns
+def _group_counts(keys, flags):
+    codes = np.zeros(len(keys[0]), dtype="int64")
+    levels = []
+    for key in keys:
+        key_codes, uniques = pd.factorize(key, use_na_sentinel=False)
+        codes = codes * len(uniques) + key_codes
+        levels.append(pd.Index(uniques, name=key.name))
+    return _count_table(codes, levels, flags)
+
+# The distinct offending values of each column, most frequent first
+def _samples(column, values):
+    if not len(values):
+        return pd.DataFrame(
+            {"count": pd.Series(dtype="int64")},
+            index=pd.MultiIndex.from_arrays([[], []], names=["column", "value"])
+        )
+    counts = pd.DataFrame({"column": column, "value": values.to_numpy()}).value_counts().reset_index()
+    # values that differ only in surrounding spaces count as one
+    counts["value"] = counts["value"].astype(str).str.strip()
+    return _top_samples(counts.groupby(["column", "value"], sort=False)[["count"]].sum())
+
+def _top_samples(samples):
+    return samples.sort_values("count", ascending=False, kind="stable").groupby(level="column", sort=False).head(PROFILE_SAMPLE_VALUES)
+
+def profile_marks(df, raw, marks, non_numeric, marks_range, layout=None):
+    """
+    Data-quality counts for the long-format marks, from the raw column, the
+    parsed marks before out-of-range values are cleared and the mask of raw
+    values that were not plain numbers: per (subject, class) the entries,
+    missing, non-numeric and out-of-range counts; sample non-numeric values
+    per subject; and how often each mark above `marks_range` occurs per
+    subject. With the `layout` of the table (see long_layout) the groups
+    are read off it instead of factorizing the subject and class columns.
+    """
+    missing = raw.isna().to_numpy()
+    values = marks.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        above_max = values > marks_range
+        out_of_range = above_max | (values < MARKS_MIN)
+    flags = {"missing": missing, "non_numeric": non_numeric, "out_of_range": out_of_range, "above_max": above_max}
+
+    subject = df["subject"]
+    if layout is None:
+        groups = _group_counts([subject, _column(df, "class")], flags)
+    else:
+        classes = layout["classes"]
+        codes = (
+            np.repeat(np.arange(len(layout["subjects"])) * len(classes), layout["records"])
+            + np.tile(layout["class_codes"], len(layout["subjects"]))
+        )
+        groups = _count_table(codes, [layout["subjects"], classes], flags)
+    return {
+        "groups": groups,
+        "samples": _samples(subject[non_numeric].to_numpy(), raw[non_numeric]),
+        "above_max": pd.DataFrame({"subject": subject[above_max].to_numpy(), "marks": values[above_max]})
+                       .value_counts().to_frame("count"),
+    }
+
+def profile_attendance(df, raw, attendance, non_numeric, in_range, layout=None):
+    """
+    Data-quality counts for the long-format attendance per class, from the
+    raw column, the parsed values, the mask of raw values that were not
+    plain numbers and the mask of values within range. Attendance repeats
+    on every subject row of a student's term, so it is counted once per
+    (reg_no, term): over the first block of rows when the `layout` is given
+    (see long_layout), otherwise over the first row of each pair.
+    """
+    keys = [col for col in ["reg_no", "term"] if col in df.columns]
+    if layout is None:
+        rows = ~df.duplicated(keys).to_numpy() if keys else np.ones(len(df), dtype=bool)
+    else:
+        rows = np.zeros(len(df), dtype=bool)
+        records = min(layout["records"], len(df))
+        rows[:records] = ~df.iloc[:records].duplicated(keys).to_numpy() if keys else True
+
+    raw = raw[rows]
+    non_numeric = non_numeric[rows]
+    missing = raw.isna().to_numpy()
+    out_of_range = attendance[rows].notna().to_numpy() & ~in_range[rows].to_numpy(dtype=bool, na_value=False)
+    flags = {"missing": missing, "non_numeric": non_numeric, "out_of_range": out_of_range}
+
+    if layout is None:
+        groups = _group_counts([_column(df, "class")[rows]], flags)
+    else:
+        groups = _count_table(layout["class_codes"][rows[:layout["records"]]], [layout["classes"]], flags)
+    return {
+        "groups": groups,
+        "samples": _samples(np.full(int(non_numeric.sum()), "attendance", dtype=object), raw[non_numeric]),
+    }
+
+def merge_profiles(profiles):
+    """Adds up the profiles of several batches or sources, table by table."""
+    profiles = [profile for profile in profiles if profile]
+    if len(profiles) < 2:
+        return profiles[0] if profiles else {}
+    merged = {}
+    for part, table in profiles[0].items():
+        tables = pd.concat([profile[part] for profile in profiles])
+        merged[part] = tables.groupby(level=list(range(tables.index.nlevels)), sort=False, dropna=False).sum()
+    merged["samples"] = _top_samples(merged["samples"])
+    return merged
+
+def quality_by(report, level):
+    """
+    Marks quality per "subject" or per "class" from a cleaning report, with
+    the missing share of each group; per class the attendance counts are
+    added as attendance_* columns. None if the report has no profile.
+    """
+    profile = report.get("marks_profile")
+    if not profile:
+        return None
+    table = profile["groups"].groupby(level=level, dropna=False).sum()
+    table.insert(2, "missing_rate", table["missing"] / table["entries"])
+    attendance = report.get("attendance_profile")
+    if level == "class" and attendance:
+        table = table.join(attendance["groups"].add_prefix("attendance_"), how="outer").fillna(0)
+    return table.reset_index()
+
+def offending_values(report):
+    """Non-numeric entries per column, with the most frequent ones as samples: (column, non_numeric, samples) rows."""
+    rows = []
+    for key, level in [("marks_profile", "subject"), ("attendance_profile", None)]:
+        profile = report.get(key)
+        if not profile:
+            continue
+        counts = profile["groups"]["non_numeric"]
+        counts = counts.groupby(level=level, sort=False).sum() if level else pd.Series({"attendance": counts.sum()})
+        samples = profile["samples"]["count"]
+        for column, count in counts[counts > 0].items():
+            values = samples.xs(column, level="column") if column in samples.index.get_level_values("column") else samples.iloc[:0]
+            rows.append({
+                "column": column, "non_numeric": int(count),
+                "samples": ", ".join(f"{value} ({n:,})" for value, n in values.items()),
+            })
+    return pd.DataFrame(rows, columns=["column", "non_numeric", "samples"])
+
+def above_max_distribution(report):
+    """How often each mark above the maximum occurs, per subject: (subject, marks, count) rows."""
+    profile = report.get("marks_profile")
+    if not profile or profile["above_max"].empty:
+        return pd.DataFrame(columns=["subject", "marks", "count"])
+    return profile["above_max"].reset_index().sort_values(["subject", "marks"], ignore_index=True)
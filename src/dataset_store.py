@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from src.schema import DATASET_STORE_BUDGET_MB, DATASET_STORE_DIR, DATASET_STORE_SHARED
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def content_key(*parts):
+    """
+    Hashes raw bytes and JSON-serialisable config into a stable dataset key.
+    Identical uploads with identical cleaning settings map to the same key.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def estimate_size(obj):
+    # a payload holding frames means pandas is already loaded; don't import it for bytes
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_size(v) for v in obj[:1000]) * max(1, len(obj) // 1000)
+    return sys.getsizeof(obj)
+
+class _Entry:
+    __slots__ = ("payload", "artifacts", "size", "holders", "path")
+
+    def __init__(self, payload, path):
+        self.payload = payload
+        self.artifacts = {}
+        self.size = estimate_size(payload) if payload is not None else 0
+        self.holders = set()
+        self.path = path
+
+class DatasetStore:
+    """
+    Process-wide, content-addressed store for uploaded and cleaned datasets.
+
+    Each entry is a dict payload (e.g. raw_df or long_df plus its report)
+    written to disk when first stored, with its data frames stored
+    column-wise (see src/columnar.py) so a reload memory-maps the numeric
+    columns instead of unpickling them. Sessions hold only the key and
+    register as holders; entries are reference-counted by holder. When the
+    in-memory total exceeds the budget, least recently used payloads are
+    dropped from memory and transparently reloaded from disk on next access.
+    Entries with no holders are removed entirely when evicted.
+
+    With `shared=True`, several server processes may point at the same
+    directory: copies written by one process are picked up by the others
+    (keys are content hashes) and share pages through the OS page cache,
+    and files are never deleted by a single process.
+
+    Derived tables (profiles, indexes, exports) live alongside each entry as
+    artifacts. They are built once per dataset, shared by every session and
+    simply discarded on eviction.
+    """
+
+    def __init__(self, budget_bytes, directory, holder_active=None, shared=False):
+        self.budget_bytes = budget_bytes
+        self.directory = directory
+        self.holder_active = holder_active
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        # copies left by a previous server process can never be referenced again
+        if os.path.isdir(directory) and not shared:
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif name.endswith(".pkl"):
+                    os.remove(path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def file_path(self, key, name):
+        """Path for a file derived from dataset `key`, kept in its directory and removed with it."""
+        return os.path.join(self._path(key), "files", name)
+
+    # In a shared directory, pick up a copy another process has written
+    def _adopt(self, key):
+        from src.columnar import has_payload
+        if key not in self._entries and self.shared and has_payload(self._path(key)):
+            self._entries[key] = _Entry(None, self._path(key))
+        return self._entries.get(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._adopt(key) is not None
+
+    def memory_usage(self):
+        with self._lock:
+            return sum(e.size for e in self._entries.values() if e.payload is not None)
+
+    def put(self, key, payload, holder=None):
+        """
+        Stores `payload` under `key` unless an entry already exists, in which
+        case the existing copy is kept and the new one discarded.
+        """
+        with self._lock:
+            entry = self._adopt(key)
+            if entry is None:
+                entry = _Entry(payload, self._path(key))
+                from src.columnar import write_payload
+                os.makedirs(self.directory, exist_ok=True)
+                write_payload(payload, entry.path)
+                self._entries[key] = entry
+            if holder is not None:
+                entry.holders.add(holder)
+            self._entries.move_to_end(key)
+            self._evict(keep=key)
+            return key
+
+    def get(self, key):
+        with self._lock:
+            entry = self._adopt(key)
+            if entry is None:
+                raise KeyError(f"Dataset {key} is not in the store.")
+            self._entries.move_to_end(key)
+            if entry.payload is None:
+                from src.columnar import read_payload
+                entry.payload = read_payload(entry.path)
+                entry.size = estimate_size(entry.payload)
+                self._evict(keep=key)
+            return entry.payload
+
+    def artifact(self, key, name, builder=None):
+        """
+        Returns the derived artifact `name` for dataset `key`, calling
+        builder(payload) to create it on first use. Without a builder,
+        returns None when the artifact has not been built yet.
+        """
+        with self._lock:
+            payload = self.get(key)
+            entry = self._entries[key]
+            if name in entry.artifacts or builder is None:
+                return entry.artifacts.get(name)
+
+        value = builder(payload)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return value
+            if entry.payload is None:
+                # evicted while building; keep the result for this caller only
+                return value
+            if name not in entry.artifacts:
+                entry.artifacts[name] = value
+                entry.size += estimate_size(value)
+                self._evict(keep=key)
+            return entry.artifacts[name]
+
+    def acquire(self, key, holder):
+        with self._lock:
+            entry = self._adopt(key)
+            if entry is not None:
+                entry.holders.add(holder)
+
+    def release(self, key, holder):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.holders.discard(holder)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        if not self.shared:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _prune_holders(self):
+        if self.holder_active is None:
+            return
+        for entry in self._entries.values():
+            entry.holders = {h for h in entry.holders if self.holder_active(h)}
+
+    # Drop least recently used payloads until the loaded total fits the budget
+    def _evict(self, keep=None):
+        if self.memory_usage() <= self.budget_bytes:
+            return
+        self._prune_holders()
+        for key in list(self._entries):
+            if self.memory_usage() <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            entry = self._entries[key]
+            if not entry.holders:
+                self._drop(key)
+            elif entry.payload is not None:
+                entry.payload = None
+                entry.artifacts = {}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store(holder_active=None):
+    """
+    Returns the process-wide store, creating it on first use. The memory
+    budget can be overridden with the LUME_STORE_BUDGET_MB environment variable,
+    the directory with LUME_STORE_DIR (relative to the repository root), and
+    LUME_STORE_SHARED=1 shares the store directory between server processes.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            budget_mb = float(os.environ.get("LUME_STORE_BUDGET_MB", DATASET_STORE_BUDGET_MB))
+            # a relative directory is taken from the repository root, not the working directory
+            directory = os.path.join(ROOT, os.environ.get("LUME_STORE_DIR", DATASET_STORE_DIR))
+            shared = os.environ.get("LUME_STORE_SHARED", str(int(DATASET_STORE_SHARED))).lower() in ("1", "true", "yes")
+            _store = DatasetStore(int(budget_mb * 1024 * 1024), directory, holder_active, shared)
+        return _store
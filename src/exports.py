@@ -0,0 +1,102 @@
+import importlib.util
+import os
+import threading
+from src.schema import EXPORT_CHUNK_ROWS
+
+EXPORT_LAYOUTS = {
+    "wide": "Wide — one row per student and term, one column per subject",
+    "long": "Long — one row per student, term and subject",
+}
+EXPORT_FORMATS = {
+    "csv": ("CSV", "text/csv"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+}
+XLSX_MAX_ROWS = 1_048_576  # Rows in one Excel sheet, header included
+
+WIDE_INDEX = ["reg_no", "student_name", "class", "term", "attendance"]
+
+def available_formats():
+    """Export formats usable here: Parquet needs pyarrow."""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or importlib.util.find_spec("pyarrow") is not None]
+
+def export_table(long_df, layout):
+    """The cleaned dataset in `layout`: the long table itself, or pivoted to one column per subject."""
+    if layout == "long":
+        return long_df
+    if layout != "wide":
+        raise ValueError(f"Unknown export layout: {layout}")
+    wide_df = long_df.pivot_table(
+        index=[col for col in WIDE_INDEX if col in long_df.columns],
+        columns="subject",
+        values="marks"
+    ).reset_index()
+    wide_df.columns.name = None
+    return wide_df
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def write_csv(df, f, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Writes `df` to the binary file `f` as CSV, `chunk_rows` rows at a time,
+    so only one chunk's text exists at once.
+    """
+    f.write(df.iloc[:0].to_csv(index=False).encode("utf-8"))
+    for chunk in _chunks(df, chunk_rows):
+        f.write(chunk.to_csv(index=False, header=False).encode("utf-8"))
+
+def write_xlsx(df, f, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Writes `df` to `f` as a single-sheet workbook with openpyxl in write-only
+    mode: rows stream to a temporary file instead of building cell objects
+    for the whole sheet, so memory stays flat as the table grows.
+    """
+    from openpyxl import Workbook
+
+    if len(df) + 1 > XLSX_MAX_ROWS:
+        raise ValueError(f"{len(df):,} rows do not fit in an Excel sheet; export as CSV or Parquet instead.")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Cleaned Data")
+    sheet.append([str(col) for col in df.columns])
+    for chunk in _chunks(df, chunk_rows):
+        # missing values become empty cells
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(f)
+
+def write_parquet(df, f, chunk_rows=EXPORT_CHUNK_ROWS):
+    df.to_parquet(f, index=False, row_group_size=chunk_rows)
+
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "parquet": write_parquet}
+
+def write_export(long_df, layout, fmt, path):
+    """
+    Writes the cleaned dataset in `layout` as a `fmt` file at `path` and
+    returns the path. An existing file is reused; a new one is written under
+    a temporary name and renamed, so a half-written file is never served.
+    """
+    if os.path.exists(path):
+        return path
+    if fmt not in available_formats():
+        raise ValueError(f"Export format '{fmt}' is not available.")
+    return write_file(path, lambda f: WRITERS[fmt](export_table(long_df, layout), f))
+
+def write_file(path, write):
+    """
+    Calls write(f) on a temporary binary file next to `path` and renames it
+    to `path` once written, so readers never see a half-written file.
+    Returns the path.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    staging = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(staging, "wb") as f:
+            write(f)
+        os.replace(staging, path)
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+    return path
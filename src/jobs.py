@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.schema import JOB_WORKERS
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    """
+    Handle for work submitted with submit_job. Sessions keep only the job id;
+    the handle itself lives in the process-wide registry so it survives
+    reruns and page navigation.
+    """
+
+    def __init__(self, job_id, label):
+        self.id = job_id
+        self.label = label
+        self.status = JOB_PENDING
+        self.stage = "Queued"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    def checkpoint(self, stage=None):
+        """
+        Called by the job between steps: records progress and raises
+        JobCancelled if cancellation was requested.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled()
+        if stage is not None:
+            self.stage = stage
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.submitted_at
+
+_executor = None
+_jobs = {}
+_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        workers = int(os.environ.get("LUME_JOB_WORKERS", JOB_WORKERS))
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lume-job")
+    return _executor
+
+def _run(job, fn, args, kwargs):
+    try:
+        job.checkpoint()
+        job.status = JOB_RUNNING
+        job.result = fn(job, *args, **kwargs)
+        job.status = JOB_DONE
+    except JobCancelled:
+        job.status = JOB_CANCELLED
+    except Exception as e:
+        job.error = str(e)
+        job.status = JOB_FAILED
+    finally:
+        job.finished_at = time.time()
+
+def submit_job(fn, *args, label="", **kwargs):
+    """
+    Runs fn(job, *args, **kwargs) on the background executor and returns the
+    job id. fn should call job.checkpoint(stage) between steps so it can
+    report progress and be cancelled.
+    """
+    job = Job(uuid.uuid4().hex, label)
+    with _lock:
+        _jobs[job.id] = job
+        job.future = _get_executor().submit(_run, job, fn, args, kwargs)
+    return job.id
+
+def get_job(job_id):
+    with _lock:
+        return _jobs.get(job_id)
+
+def cancel_job(job_id):
+    job = get_job(job_id)
+    if job is None or job.finished:
+        return
+    job._cancel.set()
+    if job.future.cancel():
+        job.status = JOB_CANCELLED
+        job.finished_at = time.time()
+
+def discard_job(job_id):
+    with _lock:
+        return _jobs.pop(job_id, None)
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from src.schema import GROUPBY_WORKERS, PARALLEL_GROUPBY_MIN_ROWS
+
+# Imported into the forkserver before it forks any worker, so workers start
+# with pandas already loaded
+WORKER_PRELOAD = ["pandas"]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def worker_count(max_workers=None):
+    return max_workers or os.cpu_count() or 1
+
+def process_pool():
+    """
+    Returns the process-wide worker pool, one worker per CPU, creating it
+    on first use. It is shared by every session and lives as long as the
+    server, so callers submit to it without shutting it down.
+
+    The server process runs many threads (script runs, background jobs),
+    and forking it could leave a worker stuck on a lock another thread
+    held. Workers are therefore forked from a forkserver, which preloads
+    WORKER_PRELOAD, or spawned where there is none.
+
+    A starting worker imports the parent's __main__, which is the page script
+    Streamlit is running, under the name __mp_main__. Every page keeps its
+    body under `if __name__ == "__main__":`, so workers only import it.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._broken:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(WORKER_PRELOAD)
+            else:
+                context = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=context)
+        return _pool
+
+def groupby_workers():
+    return worker_count(int(os.environ.get("LUME_GROUPBY_WORKERS", GROUPBY_WORKERS)))
+
+def use_partitions(df, min_rows=PARALLEL_GROUPBY_MIN_ROWS):
+    """Whether an aggregation over df is large enough to be worth partitioning."""
+    return isinstance(df, pd.DataFrame) and len(df) >= min_rows and groupby_workers() > 1
+
+def hash_partitions(values, partitions):
+    """Assigns each value a partition number; equal values always share a partition."""
+    return (pd.util.hash_pandas_object(values, index=False).to_numpy() % partitions).astype("int32")
+
+def map_partitions(fn, df, key, max_workers=None):
+    """
+    Hash-partitions the rows of df on the `key` column into `max_workers`
+    partitions and returns [fn(partition), ...], computed on the worker pool.
+
+    All rows sharing a key value land in the same partition, so fn sees every
+    row of a group. fn must be a module-level function; its results should be
+    small (partial aggregates), since they are pickled back to this process.
+    """
+    workers = worker_count(max_workers)
+    if workers == 1:
+        return [fn(df)]
+
+    codes = hash_partitions(df[key], workers)
+    pool = process_pool()
+    futures = [pool.submit(fn, df[codes == part]) for part in range(workers)]
+    try:
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # a worker died (e.g. killed for memory); the next call starts a fresh pool
+        return [fn(df[codes == part]) for part in range(workers)]
@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+from src.schema import (
+    STRENGTH_THRESHOLD, WEAKNESS_THRESHOLD,
+    MARKS_RANGE_BINS, MARKS_RANGE_LABELS, ALL_TERMS
+)
+
+CATEGORIES = ["strengths", "average", "weaknesses"]
+
+# Insight keys stored per profile; pages map them to display text
+INSIGHT_NONE = "none"
+INSIGHT_STRONG = "strong"
+INSIGHT_WEAK = "weak"
+INSIGHT_MIXED = "mixed"
+
+INSIGHT_MESSAGES = {
+    INSIGHT_NONE: "⚪ No subject data available for this student.",
+    INSIGHT_STRONG: "🟢 The student shows strong overall performance across most subjects.",
+    INSIGHT_WEAK: "🔴 The student has multiple weak-performing subjects and may need support.",
+    INSIGHT_MIXED: "🟡 The student's performance is mixed across subjects.",
+}
+
+def build_cross_term_pivot(df):
+    """
+    Returns one row per (reg_no, subject) over all terms, indexed and sorted
+    by (reg_no, subject): the mean marks and marks_pct, the lowest and
+    highest marks_pct and the number of terms with a mark.
+    """
+    pivot = (
+        df.groupby(["reg_no", "subject"], sort=True, observed=True)
+        .agg(
+            marks=("marks", "mean"),
+            marks_pct=("marks_pct", "mean"),
+            pct_min=("marks_pct", "min"),
+            pct_max=("marks_pct", "max"),
+            term_count=("marks_pct", "count"),
+        )
+    )
+    pivot["term_count"] = pivot["term_count"].astype("int32")
+    return pivot
+
+def build_subject_performance(df, pivot=None):
+    """
+    Returns one row per (reg_no, term, subject) with marks, marks_pct, the
+    marks_pct range and term count behind it, the strength category and the
+    marks range bucket.
+
+    Per-term rows are the cleaned records themselves; ALL_TERMS rows are the
+    cross-term pivot (built here unless given), matching the "All Terms" view.
+    """
+    cols = ["reg_no", "term", "subject", "marks", "marks_pct", "pct_min", "pct_max", "term_count"]
+    per_term = df.loc[df["term"].notna(), ["reg_no", "term", "subject", "marks", "marks_pct"]]
+    per_term = per_term.assign(
+        pct_min=per_term["marks_pct"],
+        pct_max=per_term["marks_pct"],
+        term_count=per_term["marks_pct"].notna().astype("int32")
+    )
+
+    all_terms = (pivot if pivot is not None else build_cross_term_pivot(df)).reset_index()
+    all_terms.insert(1, "term", ALL_TERMS)
+
+    perf = pd.concat([per_term, all_terms[cols]], ignore_index=True)
+    perf["term"] = perf["term"].astype(str)
+
+    pct = perf["marks_pct"].astype("float64").to_numpy()
+    perf["category"] = pd.Categorical(
+        np.select(
+            [pct >= STRENGTH_THRESHOLD, pct < WEAKNESS_THRESHOLD, ~np.isnan(pct)],
+            ["strengths", "weaknesses", "average"],
+            default=None
+        ),
+        categories=CATEGORIES
+    )
+    perf["marks_range"] = pd.cut(
+        perf["marks_pct"].astype("float64"),
+        bins=MARKS_RANGE_BINS,
+        labels=MARKS_RANGE_LABELS,
+        include_lowest=True
+    )
+
+    perf = perf.sort_values(["reg_no", "term", "subject"]).set_index(["reg_no", "term"])
+    return perf
+
+# Group subject names into one list column per value of `by`, keyed by (reg_no, term).
+# Rows are sorted so each group is contiguous and split in one go, avoiding a
+# Python-level aggregation per group.
+def _subject_lists(perf, by, values):
+    rows = perf.dropna(subset=[by]).reset_index()
+    rows = rows.sort_values(["reg_no", "term", by, "subject"], kind="stable")
+    keys = rows[["reg_no", "term", by]]
+
+    is_start = (keys != keys.shift()).any(axis=1).to_numpy()
+    starts = np.flatnonzero(is_start)
+    subjects = np.split(rows["subject"].to_numpy(dtype=object), starts[1:])
+
+    firsts = keys.iloc[starts]
+    lists = pd.Series(
+        [group.tolist() for group in subjects],
+        index=pd.MultiIndex.from_arrays(
+            [firsts["reg_no"].to_numpy(), firsts["term"].to_numpy(), firsts[by].astype(str).to_numpy()],
+            names=["reg_no", "term", by]
+        ),
+        dtype=object
+    )
+    lists = lists.unstack(by).reindex(columns=values)
+    lists.columns = list(values)
+    return lists
+
+def build_student_profiles(df):
+    """
+    Computes the Student Summary profile for every student in one pass.
+
+    Returns (profiles, subject_perf). `profiles` is indexed by (reg_no, term),
+    with one ALL_TERMS row per student, and holds the overview metrics, the
+    strength category lists, the marks range subject lists and an insight key.
+    `subject_perf` is the per-subject table from build_subject_performance.
+    """
+    grouped = [
+        df.dropna(subset=["term"]).assign(term=lambda d: d["term"].astype(str)).groupby(["reg_no", "term"], observed=True),
+        df.assign(term=ALL_TERMS).groupby(["reg_no", "term"], observed=True),
+    ]
+    overview = pd.concat([
+        g.agg(
+            student_name=("student_name", "first"),
+            avg_marks=("marks_pct", "mean"),
+            avg_attendance=("attendance", "mean"),
+            subjects_taken=("subject", "nunique"),
+        )
+        for g in grouped
+    ])
+
+    subject_perf = build_subject_performance(df)
+
+    categories = _subject_lists(subject_perf, "category", CATEGORIES)
+    ranges = _subject_lists(subject_perf, "marks_range", MARKS_RANGE_LABELS)
+
+    profiles = overview.join(categories).join(ranges).sort_index()
+    list_cols = CATEGORIES + MARKS_RANGE_LABELS
+    for col in list_cols:
+        profiles[col] = [v if isinstance(v, list) else [] for v in profiles[col]]
+
+    counts = {col: profiles[col].str.len().to_numpy() for col in CATEGORIES}
+    total = counts["strengths"] + counts["average"] + counts["weaknesses"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strong_share = counts["strengths"] / total
+        weak_share = counts["weaknesses"] / total
+    profiles["insight"] = np.select(
+        [total == 0, strong_share >= 0.6, weak_share >= 0.4],
+        [INSIGHT_NONE, INSIGHT_STRONG, INSIGHT_WEAK],
+        default=INSIGHT_MIXED
+    )
+
+    return profiles, subject_perf
+
+def student_profile(profiles, reg_no, term=ALL_TERMS):
+    try:
+        row = profiles.loc[(reg_no, term)]
+    except KeyError:
+        raise ValueError(f"No profile found for reg_no: {reg_no}, term: {term}")
+    profile = row.to_dict()
+    profile["reg_no"] = reg_no
+    profile["term"] = term
+    return profile
+
+def student_terms(profiles, reg_no):
+    terms = profiles.loc[reg_no].index
+    return sorted(t for t in terms if t != ALL_TERMS)
+
+def student_subject_performance(subject_perf, reg_no, term=ALL_TERMS):
+    try:
+        rows = subject_perf.loc[[(reg_no, term)]]
+    except KeyError:
+        return subject_perf.iloc[0:0].reset_index(drop=True)
+    return rows.reset_index(drop=True)
+
+def profile_range_summary(profile):
+    return pd.DataFrame({
+        "Marks Range (%)": MARKS_RANGE_LABELS,
+        "Subjects": [", ".join(profile[label]) for label in MARKS_RANGE_LABELS],
+        "Count": [len(profile[label]) for label in MARKS_RANGE_LABELS],
+    })
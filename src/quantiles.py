@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+from src.schema import MARKS_MIN, MARKS_MAX, SKETCH_BINS
+
+SKETCH_KEYS = ["class", "term", "subject"]
+PERCENTILE_BANDS = [10, 25, 50, 75, 90]
+
+class QuantileSketches:
+    """
+    Fixed-width histograms of marks_pct over [MARKS_MIN, MARKS_MAX], one per
+    group of key values (by default class, term and subject).
+
+    Sketches merge by adding bin counts, so the sketches of chunks, sheets or
+    appended terms combine into exactly the sketch of the union, and any
+    coarser grouping (e.g. per subject for one class) is a sum of rows.
+    Percentiles are interpolated inside the bin that holds them and are
+    within one bin width (error_bound) of the exact value.
+    """
+
+    def __init__(self, keys, counts):
+        self.keys = keys.reset_index(drop=True)
+        self.counts = counts
+
+    @property
+    def bins(self):
+        return self.counts.shape[1]
+
+    @property
+    def error_bound(self):
+        return (MARKS_MAX - MARKS_MIN) / self.bins
+
+    def __len__(self):
+        return len(self.keys)
+
+    def where(self, **filters):
+        mask = np.ones(len(self.keys), dtype=bool)
+        for column, value in filters.items():
+            mask &= (self.keys[column] == value).to_numpy(dtype=bool, na_value=False)
+        return QuantileSketches(self.keys[mask], self.counts[mask])
+
+    def rollup(self, by):
+        """Sums the sketches into one per distinct combination of the `by` columns."""
+        if not len(self.keys):
+            return QuantileSketches(self.keys[by], self.counts)
+        codes = self.keys.groupby(by, dropna=False, sort=True, observed=True).ngroup().to_numpy()
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        counts = np.add.reduceat(self.counts[order], starts, axis=0)
+        keys = self.keys[by].iloc[order[starts]]
+        return QuantileSketches(keys, counts)
+
+    def merge(self, other):
+        """Combines two sketch sets over the same key columns."""
+        keys = pd.concat([self.keys, other.keys], ignore_index=True)
+        counts = np.vstack([self.counts, other.counts])
+        return QuantileSketches(keys, counts).rollup(list(self.keys.columns))
+
+    def quantiles(self, percentiles=PERCENTILE_BANDS):
+        """
+        Returns the key columns, the number of marks behind each sketch and
+        one p<N> column per requested percentile (NaN for empty sketches).
+        """
+        cumulative = self.counts.cumsum(axis=1)
+        total = cumulative[:, -1] if self.bins else np.zeros(len(self.keys))
+        rows = np.arange(len(self.keys))
+        result = self.keys.copy()
+        result["count"] = total
+
+        for p in percentiles:
+            target = total * (p / 100)
+            # first bin whose cumulative count reaches the target rank
+            idx = np.minimum((cumulative < target[:, None]).sum(axis=1), self.bins - 1)
+            before = np.where(idx > 0, cumulative[rows, idx - 1], 0)
+            in_bin = self.counts[rows, idx]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fraction = np.where(in_bin > 0, (target - before) / in_bin, 0.0)
+            value = MARKS_MIN + (idx + np.clip(fraction, 0, 1)) * self.error_bound
+            result[f"p{p}"] = np.where(total > 0, value, np.nan)
+        return result
+
+def build_sketches(df, keys=SKETCH_KEYS, bins=SKETCH_BINS):
+    """
+    Builds one sketch per group of `keys` (those present in df) from the
+    marks_pct column with a single bincount over (group, bin) codes.
+    """
+    keys = [k for k in keys if k in df.columns]
+    data = df.loc[df["marks_pct"].notna(), keys + ["marks_pct"]]
+    if data.empty:
+        return QuantileSketches(pd.DataFrame(columns=keys), np.zeros((0, bins), dtype="int32"))
+
+    grouped = data.groupby(keys, dropna=False, sort=True, observed=True)
+    codes = grouped.ngroup().to_numpy()
+    key_frame = grouped.size().reset_index()[keys]
+
+    width = (MARKS_MAX - MARKS_MIN) / bins
+    values = data["marks_pct"].to_numpy(dtype="float64")
+    bin_idx = np.clip(((values - MARKS_MIN) / width).astype("int64"), 0, bins - 1)
+    counts = np.bincount(codes * bins + bin_idx, minlength=len(key_frame) * bins)
+    return QuantileSketches(key_frame, counts.reshape(len(key_frame), bins).astype("int32"))
+
+def build_source_sketches(df, source_rows, keys=SKETCH_KEYS, bins=SKETCH_BINS):
+    """
+    Builds the sketches of each source's rows of the cleaned long table and
+    merges them. source_rows is the number of rows kept from each source, in
+    table order (the cleaning report's "source_rows"); counting only kept
+    rows leaves out duplicates dropped across sources.
+    """
+    sketches = None
+    ends = np.cumsum(source_rows)
+    for start, end in zip(ends - np.asarray(source_rows), ends):
+        part = build_sketches(df.iloc[start:end], keys, bins)
+        if len(part):
+            sketches = part if sketches is None else sketches.merge(part)
+    return sketches if sketches is not None else build_sketches(df, keys, bins)
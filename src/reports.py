@@ -0,0 +1,190 @@
+import html
+import re
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+import numpy as np
+from src.parallel import process_pool, worker_count
+from src.schema import PASS_MARK, ALL_TERMS, MARKS_RANGE_LABELS
+from src.profiles import CATEGORIES, INSIGHT_MESSAGES
+
+REPORT_CHUNK_SIZE = 250  # students rendered per worker task
+
+_REPORT_CSS = """
+body { font-family: Helvetica, Arial, sans-serif; color: #222; margin: 32px auto; max-width: 860px; }
+h1 { font-size: 24px; font-weight: 500; margin: 0 0 4px; }
+h2 { font-size: 13px; font-weight: 500; text-transform: uppercase; letter-spacing: 0.08em; color: #777; margin: 28px 0 8px; border-bottom: 1px solid #ddd; padding-bottom: 6px; }
+.sub { color: #666; margin: 0 0 8px; }
+.grid { display: grid; grid-template-columns: repeat(3, 1fr); gap: 10px; }
+.card { border: 1px solid #ddd; border-radius: 8px; padding: 12px 14px; }
+.card p { margin: 0; font-size: 12px; color: #666; }
+.card b { font-size: 22px; font-weight: 500; }
+table { border-collapse: collapse; width: 100%; font-size: 13px; }
+th, td { text-align: left; padding: 6px 8px; border-bottom: 1px solid #eee; }
+th { color: #666; font-weight: 500; }
+.strengths { color: #1E8449; } .average { color: #B7950B; } .weaknesses { color: #C0392B; }
+footer { margin-top: 32px; font-size: 11px; color: #999; }
+"""
+
+def _fmt_pct(value, digits=1):
+    if value is None or value != value:
+        return "N/A"
+    return f"{value:.{digits}f}%"
+
+def _fmt_num(value, digits=1):
+    if value is None or value != value:
+        return "—"
+    return f"{value:.{digits}f}"
+
+def report_file_name(reg_no, student_name, used=None):
+    """
+    File name of a student's report. With `used`, the set of names already
+    taken in the archive, a name whose slug collides with one of them (say
+    reg_nos differing only in punctuation) gets a numeric suffix, and the
+    name returned is added to the set.
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{reg_no}_{student_name}").strip("_") or "student"
+    if used is None:
+        return f"{slug}.html"
+    name, copy = f"{slug}.html", 1
+    while name in used:
+        copy += 1
+        name = f"{slug}_{copy}.html"
+    used.add(name)
+    return name
+
+def render_student_report(profile, subject_rows, pass_mark=PASS_MARK):
+    """
+    Renders a self-contained HTML report for one student.
+
+    `profile` is the student's ALL_TERMS row from build_student_profiles as a
+    dict; `subject_rows` are the per-term (term, subject, marks, marks_pct,
+    category) records from the subject performance table.
+    """
+    esc = html.escape
+    name = esc(str(profile["student_name"]))
+    reg_no = esc(str(profile["reg_no"]))
+
+    rows_html = "".join(
+        f"<tr><td>{esc(str(r['term']))}</td><td>{esc(str(r['subject']))}</td>"
+        f"<td>{_fmt_num(r['marks'])}</td><td>{_fmt_pct(r['marks_pct'])}</td>"
+        f"<td class='{r['category'] or ''}'>{(r['category'] or '—').title()}</td></tr>"
+        for r in subject_rows
+    )
+
+    category_html = "".join(
+        f"<div class='card'><p class='{c}'>{c.title()} ({len(profile[c])})</p>"
+        f"<div>{esc(', '.join(sorted(profile[c]))) or 'None'}</div></div>"
+        for c in CATEGORIES
+    )
+
+    range_html = "".join(
+        f"<tr><td>{label}</td><td>{len(profile[label])}</td><td>{esc(', '.join(profile[label]))}</td></tr>"
+        for label in MARKS_RANGE_LABELS
+    )
+
+    below_pass = sum(
+        1 for r in subject_rows
+        if r["marks_pct"] is not None and r["marks_pct"] == r["marks_pct"] and r["marks_pct"] < pass_mark
+    )
+
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{reg_no} - {name}</title><style>{_REPORT_CSS}</style></head>
+<body>
+<h1>{name}</h1>
+<p class="sub">Reg No {reg_no} · {ALL_TERMS}</p>
+<h2>Overview</h2>
+<div class="grid">
+<div class="card"><p>Average Marks (%)</p><b>{_fmt_pct(profile['avg_marks'])}</b></div>
+<div class="card"><p>Overall Attendance</p><b>{_fmt_pct(profile['avg_attendance'], 2)}</b></div>
+<div class="card"><p>Subjects Taken</p><b>{profile['subjects_taken']}</b></div>
+</div>
+<p class="sub" style="margin-top:12px;">{esc(INSIGHT_MESSAGES[profile['insight']])} Subjects below the pass mark ({pass_mark}%): {below_pass}.</p>
+<h2>Performance Category</h2>
+<div class="grid">{category_html}</div>
+<h2>Marks Range Summary</h2>
+<table><tr><th>Marks Range (%)</th><th>Count</th><th>Subjects</th></tr>{range_html}</table>
+<h2>Subject-wise Performance</h2>
+<table><tr><th>Term</th><th>Subject</th><th>Raw Score</th><th>Score (%)</th><th>Category</th></tr>{rows_html}</table>
+<footer>Generated by LUME — Academic Intelligence Engine</footer>
+</body></html>
+"""
+
+# Worker entry point: renders one chunk of students and returns (file_name, bytes) pairs
+def _render_chunk(chunk, pass_mark):
+    return [
+        (file_name, render_student_report(profile, subject_rows, pass_mark).encode("utf-8"))
+        for file_name, profile, subject_rows in chunk
+    ]
+
+# Split the precomputed tables into picklable per-student (file_name, profile, subject_rows)
+# chunks; file names are assigned here, in reg_no order, so they are unique and stable
+def _iter_chunks(profiles, subject_perf, chunk_size):
+    summary = profiles.xs(ALL_TERMS, level="term")
+    per_term = (
+        subject_perf[subject_perf.index.get_level_values("term") != ALL_TERMS]
+        .drop(columns=["pct_min", "pct_max", "term_count"])
+        .reset_index()
+    )
+    per_term["category"] = per_term["category"].astype(object).where(per_term["category"].notna(), None)
+    for col in ["marks", "marks_pct"]:
+        per_term[col] = per_term[col].astype("float64")
+    # subject_perf is sorted by reg_no, so each student's rows are one contiguous slice
+    records = per_term.drop(columns="reg_no").to_dict("records")
+    reg_col = per_term["reg_no"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, reg_col[1:] != reg_col[:-1]])
+    ends = np.r_[starts[1:], len(reg_col)]
+    rows_by_student = {
+        reg_col[start]: records[start:end]
+        for start, end in zip(starts, ends)
+    }
+
+    used = set()
+    for start in range(0, len(summary), chunk_size):
+        block = summary.iloc[start:start + chunk_size].reset_index()
+        for col in ["avg_marks", "avg_attendance"]:
+            block[col] = block[col].astype("float64")
+        yield [
+            (report_file_name(profile["reg_no"], profile["student_name"], used),
+             profile, rows_by_student.get(profile["reg_no"], []))
+            for profile in block.to_dict("records")
+        ]
+
+def report_count(profiles):
+    """Number of reports export_student_reports writes: one per student."""
+    return int((profiles.index.get_level_values("term") == ALL_TERMS).sum())
+
+def export_student_reports(profiles, subject_perf, output, pass_mark=PASS_MARK,
+                           max_workers=None, chunk_size=REPORT_CHUNK_SIZE, progress=None):
+    """
+    Renders one HTML report per student on the worker pool and streams
+    them into a zip archive at `output` (a path or writable binary file),
+    keeping about two chunks per worker (`max_workers`, one per CPU by
+    default) in flight.
+
+    `progress`, if given, is called as progress(done, total) after each chunk
+    is written. Returns the number of reports written.
+    """
+    total = report_count(profiles)
+    max_workers = worker_count(max_workers)
+    chunks = _iter_chunks(profiles, subject_perf, chunk_size)
+    done = 0
+
+    pool = process_pool()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        # keep a bounded window of chunks in flight so rendered reports are
+        # written out as they arrive rather than held until the end
+        pending = {pool.submit(_render_chunk, chunk, pass_mark) for chunk in islice(chunks, max_workers * 2)}
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                rendered = future.result()
+                for file_name, data in rendered:
+                    archive.writestr(file_name, data)
+                done += len(rendered)
+                if progress is not None:
+                    progress(done, total)
+            for chunk in islice(chunks, len(finished)):
+                pending.add(pool.submit(_render_chunk, chunk, pass_mark))
+
+    return done
@@ -0,0 +1,212 @@
+import ast
+import functools
+import re
+from functools import reduce
+import numpy as np
+import pandas as pd
+from src.schema import PASS_MARK, RISK_RULES
+from src import sql_backend
+from src.sql_backend import SqlDataset
+from src.parallel import map_partitions, groupby_workers, use_partitions
+from src.trajectory import order_terms
+
+# Per-student aggregates a rule can refer to, computed once for all rules
+AGGREGATES = {
+    "avg_marks": "Average marks (%) over all subjects and terms",
+    "avg_attendance": "Average attendance (%)",
+    "subjects_taken": "Distinct subjects with a record",
+    "failed_subjects": "Subject marks below the pass mark (a subject failed in two terms counts twice)",
+    "terms_observed": "Terms with at least one mark",
+    "min_term_marks": "Lowest term average marks (%)",
+    "latest_term_marks": "Average marks (%) in the student's latest term",
+    "min_term_attendance": "Lowest term average attendance (%)",
+    "largest_drop": "Largest fall in term average marks from one observed term to the next (points)",
+}
+PARAMETERS = ["pass_mark", "attendance_threshold"]
+
+_RULE_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_RESERVED_NAMES = {"reg_no", "student_name", "rules_triggered"} | set(PARAMETERS)
+
+# Python's boolean keywords do not work on arrays, so and / or / not are rewritten
+# to & / | / ~ and chained comparisons (a < b < c) into a & of single comparisons
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Compare,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq, ast.Name, ast.Load, ast.Constant,
+)
+
+class _Vectorize(ast.NodeTransformer):
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        return reduce(lambda left, right: ast.BinOp(left=left, op=op, right=right), node.values)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=node.operand)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        operands = [node.left] + node.comparators
+        parts = [
+            ast.Compare(left=left, ops=[op], comparators=[right])
+            for left, op, right in zip(operands, node.ops, operands[1:])
+        ]
+        return reduce(lambda left, right: ast.BinOp(left=left, op=ast.BitAnd(), right=right), parts)
+
+def compile_rule(expression):
+    """
+    Compiles a rule expression such as "failed_subjects >= 2 or
+    min_term_attendance < 60" into a code object evaluating it over whole
+    columns at once.
+
+    Only comparisons, and / or / not, + - * /, numbers, AGGREGATES and
+    PARAMETERS are accepted; anything else raises ValueError.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid rule '{expression}': {e.msg}") from None
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Invalid rule '{expression}': {type(node).__name__} is not allowed")
+        if isinstance(node, ast.Name) and node.id not in AGGREGATES and node.id not in PARAMETERS:
+            raise ValueError(f"Invalid rule '{expression}': unknown name '{node.id}'")
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+            raise ValueError(f"Invalid rule '{expression}': only numbers are allowed as constants")
+
+    tree = ast.fix_missing_locations(_Vectorize().visit(tree))
+    return compile(tree, "<risk rule>", "eval")
+
+def compile_rules(rules):
+    """Compiles a {rule name: expression} dict, checking the names."""
+    compiled = {}
+    for name, expression in rules.items():
+        if not _RULE_NAME.fullmatch(name):
+            raise ValueError(f"Invalid rule name '{name}': use letters, digits and underscores")
+        if name in AGGREGATES or name in _RESERVED_NAMES:
+            raise ValueError(f"Invalid rule name '{name}': it is already a column name")
+        compiled[name] = compile_rule(expression)
+    return compiled
+
+def parse_rules(text):
+    """
+    Reads rules written one per line as "name: expression"; blank lines and
+    lines starting with # are skipped.
+    """
+    rules = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, sep, expression = line.partition(":")
+        if not sep or not expression.strip():
+            raise ValueError(f"Invalid rule line '{line}': expected 'name: expression'")
+        rules[name.strip()] = expression.strip()
+    return rules
+
+def format_rules(rules):
+    return "\n".join(f"{name}: {expression}" for name, expression in rules.items())
+
+# Per-student totals and per-(student, term) means, from which every aggregate is derived
+def _aggregate_parts(df, pass_mark):
+    data = df.assign(failed=(df["marks_pct"] < pass_mark).fillna(False).astype("int64"))
+    summary = data.groupby("reg_no", observed=True).agg(
+        student_name=("student_name", "first"),
+        avg_marks=("marks_pct", "mean"),
+        avg_attendance=("attendance", "mean"),
+        subjects_taken=("subject", "nunique"),
+        failed_subjects=("failed", "sum"),
+    )
+    by_term = (
+        data.dropna(subset=["term"]).assign(term=lambda d: d["term"].astype(str))
+        .groupby(["reg_no", "term"], observed=True)[["marks_pct", "attendance"]]
+        .mean()
+        .astype("float64")
+    )
+    return summary, by_term
+
+def _term_aggregates(summary, by_term, terms):
+    term_marks = by_term["marks_pct"].unstack("term").reindex(index=summary.index, columns=terms)
+    term_attendance = by_term["attendance"].unstack("term").reindex(index=summary.index, columns=terms)
+
+    # carried forward, the last column holds each student's latest observed term and
+    # the shifted frame their previous observed term, as in the term trajectories
+    carried = term_marks.ffill(axis=1)
+    drops = carried.shift(1, axis=1) - term_marks
+
+    summary["terms_observed"] = term_marks.notna().sum(axis=1)
+    summary["min_term_marks"] = term_marks.min(axis=1)
+    summary["latest_term_marks"] = carried.iloc[:, -1] if len(terms) else np.nan
+    summary["min_term_attendance"] = term_attendance.min(axis=1)
+    summary["largest_drop"] = drops.max(axis=1)
+    return summary.reset_index()
+
+# Worker entry point for one reg_no partition; `terms` is the order over the whole table
+def _partition_aggregates(df, pass_mark, terms):
+    return _term_aggregates(*_aggregate_parts(df, pass_mark), terms)
+
+def student_aggregates(df, pass_mark=PASS_MARK):
+    """
+    Every aggregate in AGGREGATES for every student, from one groupby per
+    student and one per (student, term), plus student_name for display.
+    avg_marks and avg_attendance match student_summary.
+
+    Like the summaries in src/analytics.py, df may be a SqlDataset, which
+    runs both groupings as SQL, and large frames are partitioned on reg_no
+    across the worker pool.
+    """
+    if isinstance(df, SqlDataset):
+        summary, by_term = sql_backend.student_aggregate_parts(df, pass_mark)
+        return _term_aggregates(summary, by_term, order_terms(by_term.index.get_level_values("term")))
+    terms = order_terms(df["term"])
+    if use_partitions(df):
+        parts = map_partitions(
+            functools.partial(_partition_aggregates, pass_mark=pass_mark, terms=terms), df, "reg_no", groupby_workers()
+        )
+        return pd.concat(parts).sort_values("reg_no", kind="stable").reset_index(drop=True)
+    return _partition_aggregates(df, pass_mark, terms)
+
+def evaluate_rules(aggregates, rules=RISK_RULES, pass_mark=PASS_MARK, attendance_threshold=75):
+    """
+    Evaluates every rule over the student aggregates and returns the flag
+    matrix: one boolean column per rule, one row per student (same order as
+    `aggregates`). A comparison with a missing aggregate is False.
+    """
+    compiled = compile_rules(rules)
+    namespace = {name: aggregates[name].to_numpy(dtype="float64", na_value=np.nan) for name in AGGREGATES}
+    namespace.update(pass_mark=float(pass_mark), attendance_threshold=float(attendance_threshold))
+
+    flags = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name, code in compiled.items():
+            try:
+                result = np.asarray(eval(code, {"__builtins__": {}}, namespace))
+            except TypeError:
+                result = np.asarray(None)
+            if result.dtype != bool:
+                raise ValueError(f"Rule '{name}' must be a comparison (true or false for each student)")
+            flags[name] = np.broadcast_to(result, len(aggregates))
+    return pd.DataFrame(flags, index=aggregates.index, columns=list(compiled))
+
+def flagged_students(df, rules=RISK_RULES, pass_mark=PASS_MARK, attendance_threshold=75):
+    """
+    Students flagged by at least one rule: their aggregates, one boolean
+    column per rule and `rules_triggered` naming the rules that fired.
+    The default RISK_RULES flag students whose average marks are below the
+    pass mark or whose average attendance is below the threshold.
+    """
+    return flag_aggregates(student_aggregates(df, pass_mark), rules, pass_mark, attendance_threshold)
+
+def flag_aggregates(aggregates, rules=RISK_RULES, pass_mark=PASS_MARK, attendance_threshold=75):
+    """flagged_students over aggregates already computed by student_aggregates."""
+    flags = evaluate_rules(aggregates, rules, pass_mark, attendance_threshold)
+    flagged = flags.any(axis=1).to_numpy()
+
+    result = pd.concat([aggregates, flags], axis=1)[flagged].reset_index(drop=True)
+    names = np.array(flags.columns, dtype=object)
+    result["rules_triggered"] = [", ".join(names[row]) for row in flags.to_numpy()[flagged]]
+    return result
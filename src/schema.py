@@ -6,6 +6,9 @@ ID_COLUMNS = [
     "attendance"
 ]
 
+# ID columns always read as text; attendance is numeric like the subject columns
+TEXT_ID_COLUMNS = ["reg_no", "student_name", "class", "term"]
+
 CANONICAL_COLUMNS = ID_COLUMNS + [
     "subject",
     "marks"
@@ -30,9 +33,57 @@ COLUMN_ALIASES = {
     ]
 }
 
+INFERENCE_SAMPLE_ROWS = 500  # Rows sampled per column to decide whether it holds marks
+MARK_VALUE_SHARE = 0.8  # Share of sampled values that must parse as numbers for a mark column
+
+PROFILE_SAMPLE_VALUES = 5  # Distinct offending values kept per column in the cleaning report's data-quality profile
+
+EXCEL_BATCH_ROWS = 20_000  # Rows of an Excel sheet converted to typed columns per step while streaming
+
 MARKS_MIN = 0
 MARKS_MAX = 100  # Percentage ceiling — all analytics operate on the marks_pct (0–100) scale
 PASS_MARK = 35
 
 ATTENDANCE_MIN = 0
-ATTENDANCE_MAX = 100
\ No newline at end of file
+ATTENDANCE_MAX = 100
+
+# At-risk rules as {name: expression over per-student aggregates} (see src/risk_rules.py);
+# a student matching any rule is at risk. The defaults are the classic marks-or-attendance check.
+RISK_RULES = {
+    "low_marks": "avg_marks < pass_mark",
+    "low_attendance": "avg_attendance < attendance_threshold",
+}
+
+STRENGTH_THRESHOLD = 75  # marks_pct at or above which a subject is a strength
+WEAKNESS_THRESHOLD = 40  # marks_pct below which a subject is a weakness
+
+MARKS_RANGE_BINS = [0, 40, 60, 75, 100]
+MARKS_RANGE_LABELS = ["0–40", "41–60", "61–75", "76–100"]
+
+ALL_TERMS = "All Terms"
+
+COMPARISON_ALPHA = 0.05  # False discovery rate under which a class difference is reported as significant
+
+CORRELATION_MIN_STUDENTS = 10  # Students needed with marks in both subjects before their correlation is shown
+
+ANOMALY_Z_THRESHOLD = 3.5  # Robust z-score (median / MAD) beyond which a mark is flagged as a likely entry error
+ANOMALY_MIN_GROUP = 8  # Marks needed in a (class, term, subject) group before its marks are scored
+CLASS_SHIFT_THRESHOLD = 1.5  # Robust standard deviations between a class median and the other sections' that flag a shift
+
+SKETCH_BINS = 200  # Histogram bins per quantile sketch; percentiles are exact to within 100 / SKETCH_BINS points
+
+DATASET_STORE_BUDGET_MB = 2048  # In-memory budget shared by all sessions' datasets
+DATASET_STORE_DIR = "data/processed/store"  # On-disk copies reloaded after eviction
+DATASET_STORE_SHARED = False  # Let several server processes share the on-disk copies
+
+EXPORT_CHUNK_ROWS = 50_000  # Rows converted per step when writing CSV / Excel / Parquet exports
+
+JOB_WORKERS = 2  # Background cleaning jobs that may run at once per server process
+
+GROUPBY_WORKERS = 0  # Processes for partitioned summaries (0 = one per CPU)
+GROUPBY_PARTITION_KEY = "reg_no"  # Column subject summaries are hash-partitioned on: "reg_no" or "class"
+PARALLEL_GROUPBY_MIN_ROWS = 500_000  # Smaller frames are summarised in-process
+
+STUDENT_SEARCH_LIMIT = 50  # Max matches returned by the student picker per query
+
+ANALYTICS_BACKEND = "pandas"  # "pandas" or "sql" (in-process SQLite with predicate pushdown)
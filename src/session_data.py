@@ -0,0 +1,379 @@
+import importlib
+import os
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from src.dataset_store import get_store
+from src.jobs import submit_job, get_job, cancel_job, discard_job, JOB_DONE
+from src.schema import ANALYTICS_BACKEND
+
+# pandas and the analytics modules are imported where first used, so a page
+# opened without data can render without loading them
+
+RAW_KEY = "raw_key"
+DATASET_KEY = "dataset_key"
+CLEANING_JOB = "cleaning_job_id"
+CLEANING_JOB_UPDATES = "cleaning_job_updates"
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+def _holder_active(session_id):
+    if not Runtime.exists():
+        return True
+    return Runtime.instance().is_active_session(session_id)
+
+def dataset_store():
+    return get_store(holder_active=_holder_active)
+
+# Point this session at `key`, releasing whatever it held before under `state_key`
+def _attach(state_key, key):
+    store = dataset_store()
+    session_id = _session_id()
+    previous = st.session_state.get(state_key)
+    if previous is not None and previous != key:
+        store.release(previous, session_id)
+    store.acquire(key, session_id)
+    st.session_state[state_key] = key
+
+def _payload(state_key):
+    key = st.session_state.get(state_key)
+    if key is None:
+        return None
+    try:
+        return dataset_store().get(key)
+    except (KeyError, OSError):
+        st.session_state.pop(state_key, None)
+        return None
+
+def attach_raw(key, payload=None):
+    """
+    Attaches this session to the uploaded file `key`, storing `payload`
+    (file bytes, raw_df, extra file tables, sheet names) first if it is not there yet.
+    """
+    if payload is not None:
+        dataset_store().put(key, payload, holder=_session_id())
+    _attach(RAW_KEY, key)
+
+def attach_dataset(key, payload=None):
+    """
+    Attaches this session to the cleaned dataset `key`, storing `payload`
+    (long_df, cleaning_report, dropped_df) first if it is not there yet.
+    """
+    if payload is not None:
+        dataset_store().put(key, payload, holder=_session_id())
+    _attach(DATASET_KEY, key)
+
+def has_dataset(key):
+    return key in dataset_store()
+
+def raw_upload():
+    return _payload(RAW_KEY)
+
+def cleaned_dataset():
+    return _payload(DATASET_KEY)
+
+def dataset_artifact(name, builder=None):
+    """
+    Returns a table derived from the session's cleaned dataset, built once by
+    builder(long_df) and shared by every session holding the same dataset.
+    Without a builder, returns None if nobody has built it yet.
+    """
+    return dataset_store().artifact(
+        st.session_state[DATASET_KEY], name,
+        None if builder is None else lambda payload: builder(payload["long_df"])
+    )
+
+# Derived tables built for every cleaned dataset, by artifact name, as the
+# (module, function) building each one
+ARTIFACT_BUILDERS = {
+    "student_index": ("src.student_search", "build_student_index"),
+    "student_profiles": ("src.profiles", "build_student_profiles"),
+    "student_trajectory": ("src.trajectory", "student_trajectories"),
+    "subject_trajectory": ("src.trajectory", "subject_trajectories"),
+    "quantile_sketches": ("src.quantiles", "build_sketches"),
+    "class_moments": ("src.comparison", "class_moments"),
+}
+
+def artifact_builder(name):
+    module, function = ARTIFACT_BUILDERS[name]
+    return getattr(importlib.import_module(module), function)
+
+def student_index():
+    return dataset_artifact("student_index", artifact_builder("student_index"))
+
+def student_profiles():
+    return dataset_artifact("student_profiles", artifact_builder("student_profiles"))
+
+def student_trajectory():
+    return dataset_artifact("student_trajectory", artifact_builder("student_trajectory"))
+
+def subject_trajectory():
+    return dataset_artifact("subject_trajectory", artifact_builder("subject_trajectory"))
+
+def quantile_sketches():
+    return dataset_artifact("quantile_sketches", artifact_builder("quantile_sketches"))
+
+def class_moments_table():
+    return dataset_artifact("class_moments", artifact_builder("class_moments"))
+
+# An artifact built from the dataset narrowed by {column: value} filters, one per filter
+def _filtered_artifact(name, filters, builder):
+    filters = filters or {}
+    name += "".join(f"|{column}={value}" for column, value in sorted(filters.items()))
+
+    def build(long_df):
+        for column, value in filters.items():
+            long_df = long_df[long_df[column] == value]
+        return builder(long_df)
+    return dataset_artifact(name, build)
+
+def subject_correlation_table(method="pearson", filters=None):
+    """
+    Returns (correlation, pair counts) for the session's dataset narrowed by
+    the {column: value} `filters`, built once per method and filter and
+    shared like the other artifacts.
+    """
+    from src.correlation import subject_correlation
+    return _filtered_artifact(f"subject_correlation_{method}", filters, lambda df: subject_correlation(df, method))
+
+def threshold_grid(filters=None):
+    """
+    Returns the ThresholdGrid of at-risk counts for the session's dataset
+    narrowed by `filters`, built once per filter.
+    """
+    from src.analytics import student_summary
+    from src.whatif import ThresholdGrid
+    return _filtered_artifact("threshold_grid", filters, lambda df: ThresholdGrid(student_summary(df)))
+
+# An artifact built from what analytics_source gives for {column: value} filters: the
+# narrowed frame, or with the SQL backend the shared SQLite copy with the filters pushed down
+def _analytics_artifact(name, filters, builder):
+    filters = filters or {}
+    if analytics_backend() != "sql":
+        return _filtered_artifact(name, filters, builder)
+    name += "".join(f"|{column}={value}" for column, value in sorted(filters.items()))
+    return dataset_artifact(name, lambda long_df: builder(analytics_source(None, filters)))
+
+def column_values(column):
+    """The sorted distinct values of `column` in the session's dataset, for the cohort filter."""
+    return dataset_artifact(f"values:{column}", lambda df: sorted(df[column].dropna().unique()))
+
+def cohort_metrics(filters=None):
+    """Student and record counts and mean marks and attendance of the filtered cohort."""
+    return _filtered_artifact("cohort_metrics", filters, lambda df: {
+        "students": df["reg_no"].nunique(),
+        "records": len(df),
+        "avg_marks": df["marks_pct"].mean(),
+        "avg_attendance": df["attendance"].mean(),
+    })
+
+def score_band_table(filters=None):
+    from src.analytics import score_band_counts
+    return _filtered_artifact("score_band_counts", filters, score_band_counts)
+
+def subject_summary_table(filters=None):
+    from src.analytics import subject_summary
+    return _analytics_artifact("subject_summary", filters, subject_summary)
+
+def ranked_students(filters=None):
+    from src.analytics import rank_students
+    return _analytics_artifact("rank_students", filters, rank_students)
+
+def student_aggregate_table(pass_mark, filters=None):
+    """The at-risk rule aggregates (see src/risk_rules.py), built once per pass mark and filter."""
+    from src.risk_rules import student_aggregates
+    return _analytics_artifact(f"student_aggregates|pass_mark={pass_mark}", filters, lambda df: student_aggregates(df, pass_mark))
+
+def cohort_sketches(filters=None):
+    """
+    The quantile sketches of the filtered cohort: selected from the
+    per-(class, term, subject) sketches when every filter is on one of their
+    keys, otherwise built from the filtered rows once per filter.
+    """
+    from src.quantiles import SKETCH_KEYS, build_sketches
+    filters = filters or {}
+    if all(column in SKETCH_KEYS for column in filters):
+        return quantile_sketches().where(**filters)
+    return _filtered_artifact("quantile_sketches", filters, build_sketches)
+
+def cohort_trajectory(filters=None):
+    """(summary, series) of student trajectories for the filtered cohort, as student_trajectory."""
+    if not filters:
+        return student_trajectory()
+    return _filtered_artifact("student_trajectory", filters, artifact_builder("student_trajectory"))
+
+def student_rows(long_df, reg_no):
+    """The rows of one student in the cleaned long_df, through a reg_no index built once per dataset."""
+    positions = dataset_artifact("student_rows", lambda df: df.groupby("reg_no", sort=False, observed=True).indices)
+    return long_df.iloc[positions.get(reg_no, [])]
+
+def sheet_subject_columns(sheet):
+    """
+    (subject columns, column decisions) inferred for `sheet` of the session's
+    Excel upload from its first batch of rows, the same batch cleaning infers
+    them from (see iter_excel_batches). Kept with the stored upload, so each
+    sheet is read once per file rather than on every rerun.
+    """
+    def build(payload):
+        import io
+        from src.data_cleaning import iter_excel_batches, normalize_columns
+        from src.column_inference import infer_subject_columns
+
+        batches = iter_excel_batches(io.BytesIO(payload["file_bytes"]), sheet)
+        try:
+            batch = next(batches, None)
+        finally:
+            batches.close()
+        if batch is None:
+            return [], []
+        return infer_subject_columns(normalize_columns(batch))
+    return dataset_store().artifact(st.session_state[RAW_KEY], f"subject_columns:{sheet}", build)
+
+def dataset_file_path(name):
+    """Path for a file derived from the session's cleaned dataset, kept next to it in the store."""
+    return dataset_store().file_path(st.session_state[DATASET_KEY], name)
+
+def export_download(layout, fmt):
+    """
+    Returns a callable for st.download_button's deferred `data`: on the first
+    download it writes the session's cleaned dataset in `layout` as a `fmt`
+    file next to the stored dataset, and later downloads from any session
+    send that file. It runs off the script thread, so it holds the dataset
+    key instead of reading session state.
+    """
+    key = st.session_state[DATASET_KEY]
+    store = dataset_store()
+
+    def build(payload):
+        from src.exports import write_export
+        return write_export(payload["long_df"], layout, fmt, store.file_path(key, f"cleaned_{layout}.{fmt}"))
+
+    def download():
+        with open(store.artifact(key, f"export:{layout}:{fmt}", build), "rb") as f:
+            return f.read()
+    return download
+
+def analytics_backend():
+    return os.environ.get("LUME_ANALYTICS_BACKEND", ANALYTICS_BACKEND).lower()
+
+def _artifact_builders():
+    builders = {name: artifact_builder(name) for name in ARTIFACT_BUILDERS}
+    if analytics_backend() == "sql":
+        from src.sql_backend import load_sql_dataset
+        builders["sql_dataset"] = load_sql_dataset
+    return builders
+
+def analytics_source(filtered_df, filters=None):
+    """
+    Returns what the summary analytics should run on: `filtered_df` itself,
+    or with the SQL backend enabled, the shared SQLite copy of the dataset
+    with the {column: value} `filters` that produced `filtered_df` pushed
+    down as predicates.
+    """
+    if analytics_backend() != "sql":
+        return filtered_df
+    from src.sql_backend import load_sql_dataset
+    source = dataset_artifact("sql_dataset", load_sql_dataset)
+    for column, value in (filters or {}).items():
+        source = source.where(column, value)
+    return source
+
+# Runs on the job executor: no Streamlit calls, results go straight into the store
+def _cleaning_job(job, key, holder, raw_df, extra_file_dfs, file_bytes, selected_sheets, clean_kwargs, max_marks_config):
+    import pandas as pd
+    from src.data_cleaning import ExcelSheetStream, clean_data, compute_percentage_column, find_dropped_rows
+    from src.quantiles import build_source_sketches
+
+    store = dataset_store()
+    # the selected sheets are streamed into cleaning batch by batch rather than loaded;
+    # raw_df, the first sheet read for the preview, is only cleaned for CSV uploads
+    sheet_streams = [ExcelSheetStream(file_bytes, sheet) for sheet in selected_sheets]
+    frames = [] if sheet_streams else [raw_df] + list(extra_file_dfs)
+    sources = frames + sheet_streams
+
+    cleaned_df, report = clean_data(
+        sources[0],
+        extra_dfs=sources[1:] or None,
+        checkpoint=job.checkpoint,
+        **clean_kwargs
+    )
+    job.checkpoint("Normalising marks to percentages")
+    cleaned_df = compute_percentage_column(cleaned_df, max_marks_config)
+    job.checkpoint("Building quantile sketches")
+    sketches = build_source_sketches(cleaned_df, report["source_rows"])
+    dropped_parts = [stream.dropped_rows(cleaned_df) for stream in sheet_streams]
+    if frames:
+        dropped_parts.append(find_dropped_rows(pd.concat(frames, ignore_index=True), cleaned_df))
+    dropped_df = pd.DataFrame()
+    dropped_parts = [df for df in dropped_parts if not df.empty]
+    if len(dropped_parts) > 1:
+        dropped_df = pd.concat(dropped_parts, ignore_index=True)
+    elif dropped_parts:
+        dropped_df = dropped_parts[0]
+
+    job.checkpoint("Saving cleaned dataset")
+    store.put(key, {
+        "long_df": cleaned_df,
+        "cleaning_report": report,
+        "dropped_df": dropped_df,
+    }, holder=holder)
+
+    # the sketches were merged from each source's; the other shared derived tables
+    # are built now so the summary pages open on lookups
+    store.artifact(key, "quantile_sketches", lambda payload: sketches)
+    for name, builder in _artifact_builders().items():
+        if name == "quantile_sketches":
+            continue
+        job.checkpoint(f"Building {name.replace('_', ' ')}")
+        store.artifact(key, name, lambda payload, builder=builder: builder(payload["long_df"]))
+    return key
+
+def start_cleaning_job(key, selected_sheets, clean_kwargs, max_marks_config, session_updates):
+    """
+    Submits cleaning of the session's upload as a background job and records
+    its id, replacing (and cancelling) any job the session already had.
+    `session_updates` are applied to session state once the job is collected.
+    """
+    previous = st.session_state.get(CLEANING_JOB)
+    if previous is not None:
+        cancel_job(previous)
+        discard_job(previous)
+
+    raw = raw_upload()
+    st.session_state[CLEANING_JOB] = submit_job(
+        _cleaning_job,
+        key, _session_id(), raw["raw_df"], raw.get("extra_dfs", []), raw["file_bytes"],
+        list(selected_sheets), clean_kwargs, max_marks_config,
+        label="Data cleaning"
+    )
+    st.session_state[CLEANING_JOB_UPDATES] = session_updates
+
+def cleaning_job():
+    job_id = st.session_state.get(CLEANING_JOB)
+    return get_job(job_id) if job_id is not None else None
+
+def cancel_cleaning_job():
+    job_id = st.session_state.get(CLEANING_JOB)
+    if job_id is not None:
+        cancel_job(job_id)
+
+def collect_cleaning_job():
+    """
+    Picks up the session's cleaning job if it has finished: attaches the
+    cleaned dataset on success and clears the job handle. Returns the
+    finished job (so callers can report errors) or None.
+    """
+    job = cleaning_job()
+    if job is None or not job.finished:
+        return None
+    discard_job(job.id)
+    st.session_state.pop(CLEANING_JOB, None)
+    updates = st.session_state.pop(CLEANING_JOB_UPDATES, {})
+    if job.status == JOB_DONE:
+        attach_dataset(job.result)
+        for name, value in updates.items():
+            st.session_state[name] = value
+        st.session_state.data_ready = True
+    return job
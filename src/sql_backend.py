@@ -0,0 +1,181 @@
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+TABLE = "records"
+INDEXED_COLUMNS = ["reg_no", "class", "term", "subject"]
+
+def _quote(column):
+    return '"' + str(column).replace('"', '""') + '"'
+
+# sqlite3 only binds plain Python scalars
+def _param(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+class SqlDataset:
+    """
+    A cleaned long_df loaded into an in-process SQLite database.
+
+    where() returns a narrowed view over the same connection instead of a
+    filtered copy; its predicates are pushed into every query run against
+    it. The connection is shared by all sessions holding the dataset, so
+    queries are serialised with a lock.
+    """
+
+    def __init__(self, connection, lock, columns, predicates=()):
+        self._connection = connection
+        self._lock = lock
+        self.columns = list(columns)
+        self.predicates = tuple(predicates)
+
+    def where(self, column, value):
+        if column not in self.columns:
+            raise ValueError(f"Unknown column: {column}")
+        return SqlDataset(self._connection, self._lock, self.columns,
+                          self.predicates + ((column, _param(value)),))
+
+    def _where(self, *conditions):
+        clauses = [f"{_quote(column)} = ?" for column, _ in self.predicates] + list(conditions)
+        params = [value for _, value in self.predicates]
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection, params=list(params))
+
+    def scalar(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, list(params)).fetchone()[0]
+
+    def __len__(self):
+        where, params = self._where()
+        return self.scalar(f"SELECT COUNT(*) FROM {TABLE} {where}", params)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def to_frame(self):
+        where, params = self._where()
+        return self.query(f"SELECT * FROM {TABLE} {where} ORDER BY rowid", params)
+
+    # Reported to the dataset store so the database counts against its memory budget
+    def __sizeof__(self):
+        with self._lock:
+            pages = self._connection.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._connection.execute("PRAGMA page_size").fetchone()[0]
+        return pages * page_size
+
+def load_sql_dataset(long_df):
+    """
+    Loads a cleaned long_df into a new in-memory SQLite database, indexed on
+    reg_no, class, term and subject. Row order is kept as rowid so "first"
+    aggregations match their pandas counterparts.
+    """
+    frame = pd.DataFrame({
+        column: values.astype("float64") if pd.api.types.is_numeric_dtype(values)
+        else values.astype(object).where(values.notna(), None)
+        for column, values in long_df.items()
+    })
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    frame.to_sql(TABLE, connection, index=False)
+    for column in INDEXED_COLUMNS:
+        if column in frame.columns:
+            connection.execute(f"CREATE INDEX idx_{column} ON {TABLE} ({_quote(column)})")
+    connection.execute(f"ANALYZE {TABLE}")
+    connection.commit()
+    return SqlDataset(connection, threading.Lock(), frame.columns)
+
+# The SQL for student_summary: pandas "first" takes the first non-null value
+# in row order, so each such column is looked up by its earliest non-null rowid
+def _student_summary_sql(data):
+    where, params = data._where()
+    sql = f"""
+        SELECT s.reg_no, n.student_name, c."class" AS class_, t.term,
+               s.subjects_taken, s.avg_marks, s.avg_attendance
+        FROM (
+            SELECT reg_no,
+                   MIN(CASE WHEN student_name IS NOT NULL THEN rowid END) AS name_row,
+                   MIN(CASE WHEN "class" IS NOT NULL THEN rowid END) AS class_row,
+                   MIN(CASE WHEN term IS NOT NULL THEN rowid END) AS term_row,
+                   COUNT(DISTINCT subject) AS subjects_taken,
+                   AVG(marks_pct) AS avg_marks,
+                   AVG(attendance) AS avg_attendance
+            FROM {TABLE} {where}
+            GROUP BY reg_no
+        ) s
+        LEFT JOIN {TABLE} n ON n.rowid = s.name_row
+        LEFT JOIN {TABLE} c ON c.rowid = s.class_row
+        LEFT JOIN {TABLE} t ON t.rowid = s.term_row
+    """
+    return sql, params
+
+def subject_summary(data):
+    where, params = data._where("subject IS NOT NULL")
+    return data.query(f"""
+        SELECT subject,
+               COUNT(DISTINCT reg_no) AS students,
+               AVG(marks_pct) AS avg_marks,
+               AVG(attendance) AS avg_attendance
+        FROM {TABLE} {where}
+        GROUP BY subject
+        ORDER BY subject
+    """, params)
+
+def student_summary(data):
+    sql, params = _student_summary_sql(data)
+    return data.query(f"{sql} ORDER BY s.reg_no", params)
+
+def at_risk_students(data, pass_mark, attendance_threshold=75):
+    # the rule engine runs its aggregate groupings through student_aggregate_parts below
+    from src.risk_rules import flagged_students
+    from src.schema import RISK_RULES
+    return flagged_students(data, RISK_RULES, pass_mark, attendance_threshold)
+
+def student_aggregate_parts(data, pass_mark):
+    """
+    The two groupings behind the at-risk rule aggregates (see
+    risk_rules.student_aggregates): per-student totals indexed by reg_no,
+    and per-(reg_no, term) mean marks and attendance.
+    """
+    where, params = data._where()
+    summary = data.query(f"""
+        SELECT s.reg_no, n.student_name, s.avg_marks, s.avg_attendance, s.subjects_taken, s.failed_subjects
+        FROM (
+            SELECT reg_no,
+                   MIN(CASE WHEN student_name IS NOT NULL THEN rowid END) AS name_row,
+                   AVG(marks_pct) AS avg_marks,
+                   AVG(attendance) AS avg_attendance,
+                   COUNT(DISTINCT subject) AS subjects_taken,
+                   SUM(CASE WHEN marks_pct < ? THEN 1 ELSE 0 END) AS failed_subjects
+            FROM {TABLE} {where}
+            GROUP BY reg_no
+        ) s
+        LEFT JOIN {TABLE} n ON n.rowid = s.name_row
+        ORDER BY s.reg_no
+    """, [_param(pass_mark)] + params).set_index("reg_no")
+
+    term_where, term_params = data._where("term IS NOT NULL")
+    by_term = data.query(f"""
+        SELECT reg_no, CAST(term AS TEXT) AS term, AVG(marks_pct) AS marks_pct, AVG(attendance) AS attendance
+        FROM {TABLE} {term_where}
+        GROUP BY reg_no, term
+    """, term_params).set_index(["reg_no", "term"]).astype("float64")
+    return summary, by_term
+
+def rank_students(data):
+    sql, params = _student_summary_sql(data)
+    where, where_params = data._where()
+    marked_where, marked_params = data._where("marks IS NOT NULL")
+    return data.query(f"""
+        WITH summary AS ({sql}),
+        complete AS (
+            SELECT reg_no FROM {TABLE} {marked_where}
+            GROUP BY reg_no
+            HAVING COUNT(DISTINCT subject) = (SELECT COUNT(DISTINCT subject) FROM {TABLE} {where})
+        )
+        SELECT summary.*, DENSE_RANK() OVER (ORDER BY avg_marks DESC) AS rank
+        FROM summary JOIN complete USING (reg_no)
+        ORDER BY rank, reg_no
+    """, params + marked_params + where_params)
@@ -0,0 +1,100 @@
+import bisect
+from itertools import chain
+from src.schema import STUDENT_SEARCH_LIMIT
+
+def build_student_index(df):
+    """
+    Builds a lookup index over reg_no and student_name for the student picker.
+
+    The index holds one label per student (sorted by reg_no), a sorted list of
+    prefix keys (the reg_no and every name token) for bisect-based prefix search,
+    and a trigram map for substring search. It is built once per cleaned dataset
+    so the picker never has to rebuild or send the full label list.
+    """
+    students = (
+        df[["reg_no", "student_name"]]
+        .dropna(subset=["reg_no"])
+        .drop_duplicates(subset="reg_no")
+        .sort_values("reg_no")
+    )
+    reg_nos = students["reg_no"].astype(str).tolist()
+    names = students["student_name"].astype(object).fillna("").astype(str).tolist()
+
+    labels = []
+    search_text = []
+    prefix_entries = []
+    trigrams = {}
+    for pos, (reg_no, name) in enumerate(zip(reg_nos, names)):
+        labels.append(f"{reg_no} - {name}")
+        text = f"{reg_no.lower()} {name.lower()}"
+        search_text.append(text)
+
+        prefix_entries.append((reg_no.lower(), pos))
+        for token in name.lower().split():
+            prefix_entries.append((token, pos))
+
+        for i in range(len(text) - 2):
+            trigrams.setdefault(text[i:i + 3], []).append(pos)
+
+    prefix_entries.sort()
+
+    return {
+        "reg_nos": reg_nos,
+        "labels": labels,
+        "search_text": search_text,
+        "prefix_keys": [key for key, _ in prefix_entries],
+        "prefix_positions": [pos for _, pos in prefix_entries],
+        "trigrams": {gram: sorted(set(positions)) for gram, positions in trigrams.items()},
+    }
+
+# Students whose reg_no or any name token starts with the query, in key order
+def _prefix_matches(index, query):
+    keys = index["prefix_keys"]
+    positions = index["prefix_positions"]
+    start = bisect.bisect_left(keys, query)
+    for i in range(start, len(keys)):
+        if not keys[i].startswith(query):
+            break
+        yield positions[i]
+
+# Students whose "reg_no name" text contains the query, narrowed through the trigram map
+def _substring_matches(index, query):
+    if len(query) < 3:
+        return []
+    grams = {query[i:i + 3] for i in range(len(query) - 2)}
+    postings = [index["trigrams"].get(gram) for gram in grams]
+    if any(p is None for p in postings):
+        return []
+    postings.sort(key=len)
+    candidates = set(postings[0])
+    for p in postings[1:]:
+        candidates.intersection_update(p)
+        if not candidates:
+            return []
+    search_text = index["search_text"]
+    return sorted(pos for pos in candidates if query in search_text[pos])
+
+def search_students(index, query, limit=STUDENT_SEARCH_LIMIT):
+    """
+    Returns up to `limit` (reg_no, label) tuples matching the query.
+
+    Prefix matches on reg_no or a name token rank first (an exact key sorts
+    ahead of its longer extensions), then substring matches anywhere in
+    "reg_no name". An empty query returns the first students by reg_no.
+    """
+    query = " ".join(str(query).lower().split()) if query else ""
+
+    if not query:
+        ranked = list(range(min(limit, len(index["labels"]))))
+    else:
+        ranked = []
+        seen = set()
+        for pos in chain(_prefix_matches(index, query), _substring_matches(index, query)):
+            if pos in seen:
+                continue
+            seen.add(pos)
+            ranked.append(pos)
+            if len(ranked) >= limit:
+                break
+
+    return [(index["reg_nos"][pos], index["labels"][pos]) for pos in ranked]
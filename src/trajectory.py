@@ -0,0 +1,116 @@
+import re
+import numpy as np
+import pandas as pd
+
+TRAJECTORY_MIN_TERMS = 2  # terms needed before a slope is reported
+
+# Natural sort key so "Sem 10" follows "Sem 9" rather than "Sem 1"
+def _term_sort_key(term):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", str(term))]
+
+def order_terms(terms):
+    return sorted({str(t) for t in terms if pd.notna(t)}, key=_term_sort_key)
+
+def batched_slopes(y):
+    """
+    Least-squares slope of each row of `y` (rows x terms, NaN = missing)
+    against the term position 0..T-1.
+
+    The 2x2 normal equations of every row are stacked and solved in a single
+    np.linalg.solve call; rows with fewer than TRAJECTORY_MIN_TERMS observed
+    terms get NaN.
+    """
+    observed = ~np.isnan(y)
+    x = np.broadcast_to(np.arange(y.shape[1], dtype="float64"), y.shape)
+    y0 = np.where(observed, y, 0.0)
+    x0 = np.where(observed, x, 0.0)
+
+    n = observed.sum(axis=1).astype("float64")
+    sx = x0.sum(axis=1)
+    sxx = (x0 * x0).sum(axis=1)
+    sy = y0.sum(axis=1)
+    sxy = (x0 * y0).sum(axis=1)
+
+    valid = n >= TRAJECTORY_MIN_TERMS
+    lhs = np.empty((len(y), 2, 2))
+    lhs[:, 0, 0] = n
+    lhs[:, 0, 1] = sx
+    lhs[:, 1, 0] = sx
+    lhs[:, 1, 1] = sxx
+    rhs = np.stack([sy, sxy], axis=1)[..., None]
+    # rows that cannot be solved get the identity so the batch stays non-singular
+    lhs[~valid] = np.eye(2)
+    rhs[~valid] = 0.0
+
+    solution = np.linalg.solve(lhs, rhs)[..., 0]
+    slopes = solution[:, 1]
+    slopes[~valid] = np.nan
+    return slopes
+
+def _trajectories(df, keys):
+    terms = order_terms(df["term"])
+    data = df.dropna(subset=["term"]).assign(term=lambda d: d["term"].astype(str))
+
+    matrix = (
+        data.groupby(keys + ["term"], observed=True)["marks_pct"]
+        .mean()
+        .astype("float64")
+        .unstack("term")
+        .reindex(columns=terms)
+    )
+    y = matrix.to_numpy(dtype="float64", na_value=np.nan)
+
+    # term-over-term delta against the previous observed term, not just the adjacent column
+    previous = matrix.ffill(axis=1).shift(1, axis=1).to_numpy(dtype="float64", na_value=np.nan)
+    deltas = y - previous
+
+    observed = ~np.isnan(y)
+    has_obs = observed.any(axis=1)
+    last_idx = np.where(has_obs, y.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1), 0)
+    first_idx = np.where(has_obs, np.argmax(observed, axis=1), 0)
+    rows = np.arange(len(y))
+
+    summary = pd.DataFrame(index=matrix.index)
+    summary["terms_observed"] = observed.sum(axis=1)
+    summary["first_pct"] = np.where(has_obs, y[rows, first_idx], np.nan)
+    summary["last_pct"] = np.where(has_obs, y[rows, last_idx], np.nan)
+    summary["latest_delta"] = np.where(has_obs, deltas[rows, last_idx], np.nan)
+    summary["slope"] = batched_slopes(y)
+
+    series = pd.DataFrame({
+        "marks_pct": y.ravel(),
+        "delta": deltas.ravel(),
+    }, index=pd.MultiIndex.from_arrays(
+        [np.repeat(matrix.index.get_level_values(k).to_numpy(), len(terms)) for k in keys]
+        + [np.tile(np.array(terms, dtype=object), len(matrix))],
+        names=keys + ["term"]
+    ))
+    series = series[~np.isnan(series["marks_pct"].to_numpy())]
+    series.insert(0, "term_index", np.tile(np.arange(len(terms)), len(matrix))[observed.ravel()])
+
+    return summary, series
+
+def student_trajectories(df):
+    """
+    Per-student trajectory of the mean marks_pct across terms.
+
+    Returns (summary, series): `summary` is indexed by reg_no with the number
+    of observed terms, first/last term percentage, the latest term-over-term
+    delta and the least-squares slope (percentage points per term); `series`
+    is indexed by (reg_no, term) with term_index, marks_pct and delta.
+    """
+    summary, series = _trajectories(df, ["reg_no"])
+    names = df.groupby("reg_no", observed=True)["student_name"].first()
+    summary.insert(0, "student_name", names.reindex(summary.index))
+    return summary, series
+
+def subject_trajectories(df):
+    """
+    Per-(student, subject) trajectory across terms, in the same layout as
+    student_trajectories with (reg_no, subject) as the key.
+    """
+    return _trajectories(df, ["reg_no", "subject"])
+
+def most_declining(summary, n=10, min_terms=TRAJECTORY_MIN_TERMS):
+    declining = summary[(summary["terms_observed"] >= min_terms) & (summary["slope"] < 0)]
+    return declining.sort_values(["slope", "latest_delta"]).head(n).reset_index()
@@ -1,5 +1,8 @@
+import functools
+import time
 import streamlit as st
-import pandas as pd
+
+SECTION_TIMINGS = "section_timings"
 
 def inject_font():
     st.markdown("""
@@ -59,7 +62,7 @@ def render_sidebar():
         
         st.divider()
         with st.expander("SYSTEM DOCUMENTATION"):
-            st.markdown("- **Input:** CSV or Excel\n- **Processing:** Heuristic Mapping\n- **Export:** PDF/CSV Supported")
+            st.markdown("- **Input:** CSV or Excel\n- **Processing:** Heuristic Mapping\n- **Export:** CSV, Excel, Parquet, HTML reports (ZIP)")
 
         st.markdown(
             "<div style='margin-top: 50%; font-size: 0.8rem; color: gray; opacity: 0.6;'>"
@@ -70,7 +73,34 @@ def render_sidebar():
         )
     return context_area
 
+def dashboard_section(name, fragment=False):
+    """
+    Marks a page section, keeping the duration of each run in
+    st.session_state[SECTION_TIMINGS][name]. Sections read their tables
+    through the cohort artifacts in src/session_data.py, so a rerun whose
+    inputs did not change is a lookup.
+
+    A section with widgets of its own is made a fragment (fragment=True):
+    those widgets rerun only this section, called again with the arguments
+    of its last run, so everything it reads from the rest of the page has
+    to be passed in.
+    """
+    def decorate(render):
+        @functools.wraps(render)
+        def section(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return render(*args, **kwargs)
+            finally:
+                st.session_state.setdefault(SECTION_TIMINGS, {})[name] = time.perf_counter() - start
+        return st.fragment(section) if fragment else section
+    return decorate
+
 def render_cleaning_report(report, dropped_df=None):
+    import pandas as pd
+    from src.data_profile import quality_by, offending_values, above_max_distribution
+    from src.schema import ANOMALY_Z_THRESHOLD, CLASS_SHIFT_THRESHOLD
+
     rows_before = report["rows_before"]
     rows_after = report["rows_after"]
     rows_dropped = report["rows_dropped"]
@@ -152,11 +182,112 @@ def render_cleaning_report(report, dropped_df=None):
         st.divider()
 
         _dropped_count = len(dropped_df) if dropped_df is not None and not dropped_df.empty else 0
-        tab_summary, tab_dropped = st.tabs(["📊 Summary", f"🗑️ Dropped Rows ({_dropped_count:,})"])
+        _decisions = report.get("column_decisions", [])
+        _excluded_count = sum(1 for d in _decisions if not d["included"])
+        _by_subject = quality_by(report, "subject")
+        _issue_count = (
+            int(_by_subject[["missing", "non_numeric", "out_of_range"]].to_numpy().sum()) if _by_subject is not None else 0
+        )
+        _anomalies = report.get("anomalies")
+        _flagged_count = len(_anomalies["outliers"]) + len(_anomalies["class_shifts"]) if _anomalies else 0
+        tab_summary, tab_quality, tab_anomalies, tab_dropped, tab_columns = st.tabs([
+            "📊 Summary", f"🔬 Data Quality ({_issue_count:,} issues)", f"🚩 Anomalies ({_flagged_count:,})",
+            f"🗑️ Dropped Rows ({_dropped_count:,})", f"🧭 Column Detection ({_excluded_count:,} excluded)"
+        ])
 
         with tab_summary:
             st.markdown(_summary_html, unsafe_allow_html=True)
 
+        with tab_quality:
+            if _by_subject is not None:
+                st.caption(
+                    "Marks and attendance as uploaded, before cleaning: missing entries, values that are not plain "
+                    "numbers (e.g. \"AB\" or \"78 marks\"; a number is still extracted where possible), and values "
+                    "outside the valid range, which are cleared."
+                )
+                _quality_columns = {
+                    "subject": "Subject", "class": "Class", "entries": "Entries", "missing": "Missing",
+                    "missing_rate": "Missing %", "non_numeric": "Non-numeric", "out_of_range": "Out of Range",
+                    "above_max": "Above Max", "attendance_entries": "Attendance Entries",
+                    "attendance_missing": "Attendance Missing", "attendance_non_numeric": "Attendance Non-numeric",
+                    "attendance_out_of_range": "Attendance Out of Range",
+                }
+                _percent = st.column_config.NumberColumn("Missing %", format="percent")
+                st.markdown("**By subject**")
+                st.dataframe(
+                    _by_subject.rename(columns=_quality_columns),
+                    use_container_width=True, hide_index=True, column_config={"Missing %": _percent}
+                )
+                st.markdown("**By class**")
+                st.dataframe(
+                    quality_by(report, "class").rename(columns=_quality_columns),
+                    use_container_width=True, hide_index=True, column_config={"Missing %": _percent}
+                )
+
+                _offending = offending_values(report)
+                st.markdown("**Non-numeric values**")
+                if _offending.empty:
+                    st.info("Every mark and attendance value was a plain number.")
+                else:
+                    st.dataframe(
+                        _offending.rename(columns={
+                            "column": "Column", "non_numeric": "Non-numeric", "samples": "Most Frequent Values (count)"
+                        }),
+                        use_container_width=True, hide_index=True
+                    )
+
+                _above_max = above_max_distribution(report)
+                st.markdown("**Marks above the maximum**")
+                if _above_max.empty:
+                    st.info("No marks exceeded the maximum.")
+                else:
+                    st.dataframe(
+                        _above_max.pivot_table(index="marks", columns="subject", values="count", aggfunc="sum", fill_value=0)
+                        .rename_axis(index="Mark", columns=None).reset_index(),
+                        use_container_width=True, hide_index=True
+                    )
+            else:
+                st.info("No data-quality profile is available for this dataset.")
+
+        with tab_anomalies:
+            if _anomalies:
+                st.caption(
+                    "Valid marks that look like data-entry errors. Each mark is compared with the median of its "
+                    f"class, term and subject (robust z-score, median / MAD); beyond ±{ANOMALY_Z_THRESHOLD} it is "
+                    "listed below, e.g. a 9 keyed in for a 90. These marks are kept; check them against the source."
+                )
+                st.markdown("**Class-level shifts**")
+                if _anomalies["class_shifts"].empty:
+                    st.info("No class's marks stand out from the other sections.")
+                else:
+                    st.caption(
+                        f"Classes whose median mark sits more than {CLASS_SHIFT_THRESHOLD} robust standard deviations "
+                        "from the other sections' in the same term and subject, e.g. a whole class entered against "
+                        "the wrong subject. With two sections both are listed."
+                    )
+                    st.dataframe(
+                        _anomalies["class_shifts"].rename(columns={
+                            "term": "Term", "subject": "Subject", "class": "Class", "students": "Marks",
+                            "class_median": "Class Median", "others_median": "Other Sections' Median",
+                            "shift": "Shift (SD)"
+                        }),
+                        use_container_width=True, hide_index=True
+                    )
+                st.markdown("**Unusual marks**")
+                if _anomalies["outliers"].empty:
+                    st.info("No mark is far from the rest of its class.")
+                else:
+                    st.dataframe(
+                        _anomalies["outliers"].rename(columns={
+                            "reg_no": "Reg No", "student_name": "Name", "class": "Class", "term": "Term",
+                            "subject": "Subject", "marks": "Marks", "group_median": "Class Median",
+                            "robust_z": "Robust Z"
+                        }),
+                        use_container_width=True, hide_index=True
+                    )
+            else:
+                st.info("No anomaly check is available for this dataset.")
+
         with tab_dropped:
             if dropped_df is not None and not dropped_df.empty:
                 st.caption(
@@ -165,4 +296,25 @@ def render_cleaning_report(report, dropped_df=None):
                 )
                 st.dataframe(dropped_df, use_container_width=True, hide_index=True)
             else:
-                st.info("No rows were dropped, or dropped row details are unavailable.")
\ No newline at end of file
+                st.info("No rows were dropped, or dropped row details are unavailable.")
+
+        with tab_columns:
+            if _decisions:
+                st.caption(
+                    "In auto mode each non-ID column is classified from a sample of its values. Only mark columns "
+                    "are treated as subjects; percentages, extra identifiers and free text (remarks, dates) are "
+                    "excluded before reshaping. Percentage columns are used as subjects only when no plain mark "
+                    "columns exist."
+                )
+                st.dataframe(
+                    pd.DataFrame(_decisions)
+                    .assign(included=lambda d: d["included"].map({True: "✅ Subject", False: "— Excluded"}))
+                    .rename(columns={
+                        "column": "Column", "kind": "Detected As", "sampled": "Values Sampled",
+                        "numeric_share": "Numeric Share", "included": "Used As"
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.info("Column detection applies to auto mode only — subject columns were chosen manually.")
\ No newline at end of file
@@ -66,35 +66,8 @@ def performance_category_donut(perf_dict):
     fig.update_layout(height=380)
     return fig
 
-def subject_performance_heatmap(cleaned_df):
-    df = cleaned_df.copy()
-
-    df = df.dropna(subset=["marks_pct", "subject", "reg_no"])
-
-    # Fixed percentage-based bins — works regardless of per-subject max marks
-    bins = [0, 40, 60, 75, 90, 100]
-    labels = ["0–40", "41–60", "61–75", "76–90", "91–100"]
-
-    df["score_band"] = pd.Categorical(
-        pd.cut(df["marks_pct"], bins=bins, labels=labels, include_lowest=True),
-        categories=labels,
-        ordered=True
-    )
-
-    heatmap_df = (
-        df.groupby(["score_band", "subject"], observed=False)["reg_no"]
-        .nunique()
-        .reset_index(name="student_count")
-    )
-
-    pivot_df = (
-        heatmap_df
-        .pivot(index="score_band", columns="subject", values="student_count")
-        .reindex(labels)          # enforce correct row order
-        .fillna(0)
-        .astype(int)
-    )
-
+# pivot_df is score_band_counts' table of students per score band and subject
+def subject_performance_heatmap(pivot_df):
     fig = px.imshow(
         pivot_df,
         text_auto=True,
@@ -164,4 +137,135 @@ def at_risk_scatter(at_risk_df, pass_mark=35, attendance_threshold=75):
         height=380
     )
 
-    return fig
\ No newline at end of file
+    return fig
+
+def student_trajectory_line(trajectory_df, cohort_df=None):
+    fig = px.line(
+        trajectory_df,
+        x="term",
+        y="marks_pct",
+        markers=True,
+        title="Term-wise Average Marks",
+        labels={"term": "Term", "marks_pct": "Average Marks (%)"},
+    )
+    fig.update_traces(name="Student", showlegend=True)
+
+    if cohort_df is not None and not cohort_df.empty:
+        fig.add_scatter(
+            x=cohort_df["term"],
+            y=cohort_df["marks_pct"],
+            mode="lines",
+            name="Cohort Average",
+            line=dict(dash="dash", color="gray"),
+        )
+
+    fig.update_layout(
+        yaxis_range=[MARKS_MIN, MARKS_MAX + 5],
+        height=380,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
+    )
+    return fig
+
+def subject_percentile_bands(bands_df):
+    df = bands_df.sort_values("p50")
+    fig = px.bar(
+        df,
+        x=df["p90"] - df["p10"],
+        y="subject",
+        base="p10",
+        orientation="h",
+        title="Subject Percentile Bands",
+        labels={"x": "Marks (%)", "subject": "Subject"},
+    )
+    fig.update_traces(name="P10–P90", marker_color="rgba(99, 153, 34, 0.35)", showlegend=True,
+                      hovertemplate="%{y}: %{base:.1f}–%{customdata:.1f}%", customdata=df["p90"])
+    fig.add_bar(
+        x=df["p75"] - df["p25"],
+        y=df["subject"],
+        base=df["p25"],
+        orientation="h",
+        name="P25–P75",
+        marker_color="rgba(99, 153, 34, 0.8)",
+        customdata=df["p75"],
+        hovertemplate="%{y}: %{base:.1f}–%{customdata:.1f}%",
+    )
+    fig.add_scatter(
+        x=df["p50"],
+        y=df["subject"],
+        mode="markers",
+        name="Median",
+        marker=dict(symbol="line-ns-open", size=16, color="white"),
+        hovertemplate="%{y}: median %{x:.1f}%",
+    )
+    fig.update_layout(
+        barmode="overlay",
+        xaxis_range=[MARKS_MIN, MARKS_MAX],
+        height=max(320, 28 * len(df) + 120),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.25, xanchor="center", x=0.5),
+    )
+    return fig
+
+def class_comparison_heatmap(comparison_df):
+    # class labels may be numeric when a section column is mapped as the class
+    df = comparison_df.assign(pair=comparison_df["class_a"].astype(str) + " vs " + comparison_df["class_b"].astype(str))
+    effect = df.pivot(index="subject", columns="pair", values="effect_size")
+    marker = df.assign(mark=df["significant"].map({True: "*", False: ""})) \
+        .pivot(index="subject", columns="pair", values="mark").reindex_like(effect).fillna("")
+    limit = max(float(effect.abs().max().max()), 0.2) if effect.notna().any().any() else 1.0
+
+    fig = px.imshow(
+        effect,
+        aspect="auto",
+        color_continuous_scale="RdBu",
+        zmin=-limit,
+        zmax=limit,
+        labels={"x": "Class Pair", "y": "Subject", "color": "Effect Size (d)"}
+    )
+    fig.update_traces(text=(effect.round(2).astype(str) + marker).where(effect.notna(), "").to_numpy(),
+                      texttemplate="%{text}")
+    fig.update_layout(
+        title="Class Differences by Subject (Cohen's d)",
+        height=max(320, 28 * len(effect) + 120),
+    )
+    return fig
+
+def subject_correlation_heatmap(corr_df):
+    fig = px.imshow(
+        corr_df,
+        text_auto=".2f" if len(corr_df) <= 20 else False,
+        aspect="auto",
+        color_continuous_scale="RdBu",
+        zmin=-1,
+        zmax=1,
+        labels={"x": "Subject", "y": "Subject", "color": "Correlation"}
+    )
+    fig.update_layout(
+        title="Subject Correlation Matrix",
+        height=max(420, 24 * len(corr_df) + 160),
+    )
+    return fig
+
+def at_risk_threshold_sweep(pass_marks, by_pass_mark, thresholds, by_attendance, pass_mark=35, attendance_threshold=75):
+    df = pd.concat([
+        pd.DataFrame({"threshold": pass_marks, "students": by_pass_mark,
+                      "curve": f"Pass mark varies (attendance threshold {attendance_threshold}%)"}),
+        pd.DataFrame({"threshold": thresholds, "students": by_attendance,
+                      "curve": f"Attendance threshold varies (pass mark {pass_mark}%)"}),
+    ])
+    fig = px.line(
+        df,
+        x="threshold",
+        y="students",
+        color="curve",
+        labels={"threshold": "Threshold (%)", "students": "Students At Risk", "curve": ""},
+        title="At-Risk Students Across Thresholds",
+        color_discrete_sequence=["#E05C5C", "orange"]
+    )
+    fig.add_vline(x=pass_mark, line_dash="dash", line_color="#E05C5C")
+    fig.add_vline(x=attendance_threshold, line_dash="dash", line_color="orange")
+    fig.update_layout(
+        xaxis_range=[min(MARKS_MIN, ATTENDANCE_MIN), max(MARKS_MAX, ATTENDANCE_MAX)],
+        height=380,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.35, xanchor="center", x=0.5),
+    )
+    return fig
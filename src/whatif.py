@@ -0,0 +1,79 @@
+import numpy as np
+from src.schema import MARKS_MIN, MARKS_MAX, ATTENDANCE_MIN, ATTENDANCE_MAX
+
+class ThresholdGrid:
+    """
+    At-risk counts (avg_marks < pass mark OR avg_attendance < attendance
+    threshold) for every pair of whole-number thresholds, from one pass over
+    the student summary.
+
+    grid[p, a] counts the students with avg_marks < MARKS_MIN + p and
+    avg_attendance < ATTENDANCE_MIN + a; it is a 2-D prefix sum of a
+    histogram of the smallest threshold each student falls below. The
+    sorted averages answer the one-sided counts by binary search for any
+    threshold.
+    """
+
+    def __init__(self, summary):
+        self.summary = summary.reset_index(drop=True)
+        self.marks = self.summary["avg_marks"].to_numpy(dtype="float64", na_value=np.nan)
+        self.attendance = self.summary["avg_attendance"].to_numpy(dtype="float64", na_value=np.nan)
+        self.sorted_marks = np.sort(self.marks[~np.isnan(self.marks)])
+        self.sorted_attendance = np.sort(self.attendance[~np.isnan(self.attendance)])
+
+        marks_steps = MARKS_MAX - MARKS_MIN + 1
+        attendance_steps = ATTENDANCE_MAX - ATTENDANCE_MIN + 1
+        # smallest whole threshold step each average is below; missing or out of range
+        # values go to the overflow row / column, which no threshold reaches
+        marks_idx = self._first_step_below(self.marks, MARKS_MIN, marks_steps)
+        attendance_idx = self._first_step_below(self.attendance, ATTENDANCE_MIN, attendance_steps)
+        histogram = np.bincount(
+            marks_idx * (attendance_steps + 1) + attendance_idx,
+            minlength=(marks_steps + 1) * (attendance_steps + 1)
+        ).reshape(marks_steps + 1, attendance_steps + 1)
+        self.grid = histogram.cumsum(axis=0).cumsum(axis=1)[:marks_steps, :attendance_steps]
+
+    @staticmethod
+    def _first_step_below(values, minimum, steps):
+        with np.errstate(invalid="ignore"):
+            idx = np.floor(values - minimum) + 1
+        return np.where(np.isnan(idx), steps, np.clip(idx, 0, steps)).astype("int64")
+
+    def __len__(self):
+        return len(self.summary)
+
+    def marks_below(self, pass_mark):
+        return int(np.searchsorted(self.sorted_marks, pass_mark, side="left"))
+
+    def attendance_below(self, attendance_threshold):
+        return int(np.searchsorted(self.sorted_attendance, attendance_threshold, side="left"))
+
+    def count(self, pass_mark, attendance_threshold):
+        """Students at risk at these (whole-number) thresholds."""
+        p = int(np.clip(pass_mark - MARKS_MIN, 0, self.grid.shape[0] - 1))
+        a = int(np.clip(attendance_threshold - ATTENDANCE_MIN, 0, self.grid.shape[1] - 1))
+        both = self.grid[p, a]
+        return self.marks_below(pass_mark) + self.attendance_below(attendance_threshold) - int(both)
+
+    def sweep(self, pass_mark, attendance_threshold):
+        """
+        At-risk counts for every pass mark at this attendance threshold, and
+        for every attendance threshold at this pass mark, as
+        (pass marks, counts, attendance thresholds, counts).
+        """
+        pass_marks = np.arange(MARKS_MIN, MARKS_MAX + 1)
+        thresholds = np.arange(ATTENDANCE_MIN, ATTENDANCE_MAX + 1)
+        marks_counts = np.searchsorted(self.sorted_marks, pass_marks, side="left")
+        attendance_counts = np.searchsorted(self.sorted_attendance, thresholds, side="left")
+
+        a = int(np.clip(attendance_threshold - ATTENDANCE_MIN, 0, self.grid.shape[1] - 1))
+        p = int(np.clip(pass_mark - MARKS_MIN, 0, self.grid.shape[0] - 1))
+        by_pass_mark = marks_counts + self.attendance_below(attendance_threshold) - self.grid[:, a]
+        by_attendance = self.marks_below(pass_mark) + attendance_counts - self.grid[p, :]
+        return pass_marks, by_pass_mark, thresholds, by_attendance
+
+    def students(self, pass_mark, attendance_threshold):
+        """Rows of the student summary at risk at these thresholds."""
+        with np.errstate(invalid="ignore"):
+            mask = (self.marks < pass_mark) | (self.attendance < attendance_threshold)
+        return self.summary[mask]
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from src.columnar import open_frame, write_frame
+
+def _is_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+def test_string_columns_open_as_categoricals_over_mapped_codes(tmp_path):
+    df = pd.DataFrame({
+        "reg_no": [f"U{i:04d}" for i in range(300)][::-1],
+        "class": ["BCA-B", "BCA-A", np.nan] * 100,
+        "marks_pct": np.linspace(0, 100, 300),
+    })
+    write_frame(df, tmp_path)
+    opened = open_frame(tmp_path)
+
+    for column in ["reg_no", "class"]:
+        values = opened[column].array
+        assert isinstance(values, pd.Categorical)
+        assert _is_mapped(values.codes)
+        assert list(values.categories) == sorted(df[column].dropna().unique())
+    pd.testing.assert_frame_equal(opened.astype({"reg_no": object, "class": object}), df, check_dtype=False)
@@ -0,0 +1,27 @@
+import io
+
+from src.data_cleaning import clean_data, load_data
+
+# Enough rows that the last one falls well past pyarrow's first block (about 1 MB)
+ROWS = 100_000
+
+def _upload(text, name):
+    uploaded = io.BytesIO(text.encode())
+    uploaded.name = name
+    return uploaded
+
+def test_csv_text_after_first_block_is_read():
+    lines = ["Reg No,Student Name,Class,Term,Attendance,Maths"]
+    lines += [f"{i:06d},Asha,A,Sem 1,90,{i % 101}" for i in range(ROWS)]
+    lines.append("999999,Ravi,A,Sem 1,AB,85%")
+    df = load_data(_upload("\n".join(lines) + "\n", "late_text.csv"))
+
+    assert len(df) == ROWS + 1
+    assert df["Reg No"].iloc[0] == "000000"
+    assert df["Attendance"].iloc[-1] == "AB"
+    assert df["Maths"].iloc[-1] == "85%"
+
+    long_df, _ = clean_data(df, marks_range=100)
+    last = long_df.loc[long_df["reg_no"] == "999999"].iloc[0]
+    assert last["marks"] == 85
+    assert long_df.loc[long_df["reg_no"] == "000007", "marks"].iloc[0] == 7
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import clean_data, compute_percentage_column
+from src.quantiles import build_sketches, build_source_sketches
+
+def _semester(term, students, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Reg No": [f"U{i:04d}" for i in range(students)],
+        "Student Name": [f"Student {i}" for i in range(students)],
+        "Class": rng.choice(["BCA-A", "BCA-B"], students),
+        "Term": term,
+        "Attendance": rng.integers(40, 101, students),
+        "Maths": rng.integers(0, 101, students),
+        "Physics": rng.integers(0, 101, students),
+    })
+
+def _assert_same(merged, whole):
+    pd.testing.assert_frame_equal(merged.keys, whole.keys)
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+
+def test_merged_term_sketches_equal_whole_table():
+    df = pd.concat([_semester(term, 300, seed) for seed, term in enumerate(["Sem 1", "Sem 2", "Sem 3"])], ignore_index=True)
+    long_df, _ = clean_data(df, marks_range=100)
+    long_df = compute_percentage_column(long_df, 100)
+
+    parts = [build_sketches(part) for _, part in long_df.groupby("term")]
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+    _assert_same(merged, build_sketches(long_df))
+
+def test_source_sketches_equal_whole_table():
+    first, second = _semester("Sem 1", 300, 0), _semester("Sem 2", 200, 1)
+    # the second file repeats some first-semester rows, which cleaning drops as duplicates
+    second = pd.concat([second, first.iloc[:50]], ignore_index=True)
+    long_df, report = clean_data(first, extra_dfs=[second], marks_range=100)
+    long_df = compute_percentage_column(long_df, 100)
+
+    assert report["source_rows"] == [600, 400]
+    _assert_same(build_source_sketches(long_df, report["source_rows"]), build_sketches(long_df))